@@ -1,9 +1,13 @@
 from fastapi import FastAPI
 
+import asyncio
 import uvicorn
 from contextlib import asynccontextmanager
 from prometheus_client import make_asgi_app
 
+from aisync.engines.llms.clients import get_llm_client_pool
+from aisync.pool import shutdown_pool, start_pool
+
 from aisync_api.server.constants import ROOT_DIR
 
 from .env import env
@@ -13,7 +17,13 @@ from .server.config import AppConfigurer
 
 @asynccontextmanager
 async def main_lifespan(app: FastAPI):
-    yield
+    # Warm workers for suit activation and graph runs, only if AISYNC_POOL_SIZE > 0
+    await asyncio.to_thread(start_pool)
+    try:
+        yield
+    finally:
+        await asyncio.to_thread(shutdown_pool)
+        await get_llm_client_pool().aclose()
 
 
 async def tool_lifespan(app: FastAPI):
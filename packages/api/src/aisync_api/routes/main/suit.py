@@ -0,0 +1,51 @@
+import asyncio
+
+from fastapi import APIRouter
+
+from typing import Any, Optional
+from pydantic import BaseModel
+
+from aisync.armory import get_armory
+from aisync.engines.memory import get_memory_store, last_message_text
+from aisync.pool import arun_graph
+from aisync_api.server.exceptions import BadRequestException, NotFoundException
+
+router = APIRouter(prefix="/suits")
+
+
+"""Invoke a graph of a suit
+- API: 'POST /suits/{suit}/graphs/{graph}/invoke'
+- Runs on a warm worker of the pool when it is running (`AISYNC_POOL_SIZE` > 0), in the API process otherwise
+- With a `session_id` and a memory store (`AISYNC_MEMORY_STORE`), the last message of the input and of the output
+  are saved in the memory of the session
+- Body
+```json
+{
+  "input": {"messages": [["user", "Hello"]]},
+  "config": null,
+  "session_id": "session-42"
+}
+"""
+
+
+class InvokeGraphRequest(BaseModel):
+    input: Any
+    config: Optional[dict] = None
+    session_id: Optional[str] = None
+
+
+@router.post("/{suit}/graphs/{graph}/invoke")
+async def invoke_graph(suit: str, graph: str, body: InvokeGraphRequest):
+    if suit not in get_armory().suits:
+        raise NotFoundException(f"Suit {suit} not found.")
+    store = get_memory_store() if body.session_id is not None else None
+    memory = await store.aget(body.session_id) if store is not None else None
+    if memory is not None and (text := last_message_text(body.input)):
+        await asyncio.to_thread(memory.save_message, "user", text)
+    try:
+        output = await arun_graph(suit, graph, body.input, body.config)
+    except ValueError as e:
+        raise BadRequestException(str(e))
+    if memory is not None and (text := last_message_text(output)):
+        await asyncio.to_thread(memory.save_message, "assistant", text)
+    return {"output": output}
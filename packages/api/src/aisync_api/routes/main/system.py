@@ -6,6 +6,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Annotated, Optional
 from pydantic import BaseModel
 
+from aisync.engines.llms import get_llm_client_pool, get_rate_limiter, get_response_cache, get_single_flight
+from aisync.engines.llms.router import get_router_stats
+from aisync.engines.memory import get_memory_compactor, get_memory_store
 from aisync_api.database.models import TblRole
 from aisync_api.dependencies import get_db_session
 
@@ -39,3 +42,39 @@ async def create_role(
     role = result.scalars().first()
     await session.commit()
     return role
+
+
+"""LLM engine statistics
+- API: 'GET /system/llms/stats'
+- Response: shared LLM clients, response cache hit rate, coalescing ratio of concurrent identical requests, rate
+  limits by provider and model, and latency, error rate and routing decisions of the router backends
+"""
+
+
+@router.get("/llms/stats")
+async def get_llm_stats():
+    response_cache = get_response_cache()
+    return {
+        "clients": get_llm_client_pool().stats(),
+        "response_cache": response_cache.stats.to_dict() if response_cache is not None else None,
+        "coalescing": {**get_single_flight().stats.to_dict(), "in_flight": get_single_flight().in_flight()},
+        "rate_limits": get_rate_limiter().stats(),
+        "routers": get_router_stats(),
+    }
+
+
+"""Conversation memory statistics
+- API: 'GET /system/memory/stats'
+- Response: hot sessions and writes of the memory store, and compression ratio and latency of the memory
+  compactions, null when not configured
+"""
+
+
+@router.get("/memory/stats")
+async def get_memory_stats():
+    memory_store = get_memory_store()
+    memory_compactor = get_memory_compactor()
+    return {
+        "store": memory_store.to_dict() if memory_store is not None else None,
+        "compaction": memory_compactor.stats.to_dict() if memory_compactor is not None else None,
+    }
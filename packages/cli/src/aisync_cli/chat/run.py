@@ -1,13 +1,12 @@
 import asyncio
 import threading
 import time
-from typing import Type
+from typing import TYPE_CHECKING, Type
 
 import click
-from aisync.assistants.actions import get_assistants
-from aisync.assistants.base import Assistant
-from dotenv import find_dotenv, load_dotenv
-from aisync_cli.live.live_previewer import LivePreviewer
+
+if TYPE_CHECKING:
+    from aisync.assistants.base import Assistant
 
 
 @click.command(name="chat")
@@ -29,10 +28,16 @@ def chat(name: str, streaming: bool, monitor: bool, suit: str):
     """
     Run command aisync chat activate --name Jarvis --streaming
     """
+    # Imported here so `aisync --help` does not load the whole stack
+    from aisync.assistants.actions import get_assistants
+    from dotenv import find_dotenv, load_dotenv
+
+    from aisync_cli.live.live_previewer import LivePreviewer
+
     load_dotenv(find_dotenv())
 
     options = get_assistants()
-    ai_class: Type[Assistant] | None = None
+    ai_class: Type["Assistant"] | None = None
     if name:
         for name_, ai_class_ in options:
             if name == name_:
@@ -61,6 +61,8 @@ class LivePreviewer:
                 """Handles fiel change notifications"""
 
                 try:
+                    # Reload only the changed module and the modules depending on it
+                    self.assistant.suit.reload([change_info["path"]])
                     await self.signaler.apublish(
                         channel=self.channel,
                         message=Signal(
@@ -134,7 +136,6 @@ class LivePreviewer:
 
         @self.app.get("/")
         async def root(request: Request):
-            self.assistant.suit.activate()
             graph = list(self.assistant.suit.graphs.values())[0]
             context = {
                 "code": graph.to_mermaid(),
@@ -148,7 +149,6 @@ class LivePreviewer:
 
         @self.app.get("/graph")
         async def get_graph_mermaid():
-            self.assistant.suit.activate()
             graph = list(self.assistant.suit.graphs.values())[0]
             return {"code": graph.to_mermaid()}
 
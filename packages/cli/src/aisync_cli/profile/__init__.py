@@ -0,0 +1,4 @@
+from aisync_cli.profile.run import import_time
+
+
+__all__ = ["import_time"]
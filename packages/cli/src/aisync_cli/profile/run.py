@@ -0,0 +1,35 @@
+import time
+
+import click
+
+
+@click.command(name="import-time")
+@click.option("--suit", help="Name of the suit to profile", default="mark_i")
+@click.option("--limit", help="Only show the N slowest modules", type=int, default=None)
+def import_time(suit: str, limit: int | None):
+    """
+    Run command aisync import-time --suit mark_i --limit 20
+    """
+    # Imported here so `aisync --help` does not load the whole stack
+    from aisync.armory import get_armory
+    from aisync.profiling import format_import_timings
+    from dotenv import find_dotenv, load_dotenv
+
+    load_dotenv(find_dotenv())
+    armory = get_armory()
+    if suit not in armory.suits:
+        click.echo(f"Suit {suit} not found in armory")
+        exit(1)
+
+    start = time.perf_counter()
+    activated = armory.activate(suit, profile_imports=True)
+    elapsed = time.perf_counter() - start
+
+    click.echo(format_import_timings(activated.import_timings, limit))
+    modules = len(activated.import_timings)
+    click.echo(f"\nActivated suit {suit} in {elapsed * 1e3:.1f} ms", nl=False)
+    click.echo(f" ({modules} modules imported)")
+
+
+if __name__ == "__main__":
+    import_time()
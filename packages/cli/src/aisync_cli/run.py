@@ -2,6 +2,7 @@ import click
 
 from aisync_cli.chat import chat
 from aisync_cli.live import live
+from aisync_cli.profile import import_time
 
 
 @click.group()
@@ -11,6 +12,7 @@ def main():
 
 main.add_command(chat)
 main.add_command(live)
+main.add_command(import_time)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,104 @@
+"""Import-time benchmark for the core package and the CLI.
+
+Each target is imported in a fresh interpreter, several times, and the best wall time is compared with its
+budget. Heavy third-party modules a target must not pull in are checked as well, since that is what keeps
+short commands fast regardless of the machine.
+
+Usage:
+    python benchmarks/import_time.py [--runs 5] [--scale 1.0]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import Optional
+
+HEAVY_MODULES = ("langchain_core", "langgraph", "langchain_openai", "loguru", "pydantic_settings", "aiofiles", "git")
+
+
+@dataclass
+class Target:
+    name: str
+    code: str
+    budget_ms: float
+    forbidden: tuple[str, ...] = HEAVY_MODULES
+
+
+TARGETS = [
+    Target("import aisync", "import aisync", 50),
+    Target("import aisync.engines.graph", "import aisync.engines.graph", 100),
+    Target("import aisync.engines.llms", "import aisync.engines.llms", 400, ("langchain_openai", "langgraph")),
+    Target("import aisync.suit", "import aisync.suit", 400, ("langchain_core", "langgraph", "langchain_openai")),
+    Target(
+        "aisync --help",
+        "from aisync_cli.run import main\ntry:\n    main(['--help'])\nexcept SystemExit:\n    pass",
+        250,
+    ),
+]
+
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+exec(compile({code!r}, "<benchmark>", "exec"))
+elapsed = time.perf_counter() - start
+print({marker!r} + __import__("json").dumps([elapsed, sorted(sys.modules)]))
+"""
+_MARKER = "__import_time__"
+
+
+def measure(target: Target) -> Optional[tuple[float, set[str]]]:
+    """Return the wall time of one import of the target and the modules it loaded, or None if unavailable."""
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(code=target.code, marker=_MARKER)],
+        capture_output=True,
+        text=True,
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith(_MARKER):
+            elapsed, modules = json.loads(line[len(_MARKER) :])
+            return elapsed, set(modules)
+    if "ModuleNotFoundError" in result.stderr:
+        return None
+    raise RuntimeError(f"{target.name} failed:\n{result.stderr}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters per target")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget, e.g. on slow CI runners")
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'target':<32} {'best [ms]':>10} {'budget [ms]':>12}  status")
+    for target in TARGETS:
+        runs = [measure(target) for _ in range(args.runs)]
+        if any(run is None for run in runs):
+            print(f"{target.name:<32} {'-':>10} {'-':>12}  skipped (not installed)")
+            continue
+
+        best = min(elapsed for elapsed, _ in runs) * 1e3
+        budget = target.budget_ms * args.scale
+        loaded = runs[0][1]
+        leaked = sorted(
+            module for module in target.forbidden if any(m == module or m.startswith(f"{module}.") for m in loaded)
+        )
+
+        status = "ok"
+        if leaked:
+            status = f"imports {', '.join(leaked)}"
+        elif best > budget:
+            status = "over budget"
+        if status != "ok":
+            failures.append(target.name)
+        print(f"{target.name:<32} {best:>10.1f} {budget:>12.0f}  {status}")
+
+    if failures:
+        print(f"\nImport-time regression in: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
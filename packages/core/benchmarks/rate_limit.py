@@ -0,0 +1,128 @@
+"""Rate limiter check against a local mock of an OpenAI-compatible provider.
+
+The mock provider allows `limit` requests per `window` seconds, replenished continuously like the real providers,
+answers with `x-ratelimit-*` headers and returns 429 once exhausted. A burst of concurrent requests is sent once
+through plain `ChatOpenAI` clients and once through models from `get_llm_object`, which share the process-wide
+rate limiter. The limiter learns the limit from the first response headers, so the second run should see no 429.
+
+Usage:
+    python benchmarks/rate_limit.py [--requests 40] [--limit 10] [--window 2.0]
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockProvider(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, limit: int, window: float):
+        super().__init__(("127.0.0.1", 0), MockProviderHandler)
+        self.limit = limit
+        self.window = window
+        self.available = float(limit)
+        self.updated_at = time.monotonic()
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def admit(self) -> tuple[bool, int, float]:
+        """Return whether a request is admitted, the remaining requests and the seconds until fully replenished."""
+        now = time.monotonic()
+        rate = self.limit / self.window
+        with self.lock:
+            self.available = min(self.limit, self.available + (now - self.updated_at) * rate)
+            self.updated_at = now
+            admitted = self.available >= 1
+            if admitted:
+                self.available -= 1
+            else:
+                self.rejected += 1
+            return admitted, int(self.available), (self.limit - self.available) / rate
+
+
+class MockProviderHandler(BaseHTTPRequestHandler):
+    server: MockProvider
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        admitted, remaining, reset = self.server.admit()
+        # Report the limit per minute, as providers do, scaled from the mock window
+        per_minute = self.server.limit * 60 / self.server.window
+        headers = {
+            "x-ratelimit-limit-requests": f"{per_minute:.0f}",
+            "x-ratelimit-remaining-requests": str(remaining),
+            "x-ratelimit-reset-requests": f"{reset:.3f}s",
+        }
+        if admitted:
+            status = 200
+            payload = {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body["model"],
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "ok"}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 1, "total_tokens": 11},
+            }
+        else:
+            headers["retry-after"] = f"{reset:.3f}"
+            status, payload = 429, {"error": {"message": "Rate limit reached", "type": "requests"}}
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        for name, value in {**headers, "Content-Type": "application/json", "Content-Length": str(len(data))}.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+async def burst(llms: list, prompt: str) -> tuple[int, float]:
+    """Send one request per LLM at once, return how many failed and the elapsed time."""
+    start = time.perf_counter()
+    requests = (llm.ainvoke(f"{prompt} {i}") for i, llm in enumerate(llms))
+    results = await asyncio.gather(*requests, return_exceptions=True)
+    return sum(isinstance(result, Exception) for result in results), time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=40, help="Concurrent requests per run")
+    parser.add_argument("--limit", type=int, default=10, help="Requests allowed by the mock provider per window")
+    parser.add_argument("--window", type=float, default=2.0, help="Window of the mock provider, in seconds")
+    args = parser.parse_args()
+
+    from langchain_openai import ChatOpenAI
+
+    from aisync.engines.llms import get_llm_object, get_rate_limiter
+
+    server = MockProvider(args.limit, args.window)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    config = {"base_url": server.base_url, "api_key": "mock", "max_retries": 0}
+
+    plain = [ChatOpenAI(model="mock-model", **config) for _ in range(args.requests)]
+    failed, elapsed = asyncio.run(burst(plain, "plain"))
+    print(f"{'without rate limiter':<22} {failed:>3} of {args.requests} failed with 429 in {elapsed:.2f}s")
+
+    time.sleep(args.window)
+    server.rejected = 0
+    # A first request teaches the limiter the provider's limits, then the burst goes through it
+    llm = get_llm_object(("LLMChatOpenAI", {**config, "model": "mock-model"}))
+    asyncio.run(llm.ainvoke("warmup"))
+    failed, elapsed = asyncio.run(burst([llm] * args.requests, "limited"))
+    print(f"{'with rate limiter':<22} {failed:>3} of {args.requests} failed with 429 in {elapsed:.2f}s")
+    print(json.dumps(get_rate_limiter().stats(), indent=2))
+    server.shutdown()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,23 +1,33 @@
 import asyncio
-import glob
+import compileall
+import enum
+import hashlib
 import json
 import os
 import shutil
-import tempfile
-import traceback
+import sys
+import threading
+import weakref
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from datetime import datetime
 from pathlib import Path
-from typing import TYPE_CHECKING, List, Optional
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from uuid import uuid4
 
-import aiofiles
-from git import Repo
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 
 from aisync.log import LogEngine
-from aisync.utils import get_registry_dir
+from aisync.manifest import hash_file
+from aisync.object_store import ObjectStore, SuitVersion
+from aisync.utils import dump_json_atomic, get_registry_dir, get_suit_name
 
 if TYPE_CHECKING:
     from aisync.suit import Suit
 
+SUIT_INDEX_VERSION = 1
+DEFAULT_INSTALL_CONCURRENCY = 4
+
 
 class SuitMetadata(BaseModel):
     """Model for suit metadata"""
@@ -29,6 +39,93 @@ class SuitMetadata(BaseModel):
     github_url: Optional[str] = None
     dependencies: List[str] = []
     branch: str = "main"
+    commit: Optional[str] = None
+
+
+class InstallStage(str, enum.Enum):
+    QUEUED = "queued"
+    CLONING = "cloning"
+    VALIDATING = "validating"
+    STORING = "storing"
+    INSTALLING_DEPENDENCIES = "installing_dependencies"
+    COMMITTING = "committing"
+    DONE = "done"
+    FAILED = "failed"
+
+
+@dataclass
+class InstallEvent:
+    source: str
+    stage: InstallStage
+    suit: Optional[str] = None
+    message: Optional[str] = None
+    timestamp: datetime = field(default_factory=datetime.now)
+
+
+class DependencyLockState(BaseModel):
+    """Hashes of the last resolved requirements, the resulting lockfile and the last installed lockfile"""
+
+    requirements_sha256: Optional[str] = None
+    lock_sha256: Optional[str] = None
+    installed_sha256: Optional[str] = None
+
+
+class SuitIndexEntry(BaseModel):
+    """Model for an installed suit in the registry index"""
+
+    name: str
+    path: str
+    metadata: Optional[SuitMetadata] = None
+
+
+class SuitIndex(BaseModel):
+    """Cached listing of the installed suits
+
+    The index is rebuilt only when the suits or metadata directories change, so discovering suits costs two
+    `stat` calls and one small file read no matter how many suits are installed.
+    """
+
+    version: int = SUIT_INDEX_VERSION
+    suits_mtime_ns: int = 0
+    metadata_mtime_ns: int = 0
+    suits: Dict[str, SuitIndexEntry] = {}
+
+
+@dataclass
+class _LoopLocks:
+    install: Dict[str, asyncio.Lock] = field(default_factory=dict)
+    dependencies: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class SuitRegistry(Mapping[str, "Suit"]):
+    """Read-only mapping of suit names to suits, creating each `Suit` on first access."""
+
+    def __init__(self, armory: "Armory"):
+        self._armory = armory
+        self._loaded: dict[str, "Suit"] = {}
+
+    def __getitem__(self, name: str) -> "Suit":
+        if name not in self._loaded:
+            entry = self._armory.index.suits[name]
+            suit = self._armory.load_suit(entry.path)
+            if suit is None:
+                raise KeyError(name)
+            self._loaded[name] = suit
+            self._armory.log.info(f"Loaded suit: {name}")
+        return self._loaded[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._armory.index.suits
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._armory.index.suits)
+
+    def __len__(self) -> int:
+        return len(self._armory.index.suits)
+
+    def discard(self, name: str) -> None:
+        """Forget the loaded suit so it is created again on next access."""
+        self._loaded.pop(name, None)
 
 
 class Armory:
@@ -41,39 +138,116 @@ class Armory:
 
         self.suits_dir = os.path.join(self.registry_dir, "suits")
         self.metadata_dir = os.path.join(self.registry_dir, "metadata")
+        self.versions_dir = os.path.join(self.registry_dir, "versions")
+        self.tmp_dir = os.path.join(self.registry_dir, "tmp")
+        self.index_path = os.path.join(self.registry_dir, "index.json")
+        self.wheels_dir = os.path.join(self.registry_dir, "wheels")
+        self.requirements_path = os.path.join(self.registry_dir, "requirements.in")
+        self.lock_path = os.path.join(self.registry_dir, "requirements.lock")
+        self.constraints_path = os.path.join(self.registry_dir, "constraints.txt")
+        self.lock_state_path = os.path.join(self.registry_dir, "requirements.state.json")
 
         # Create necessary directories
         os.makedirs(self.suits_dir, exist_ok=True)
         os.makedirs(self.metadata_dir, exist_ok=True)
+        os.makedirs(self.versions_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        os.makedirs(self.wheels_dir, exist_ok=True)
 
+        self.object_store = ObjectStore(os.path.join(self.registry_dir, "objects"))
         self.active_suits = []
+        # Asyncio locks are bound to the loop using them, so each running loop gets its own
+        self._loop_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopLocks]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._loop_locks_lock = threading.Lock()
+        self._index: Optional[SuitIndex] = None
         self.suits = self.find_suits()
         self.log.info(f"Initialized suit registry at {self.registry_dir}")
 
-    def find_suits(self) -> dict[str, "Suit"]:
+    def _locks(self) -> "_LoopLocks":
+        loop = asyncio.get_running_loop()
+        with self._loop_locks_lock:
+            locks = self._loop_locks.get(loop)
+            if locks is None:
+                locks = self._loop_locks[loop] = _LoopLocks()
+            return locks
+
+    def _install_lock(self, name: str) -> asyncio.Lock:
+        """Lock serializing the installs of a suit, for the running loop."""
+        return self._locks().install.setdefault(name, asyncio.Lock())
+
+    @property
+    def index(self) -> SuitIndex:
+        """The index of installed suits, rebuilt if the registry changed on disk."""
+        suits_mtime_ns = os.stat(self.suits_dir).st_mtime_ns
+        metadata_mtime_ns = os.stat(self.metadata_dir).st_mtime_ns
+        if self._index is None:
+            self._index = self._load_index()
+        if (self._index.suits_mtime_ns, self._index.metadata_mtime_ns) != (suits_mtime_ns, metadata_mtime_ns):
+            self._index = self._build_index(suits_mtime_ns, metadata_mtime_ns)
+        return self._index
+
+    def _load_index(self) -> SuitIndex:
+        try:
+            with open(self.index_path, "r") as f:
+                index = SuitIndex.model_validate(json.load(f))
+        except (OSError, ValueError, ValidationError):
+            return SuitIndex()
+        return index if index.version == SUIT_INDEX_VERSION else SuitIndex()
+
+    def _build_index(self, suits_mtime_ns: int, metadata_mtime_ns: int) -> SuitIndex:
+        """Scan the suits and metadata directories and save the resulting index."""
+        suits: dict[str, SuitIndexEntry] = {}
+        with os.scandir(self.suits_dir) as it:
+            for dir_entry in it:
+                if not dir_entry.is_dir() or dir_entry.name.startswith("."):
+                    continue
+                suit_name = get_suit_name(dir_entry.path)
+                suits[suit_name] = SuitIndexEntry(
+                    name=suit_name,
+                    path=dir_entry.path,
+                    metadata=self._read_suit_metadata(suit_name),
+                )
+
+        index = SuitIndex(suits_mtime_ns=suits_mtime_ns, metadata_mtime_ns=metadata_mtime_ns, suits=suits)
+        try:
+            dump_json_atomic(self.index_path, index.model_dump())
+        except OSError as e:
+            self.log.warning(f"Failed to save suit index: {e}")
+        self.log.info(f"Indexed {len(suits)} suit(s) in {self.suits_dir}")
+        return index
+
+    def _read_suit_metadata(self, name: str) -> Optional[SuitMetadata]:
+        metadata_path = os.path.join(self.metadata_dir, f"{name}.json")
+        try:
+            with open(metadata_path, "r") as f:
+                return SuitMetadata.model_validate(json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, ValidationError) as e:
+            self.log.warning(f"Invalid metadata for suit {name}: {e}")
+            return None
+
+    def refresh_index(self) -> SuitIndex:
+        """Force a rescan of the registry, e.g. after editing a metadata file in place."""
+        self._index = self._build_index(
+            os.stat(self.suits_dir).st_mtime_ns,
+            os.stat(self.metadata_dir).st_mtime_ns,
+        )
+        return self._index
+
+    def find_suits(self) -> SuitRegistry:
         """
-        Find all suits in the specified path
+        Find all suits in the registry. Suits are only loaded when accessed.
 
         Example:
             >>> find_suits()
-            {'mark_i': '/path/to/mark_i', 'mark_ii': '/path/to/mark_ii'}
+            {'mark_i': <Suit mark_i>, 'mark_ii': <Suit mark_ii>}
         """
 
         assert Path(self.suits_dir).exists(), f"Path '{self.suits_dir}' does not exist."
-
-        try:
-            all_suit_paths: list[str] = [path for path in glob.glob(f"{self.suits_dir}/*") if os.path.isdir(path)]
-
-            suits: dict[str, "Suit"] = {}
-            for path_to_suit in all_suit_paths:
-                suit = self.load_suit(path_to_suit)
-                suits[suit.name] = suit
-                self.log.info(f"Loaded suit: {suit.name}")
-            return suits
-        except Exception as e:
-            self.log.error(f"Error loading suits: {e}")
-            self.log.error(traceback.format_exc())
-            return {}
+        return SuitRegistry(self)
 
     def load_suit(self, path_to_suit: str) -> "Suit":
         """
@@ -87,87 +261,452 @@ class Armory:
         except Exception as e:
             self.log.error(f"Failed to load suit: {e}")
 
-    def activate(self, suit_name: str) -> "Suit":
+    def activate(self, suit_name: str, *, profile_imports: bool = False) -> "Suit":
         # Activate the suit
-        self.suits[suit_name].activate()
-        self.active_suits.append(suit_name)
+        self.suits[suit_name].activate(profile_imports=profile_imports)
+        if suit_name not in self.active_suits:
+            self.active_suits.append(suit_name)
         self.log.info(f"Activated suit: {suit_name}")
         return self.suits[suit_name]
 
-    async def ainstall_from_github(self, github_url: str, branch: str = "main") -> None:
+    async def ainstall_from_github(
+        self, github_url: str, branch: str = "main", *, editable: bool = False
+    ) -> Optional[SuitMetadata]:
         """Install a suit from a GitHub repository.
 
         Args:
-            github_url (str): The URL of the GitHub repository.
+            github_url (str): The URL of the GitHub repository, or the path to a local git repository.
             branch (str, optional): The branch to install. Defaults to "main".
+            editable (bool, optional): Install the files as writable copies, to develop the suit in place, e.g.
+                with the live previewer. Other installs are read-only links to the object store.
         """
-        temp_dir = tempfile.mkdtemp()
-
         try:
-            # Clone the repository
-            self.log.info(f"Cloning repository {github_url} to {temp_dir}")
-            Repo.clone_from(github_url, temp_dir)
-            suit_json_path = os.path.join(temp_dir, "suit.json")
-            if not os.path.exists(suit_json_path):
-                raise ValueError("No `suit.json` file found in the repository.")
+            return await self._ainstall(github_url, branch, editable=editable)
+        except Exception as e:
+            self.log.error(f"Error installing suit from {github_url}: {e}")
 
-            async with aiofiles.open(suit_json_path, "r") as f:
-                metadata_json = await f.read()
+    async def ainstall_many(
+        self,
+        sources: Sequence[Union[str, Tuple[str, str]]],
+        *,
+        max_concurrency: int = DEFAULT_INSTALL_CONCURRENCY,
+        editable: bool = False,
+    ) -> AsyncIterator[InstallEvent]:
+        """Install several suits concurrently, streaming their progress.
 
-            metadata_dict = json.loads(metadata_json)
-            metadata = SuitMetadata(**metadata_dict)
-            metadata.github_url = github_url
+        Suits are cloned and stored concurrently, then the dependencies of the whole batch are resolved and
+        installed in one pass (see `ainstall_dependencies`) before the suits are committed. If the resolution
+        fails, none of them is installed.
 
-            if metadata.name in self.suits:
-                self.log.warning(f"Suit {metadata.name} already exists. Skipping installation.")
-                await self.auninstall_suit(metadata.name)
+        Args:
+            sources: Repository URLs (or local paths), optionally paired with the branch to install.
+            max_concurrency: The maximum number of suits being installed at the same time.
+            editable: Install the files as writable copies, see `ainstall_from_github`.
 
-            # Create the suit directory
-            suit_dir = os.path.join(self.suits_dir, metadata.name)
-            os.makedirs(suit_dir, exist_ok=True)
+        Yields:
+            InstallEvent: The progress of each installation, ending with a `DONE` or `FAILED` event per source.
 
-            # Copy the files to the suit directory
-            for file in os.listdir(temp_dir):
-                if file == ".git":
-                    continue
-                src = os.path.join(temp_dir, file)
-                if os.path.isdir(src):
-                    shutil.copytree(src, os.path.join(suit_dir, file))
+        Example:
+            >>> async for event in armory.ainstall_many(["https://github.com/user/mark_ii"]):
+            ...     print(event.source, event.stage, event.message)
+        """
+        events: asyncio.Queue[InstallEvent] = asyncio.Queue()
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def prepare(url: str, branch: str) -> Optional[Tuple[SuitMetadata, SuitVersion]]:
+            events.put_nowait(InstallEvent(source=url, stage=InstallStage.QUEUED))
+            async with semaphore:
+                try:
+                    return await self._aprepare(url, branch, emit=events.put_nowait)
+                except Exception as e:
+                    self.log.error(f"Error installing suit from {url}: {e}")
+                    events.put_nowait(InstallEvent(source=url, stage=InstallStage.FAILED, message=str(e)))
+                    return None
+
+        async def install() -> None:
+            targets = [(source, "main") if isinstance(source, str) else tuple(source) for source in sources]
+            prepared = await asyncio.gather(*(prepare(url, branch) for url, branch in targets))
+            ready = [(url, *result) for (url, _), result in zip(targets, prepared) if result is not None]
+            if not ready:
+                return
+
+            # One resolution for the whole batch, before any suit is switched to its new version
+            for url, metadata, _ in ready:
+                events.put_nowait(InstallEvent(url, InstallStage.INSTALLING_DEPENDENCIES, metadata.name))
+            try:
+                await self.ainstall_dependencies([metadata for _, metadata, _ in ready])
+            except Exception as e:
+                self.log.error(f"Error installing dependencies: {e}")
+                for url, metadata, _ in ready:
+                    events.put_nowait(InstallEvent(url, InstallStage.FAILED, metadata.name, str(e)))
+                return
+
+            for url, metadata, version in ready:
+                try:
+                    await self._acommit(metadata, version, emit=events.put_nowait, source=url, editable=editable)
+                except Exception as e:
+                    self.log.error(f"Error installing suit from {url}: {e}")
+                    events.put_nowait(InstallEvent(url, InstallStage.FAILED, metadata.name, str(e)))
+
+        done = asyncio.ensure_future(install())
+        try:
+            while not done.done() or not events.empty():
+                getter = asyncio.ensure_future(events.get())
+                await asyncio.wait({getter, done}, return_when=asyncio.FIRST_COMPLETED)
+                if getter.done():
+                    yield getter.result()
                 else:
-                    shutil.copy2(src, os.path.join(suit_dir, file))
+                    getter.cancel()
+        finally:
+            done.cancel()
+            await asyncio.gather(done, return_exceptions=True)
+
+    async def _ainstall(
+        self,
+        url: str,
+        branch: str = "main",
+        *,
+        emit: Optional[Callable[[InstallEvent], None]] = None,
+        editable: bool = False,
+    ) -> SuitMetadata:
+        """Clone, validate and store a suit, resolve its dependencies with the installed ones, then commit it."""
+        metadata, version = await self._aprepare(url, branch, emit=emit)
+        if metadata.dependencies:
+            if emit is not None:
+                emit(InstallEvent(source=url, stage=InstallStage.INSTALLING_DEPENDENCIES, suit=metadata.name))
+            await self.ainstall_dependencies([metadata])
+        await self._acommit(metadata, version, emit=emit, source=url, editable=editable)
+        return metadata
+
+    async def _aprepare(
+        self,
+        url: str,
+        branch: str = "main",
+        *,
+        emit: Optional[Callable[[InstallEvent], None]] = None,
+    ) -> Tuple[SuitMetadata, SuitVersion]:
+        """Clone, validate and add a suit to the object store, without making it the installed version yet.
+
+        Blocking work (git, hashing) runs in worker threads so the event loop stays responsive.
+        """
+
+        def report(stage: InstallStage, suit: Optional[str] = None, message: Optional[str] = None) -> None:
+            if emit is not None:
+                emit(InstallEvent(source=url, stage=stage, suit=suit, message=message))
+
+        clone_dir = os.path.join(self.tmp_dir, uuid4().hex)
+        try:
+            # Clone only the last commit of the requested branch
+            report(InstallStage.CLONING, message=f"Cloning {url}@{branch}")
+            self.log.info(f"Cloning repository {url} to {clone_dir}")
+            commit = await asyncio.to_thread(self._clone, url, branch, clone_dir)
+
+            report(InstallStage.VALIDATING)
+            metadata = await asyncio.to_thread(self._validate_suit, clone_dir)
+            metadata.github_url = url
+            metadata.branch = branch
+            metadata.commit = commit
+
+            report(InstallStage.STORING, metadata.name, f"Storing {metadata.name}@{commit[:12]}")
+            version = await asyncio.to_thread(self._store_version, metadata, clone_dir)
+            return metadata, version
+        finally:
+            if os.path.exists(clone_dir):
+                await asyncio.to_thread(shutil.rmtree, clone_dir, True)
+
+    async def _acommit(
+        self,
+        metadata: SuitMetadata,
+        version: SuitVersion,
+        *,
+        emit: Optional[Callable[[InstallEvent], None]] = None,
+        source: Optional[str] = None,
+        editable: bool = False,
+    ) -> None:
+        """Materialize a stored suit as hardlinks in a staging directory and atomically swap it into place."""
+        async with self._install_lock(metadata.name):
+            if emit is not None:
+                emit(InstallEvent(source=source or "", stage=InstallStage.COMMITTING, suit=metadata.name))
+            if metadata.name in self.suits:
+                self.log.warning(f"Suit {metadata.name} already exists. Replacing it.")
+            await self._aswitch_version(metadata, version, editable=editable)
 
-            if metadata.dependencies:
-                await self.ainstall_dependencies(metadata.dependencies)
+        self.log.info(f"Successfully installed suit: {metadata.name}")
+        if emit is not None:
+            emit(InstallEvent(source=source or "", stage=InstallStage.DONE, suit=metadata.name))
 
-            # Save metadata and update suits dict
-            await self._asave_suit_metadata(metadata)
-            self.suits[metadata.name] = metadata
+    async def arollback_suit(self, name: str, commit: str, *, editable: bool = False) -> SuitMetadata:
+        """Switch an installed suit to a previously installed version.
 
-            self.log.info(f"Successfully installed suit: {metadata.name}")
-            return metadata
-        except Exception as e:
-            self.log.error(f"Error cloning repository: {e}")
+        The files are already in the object store, so this only relinks them.
+
+        Args:
+            name (str): The name of the suit.
+            commit (str): The git commit of the version to restore, as listed by `list_suit_versions`.
+            editable (bool, optional): Restore the files as writable copies, see `ainstall_from_github`. Switching
+                to the current commit this way makes an installed suit editable.
+        """
+        if name not in self.suits:
+            raise ValueError(f"Suit {name} not found in the registry.")
+        version = self.get_suit_version(name, commit)
+        if version is None:
+            raise ValueError(f"Version {commit} of suit {name} is not in the store.")
+
+        metadata = self.index.suits[name].metadata or self._read_suit_metadata(name)
+        if metadata is None:
+            raise ValueError(f"No metadata found for suit {name}.")
+        metadata = metadata.model_copy(update={"commit": version.commit})
+        async with self._install_lock(name):
+            await self._aswitch_version(metadata, version, editable=editable)
+        self.log.info(f"Rolled back suit {name} to {version.commit}")
+        return metadata
+
+    def list_suit_versions(self, name: str) -> List[SuitVersion]:
+        """List the stored versions of a suit, oldest first."""
+        versions_dir = os.path.join(self.versions_dir, name)
+        if not os.path.isdir(versions_dir):
+            return []
+        versions = []
+        for file_name in os.listdir(versions_dir):
+            if file_name.endswith(".json"):
+                with open(os.path.join(versions_dir, file_name), "r") as f:
+                    versions.append(SuitVersion.model_validate(json.load(f)))
+        return sorted(versions, key=lambda version: version.installed_at)
+
+    def get_suit_version(self, name: str, commit: str) -> Optional[SuitVersion]:
+        """Find a stored version of a suit by its full or abbreviated commit."""
+        matches = [version for version in self.list_suit_versions(name) if version.commit.startswith(commit)]
+        if len(matches) > 1:
+            raise ValueError(f"Ambiguous commit {commit} for suit {name}.")
+        return matches[0] if matches else None
+
+    async def aprune_store(self) -> int:
+        """Remove the stored objects not referenced by any version of any suit."""
+
+        def prune() -> int:
+            # Versions being stored are recorded before the lock is released, so they are all listed here
+            with self.object_store.lock.exclusive():
+                referenced = set()
+                for name in os.listdir(self.versions_dir):
+                    for version in self.list_suit_versions(name):
+                        referenced.update(version.files.values())
+                return self.object_store.gc(referenced)
+
+        removed = await asyncio.to_thread(prune)
+        self.log.info(f"Pruned {removed} object(s) from the store")
+        return removed
+
+    def _store_version(self, metadata: SuitMetadata, clone_dir: str) -> SuitVersion:
+        """Add the cloned files to the object store and record them as a version of the suit."""
+        with self.object_store.lock.shared():
+            version = SuitVersion(
+                name=metadata.name,
+                commit=metadata.commit,
+                source=metadata.github_url,
+                files=self.object_store.add_tree(clone_dir),
+            )
+            version_path = os.path.join(self.versions_dir, metadata.name, f"{version.commit}.json")
+            dump_json_atomic(version_path, version.model_dump(mode="json"))
+        return version
+
+    async def _aswitch_version(self, metadata: SuitMetadata, version: SuitVersion, *, editable: bool = False) -> None:
+        """Materialize a version of a suit and make it the installed one, as copies if it is `editable`."""
+        staging_dir = os.path.join(self.suits_dir, f".staging-{uuid4().hex}")
+        try:
+            await asyncio.to_thread(self.object_store.materialize, version.files, staging_dir, copy=editable)
+            await asyncio.to_thread(self._compile_suit, staging_dir, metadata.name)
+            await asyncio.to_thread(self._commit_suit_dir, staging_dir, metadata.name)
         finally:
-            # Clean up temporary directory
-            shutil.rmtree(temp_dir)
+            if os.path.exists(staging_dir):
+                await asyncio.to_thread(shutil.rmtree, staging_dir, True)
+
+        # Save metadata and pick up the new suit in the index
+        await self._asave_suit_metadata(metadata)
+        self.suits.discard(metadata.name)
+        self.refresh_index()
 
-    async def ainstall_dependencies(self, dependencies: List[str]):
-        """Install dependencies asynchronously
+    @staticmethod
+    def _clone(url: str, branch: str, destination: str) -> str:
+        """
+        Shallow, single-branch clone, returning the cloned commit.
+        Local paths are cloned through `file://` so `--depth` is honored.
+        """
+        from git import Repo
+
+        if os.path.isdir(url):
+            url = Path(url).resolve().as_uri()
+        repo = Repo.clone_from(url, destination, depth=1, branch=branch, single_branch=True)
+        return repo.head.commit.hexsha
+
+    @staticmethod
+    def _validate_suit(suit_dir: str) -> SuitMetadata:
+        """Check that a cloned repository is an installable suit and return its metadata."""
+        suit_json_path = os.path.join(suit_dir, "suit.json")
+        if not os.path.exists(suit_json_path):
+            raise ValueError("No `suit.json` file found in the repository.")
+
+        with open(suit_json_path, "r") as f:
+            metadata = SuitMetadata(**json.load(f))
+
+        if not metadata.name.isidentifier() or metadata.name.startswith("."):
+            raise ValueError(f"Invalid suit name {metadata.name!r}: it must be a valid Python identifier.")
+        if not any(Path(suit_dir).rglob("*.py")):
+            raise ValueError(f"Suit {metadata.name} does not contain any Python module.")
+        return metadata
+
+    def _compile_suit(self, staging_dir: str, name: str) -> None:
+        """Precompile a staged suit to bytecode, so its first activation does not have to.
+
+        Compiled in this thread: `workers=0` would fork a process pool per install out of a threaded, possibly async,
+        host, which costs more than it saves on suits of a few dozen modules. The `.pyc` files are compiled from the
+        staged sources, so their timestamps stay valid once moved, and `ddir` records the final location of the suit
+        in tracebacks.
+        """
+        if not compileall.compile_dir(
+            staging_dir, ddir=os.path.join(self.suits_dir, name), quiet=1, workers=1, legacy=False
+        ):
+            self.log.warning(f"Some modules of suit {name} failed to compile, they will be compiled on import")
+
+    def _commit_suit_dir(self, staging_dir: str, name: str) -> None:
+        """Move a staged suit to its final location, replacing the installed one if any."""
+        suit_dir = os.path.join(self.suits_dir, name)
+        trash_dir = os.path.join(self.suits_dir, f".trash-{name}-{uuid4().hex}")
+        replaced = os.path.exists(suit_dir)
+        if replaced:
+            os.replace(suit_dir, trash_dir)
+        try:
+            os.replace(staging_dir, suit_dir)
+        except OSError:
+            if replaced:
+                os.replace(trash_dir, suit_dir)
+            raise
+        if replaced:
+            shutil.rmtree(trash_dir, ignore_errors=True)
+
+    async def ainstall_dependencies(self, pending: Sequence[SuitMetadata] = ()) -> Optional[str]:
+        """Resolve and install the dependencies of every installed suit in a single pass.
+
+        The combined requirements are written to `requirements.in` in the registry and resolved once by
+        `uv pip compile` into `requirements.lock`, which is then installed. The resolution is constrained to the
+        installed versions of the packages AISync itself needs (see `_host_constraints`), so a suit requiring
+        another version of one of them fails to resolve instead of breaking the running environment. Both steps are
+        skipped when their input did not change since the last successful run. Packages are looked up in the
+        registry's `wheels` directory first, and only there when `AISYNC_OFFLINE_INSTALL` is set.
 
         Args:
-            dependencies: List of dependencies to install
+            pending: Suits about to be installed. Their dependencies replace those of the installed suit with
+                the same name, so a conflict fails the resolution before any of them is committed.
+
+        Returns:
+            The path to the lockfile, or None if no suit has dependencies.
         """
-        if not dependencies:
-            return
+        async with self._locks().dependencies:
+            requirements = self._render_requirements(pending)
+            if not requirements:
+                return None
+
+            constraints = self._host_constraints()
+            state = self._load_lock_state()
+            requirements_sha256 = hashlib.sha256((requirements + constraints).encode()).hexdigest()
+            lock_sha256 = hash_file(self.lock_path) if os.path.exists(self.lock_path) else None
+            if state.requirements_sha256 != requirements_sha256 or state.lock_sha256 != lock_sha256:
+                self.log.info(f"Resolving dependencies into {self.lock_path}")
+                await self._acompile_requirements(requirements, constraints)
+                lock_sha256 = hash_file(self.lock_path)
+                state = state.model_copy(
+                    update={"requirements_sha256": requirements_sha256, "lock_sha256": lock_sha256}
+                )
+                dump_json_atomic(self.lock_state_path, state.model_dump())
+
+            if state.installed_sha256 == lock_sha256:
+                self.log.info("Dependencies are up to date")
+                return self.lock_path
+
+            self.log.info(f"Installing dependencies from {self.lock_path}")
+            await self._arun_uv("pip", "install", "-r", self.lock_path)
+            state = state.model_copy(update={"installed_sha256": lock_sha256})
+            dump_json_atomic(self.lock_state_path, state.model_dump())
+            return self.lock_path
+
+    def _render_requirements(self, pending: Sequence[SuitMetadata]) -> str:
+        """Combine the dependencies of the installed and pending suits into a requirements file."""
+        dependencies = {
+            name: entry.metadata.dependencies for name, entry in self.index.suits.items() if entry.metadata is not None
+        }
+        dependencies.update({metadata.name: metadata.dependencies for metadata in pending})
+
+        lines = []
+        for name in sorted(dependencies):
+            if dependencies[name]:
+                lines.append(f"# {name}")
+                lines.extend(dependencies[name])
+        return "\n".join(lines) + "\n" if lines else ""
+
+    @staticmethod
+    def _host_constraints() -> str:
+        """Pin the installed AISync packages and everything they depend on, as a constraints file."""
+        from importlib import metadata
+
+        from packaging.requirements import InvalidRequirement, Requirement
+        from packaging.utils import canonicalize_name
+
+        installed = {canonicalize_name(dist.metadata["Name"]): dist for dist in metadata.distributions()}
+        pending = [name for name in installed if name.startswith("aisync")]
+        pinned: dict[str, str] = {}
+        while pending:
+            name = pending.pop()
+            if name in pinned or name not in installed:
+                continue
+            dist = installed[name]
+            pinned[name] = dist.version
+            for requirement in dist.requires or []:
+                try:
+                    parsed = Requirement(requirement)
+                except InvalidRequirement:
+                    continue
+                # Optional dependencies are not needed by the host
+                if parsed.marker is None or parsed.marker.evaluate({"extra": ""}):
+                    pending.append(canonicalize_name(parsed.name))
+        # The AISync packages themselves are not on any index
+        return "".join(
+            f"{name}=={version}\n" for name, version in sorted(pinned.items()) if not name.startswith("aisync")
+        )
+
+    async def _acompile_requirements(self, requirements: str, constraints: str = "") -> None:
+        """Resolve requirements into the lockfile, leaving the previous lockfile in place on failure."""
+        with open(self.requirements_path, "w") as f:
+            f.write(requirements)
+        with open(self.constraints_path, "w") as f:
+            f.write(constraints)
+        temp_lock_path = f"{self.lock_path}.{uuid4().hex}.tmp"
+        try:
+            await self._arun_uv(
+                "pip",
+                "compile",
+                self.requirements_path,
+                "--constraint",
+                self.constraints_path,
+                "--output-file",
+                temp_lock_path,
+                "--no-header",
+                "--quiet",
+            )
+            os.replace(temp_lock_path, self.lock_path)
+        finally:
+            if os.path.exists(temp_lock_path):
+                os.remove(temp_lock_path)
 
-        self.log.info(f"Installing dependencies: {dependencies}")
+    async def _arun_uv(self, *args: str) -> str:
+        """Run a `uv` command against the current interpreter, preferring the local wheel cache."""
+        from aisync.env import env
 
-        # Create process
+        options = ["--python", sys.executable, "--find-links", self.wheels_dir]
+        if env.AISYNC_OFFLINE_INSTALL:
+            options.append("--offline")
         process = await asyncio.create_subprocess_exec(
             "uv",
-            "pip",
-            "install",
-            *dependencies,
+            *args,
+            *options,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
         )
@@ -177,6 +716,14 @@ class Armory:
         if process.returncode != 0:
             error_msg = stderr.decode() if stderr else "Unknown error"
             raise Exception(f"Error installing dependencies: {error_msg}")
+        return stdout.decode()
+
+    def _load_lock_state(self) -> DependencyLockState:
+        try:
+            with open(self.lock_state_path, "r") as f:
+                return DependencyLockState.model_validate(json.load(f))
+        except (OSError, ValueError, ValidationError):
+            return DependencyLockState()
 
     async def auninstall_suit(self, name: str):
         """Uninstall a suit from the registry"""
@@ -196,14 +743,40 @@ class Armory:
         if os.path.exists(metadata_path):
             os.remove(metadata_path)
 
-        # Remove from suits dict
-        del self.suits[name]
+        # Forget its versions, their objects are reclaimed by `aprune_store`
+        versions_dir = os.path.join(self.versions_dir, name)
+        if os.path.exists(versions_dir):
+            await asyncio.to_thread(shutil.rmtree, versions_dir, True)
+
+        # Remove from the index
+        self.suits.discard(name)
+        if name in self.active_suits:
+            self.active_suits.remove(name)
+        self.refresh_index()
         self.log.info(f"Uninstalled suit: {name}")
         return True
 
     async def _asave_suit_metadata(self, metadata: SuitMetadata) -> None:
-        """Save suit metadata to file asynchronously"""
+        """Save suit metadata to file asynchronously.
+
+        Written to a temporary file renamed into place, which also bumps the mtime of the metadata directory so
+        the suit index of other processes picks the change up.
+        """
         metadata_path = os.path.join(self.metadata_dir, f"{metadata.name}.json")
+        await asyncio.to_thread(dump_json_atomic, metadata_path, metadata.model_dump())
+
+
+_armory: Optional[Armory] = None
+_armory_lock = threading.Lock()
+
 
-        async with aiofiles.open(metadata_path, "w") as f:
-            await f.write(json.dumps(metadata.model_dump(), indent=2))
+def get_armory() -> Armory:
+    """
+    Returns the process-wide armory shared by all assistants.
+    """
+    global _armory
+    if _armory is None:
+        with _armory_lock:
+            if _armory is None:
+                _armory = Armory()
+    return _armory
@@ -3,8 +3,8 @@ import time
 from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING, Generator, Optional, Union
 
-from aisync.armory import Armory
-from aisync.engines.memory import BufferMemory
+from aisync.armory import Armory, get_armory
+from aisync.engines.memory import BufferMemory, get_memory_compactor
 
 if TYPE_CHECKING:
     from aisync.suit import Suit
@@ -15,8 +15,8 @@ class Assistant(ABC):
     should_exit = threading.Event()
 
     def __init__(self, suit: str = "mark_i", graph: Optional[str] = None):
-        self.buffer_memory: BufferMemory = BufferMemory()
-        self.armory: Armory = Armory()
+        self.buffer_memory: BufferMemory = BufferMemory(compactor=get_memory_compactor())
+        self.armory: Armory = get_armory()
         if suit not in self.armory.suits:
             raise ValueError(f"Suit {suit} not found in armory")
         self._suit = self.armory.activate(suit)
@@ -49,6 +49,15 @@ class Assistant(ABC):
 
         self.graph.compile()
 
+    def get_memory(self, session_id: Optional[str] = None) -> BufferMemory:
+        """The memory of a conversation, from the memory store when one is configured, else the assistant's own."""
+        from aisync.engines.memory import get_memory_store
+
+        store = get_memory_store()
+        if session_id is None or store is None:
+            return self.buffer_memory
+        return store.get(session_id)
+
     def start(self, streaming=False) -> None:
         try:
             self.__console_respond(self.greet(streaming=streaming), streaming=streaming)
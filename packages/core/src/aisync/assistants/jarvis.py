@@ -1,8 +1,9 @@
-from typing import TYPE_CHECKING, Generator, Union
+from typing import TYPE_CHECKING, Generator, Iterator, Optional, Union
 
 from aisync.assistants.base import Assistant
 from aisync.engines.graph import SupportedHook
-from aisync.engines.graph.base import ChainStartCallback
+from aisync.engines.graph.base import ChainStartCallback, StreamChunk
+from aisync.engines.memory import BufferMemory, last_message_text
 
 if TYPE_CHECKING:
     from suit import Suit
@@ -22,9 +23,12 @@ class Jarvis(Assistant):
         return self.greet()
 
     def respond(
-        self, input: str, *, streaming: bool = False
+        self, input: str, *, streaming: bool = False, session_id: Optional[str] = None
     ) -> Union[ChainStartCallback, Generator[ChainStartCallback, None, None]]:
-        self.buffer_memory.save_pending_message(input)
+        """Respond to user input. Both turns are saved in the memory of the session, see `get_memory`."""
+        memory = self.get_memory(session_id)
+        memory.save_pending_message(input)
+        memory.save_message("user", input)
 
         def on_chain_start(input):
             return self.suit.execute_hook(SupportedHook.BEFORE_READ_MESSAGE, input, default=input)
@@ -33,20 +37,45 @@ class Jarvis(Assistant):
             return self.suit.execute_hook(SupportedHook.BEFORE_SEND_MESSAGE, chunk, default=chunk)
 
         if not streaming:
-            return self.graph.invoke(
+            output = self.graph.invoke(
                 input,
                 on_chain_start=on_chain_start,
                 on_chunk_generated=on_chunk_generated,
             )
-        return self.graph.stream(
-            input,
-            stream_mode=["updates", "messages"],
-            on_chain_start=on_chain_start,
-            on_chunk_generated=on_chunk_generated,
+            self._save_response(memory, last_message_text(output))
+            return output
+        return self._stream_response(
+            memory,
+            self.graph.stream(
+                input,
+                stream_mode=["updates", "messages"],
+                on_chain_start=on_chain_start,
+                on_chunk_generated=on_chunk_generated,
+            ),
         )
 
-    async def arespond(self, input: str, *, streaming: bool = False) -> Union[str, Generator[str, None, None]]:
-        return self.respond(input)
+    def _stream_response(self, memory: BufferMemory, chunks: Iterator[StreamChunk]) -> Iterator[StreamChunk]:
+        """Yield the chunks of a response, then save the text streamed so far, even if the consumer stopped early."""
+        text = []
+        try:
+            for chunk in chunks:
+                # Message chunks come with their metadata
+                content = getattr(chunk[0] if isinstance(chunk, tuple) else chunk, "content", None)
+                if isinstance(content, str):
+                    text.append(content)
+                yield chunk
+        finally:
+            self._save_response(memory, "".join(text))
+
+    def _save_response(self, memory: BufferMemory, text: Optional[str]) -> None:
+        memory.clear_pending_message()
+        if text:
+            memory.save_message("assistant", text)
+
+    async def arespond(
+        self, input: str, *, streaming: bool = False, session_id: Optional[str] = None
+    ) -> Union[str, Generator[str, None, None]]:
+        return self.respond(input, session_id=session_id)
 
     @property
     def suit(self) -> "Suit":
@@ -2,14 +2,28 @@ from __future__ import annotations
 
 import abc
 import enum
-from typing import Any, Callable, Dict, Iterator, Literal, Optional, Sequence, Tuple, TypeVar, Union, overload
-
-from langchain_core.runnables import RunnableConfig
-from langchain_core.runnables.base import RunnableLike
-from langgraph.types import All, StreamMode
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+    overload,
+)
 
 from aisync.signalers.base import BaseSignaler
 
+if TYPE_CHECKING:
+    from langchain_core.runnables import RunnableConfig
+    from langchain_core.runnables.base import RunnableLike
+    from langgraph.types import All, StreamMode
+
 
 ## Graph
 
@@ -244,3 +258,4 @@ class SupportedHook(str, enum.Enum):
     BEFORE_SEND_MESSAGE = "before_send_message"
     SYSTEM_PROMPT = "build_system_prompt"
     SUIT_LLM = "set_suit_llm"
+    SUIT_EMBEDDER = "set_suit_embedder"
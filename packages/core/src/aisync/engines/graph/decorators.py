@@ -2,7 +2,6 @@ from functools import wraps
 from typing import Any, Callable, Optional, ParamSpec, TypeVar, Union, overload
 
 from .base import Node, Hook
-from .definitions import RuntimeNode
 
 
 P = ParamSpec("P")
@@ -47,6 +46,8 @@ def node(
         func = None
 
     def decorator(call_fn: Callable[P, R]) -> Node:
+        from .definitions import RuntimeNode
+
         node_name = name if name else call_fn.__name__
 
         node_instance = RuntimeNode(node_name, call_fn, llm=llm)
@@ -6,6 +6,7 @@ from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from datetime import datetime
 from functools import wraps
 from typing import (
+    TYPE_CHECKING,
     Annotated,
     Any,
     Callable,
@@ -20,11 +21,6 @@ from typing import (
     overload,
 )
 
-from langchain_core.runnables import RunnableConfig
-from langgraph.graph import END, START, StateGraph
-from langgraph.graph.state import CompiledStateGraph
-from langgraph.types import All, StreamMode
-
 from aisync.engines.graph.base import (
     Branch,
     ChainEndCallback,
@@ -38,7 +34,12 @@ from aisync.engines.graph.base import (
     StreamChunk,
 )
 from aisync.log import LogEngine
-from aisync.signalers import Channel, InMemorySignaler, Signal
+from aisync.signalers import BaseSignaler, Channel, InMemorySignaler, Signal
+
+if TYPE_CHECKING:
+    from langchain_core.runnables import RunnableConfig
+    from langgraph.graph.state import CompiledStateGraph
+    from langgraph.types import All, StreamMode
 
 
 def add_messages(messages: list[tuple[str, str]], new_messages: list[tuple[str, str]]) -> list[tuple[str, str]]:
@@ -74,6 +75,7 @@ def _create_graph_classes() -> Tuple[Graph, Node]:
 
             self._app: CompiledStateGraph = None
             self.signaler = signaler
+            self._telemetry_attachments: list[tuple[BaseSignaler, Optional[str]]] = []
 
         def get_source(self) -> list[_Node]:
             """
@@ -108,6 +110,22 @@ def _create_graph_classes() -> Tuple[Graph, Node]:
             return sink_nodes
 
         def compile(self):
+            # langgraph is only needed once a graph is compiled
+            from langgraph.graph import END, START, StateGraph
+
+            from aisync.engines.llms.telemetry import get_llm_telemetry
+
+            # The LLM calls of the nodes are published along with their executions, replacing the previous
+            # compilation's attachments in case the signaler or the nodes changed since. Calls are attributed to
+            # the suit of their node, or to "" outside of suits.
+            telemetry = get_llm_telemetry()
+            for attached_signaler, suit in self._telemetry_attachments:
+                telemetry.detach(attached_signaler, suit)
+            suits = {node.suit or "" for node in self.nodes.values()}
+            self._telemetry_attachments = [(self.signaler, suit) for suit in suits]
+            for attached_signaler, suit in self._telemetry_attachments:
+                telemetry.attach(attached_signaler, suit)
+
             langgraph_builder = StateGraph(State)
             sources = self.get_source()
 
@@ -526,12 +544,20 @@ def _create_graph_classes() -> Tuple[Graph, Node]:
             self.call = call_fn
             self.edges: list[Union[_Node, ConditionalBranchAction]] = []
 
+        @property
+        def suit(self) -> Optional[str]:
+            """Name of the suit defining the node, whose modules are imported as `suits.<name>.<module>`."""
+            package, _, rest = self.call.__module__.partition(".")
+            return rest.partition(".")[0] if package == "suits" and rest else None
+
         @property
         def action(self):
             """Wraps `self.call`, injects `llm` if available, and modifies type hints to exclude `llm`."""
             original_type_hints = get_type_hints(self.call)
             adjusted_type_hints = {k: v for k, v in original_type_hints.items() if k != "llm"}
 
+            from aisync.engines.llms.telemetry import llm_context
+
             @wraps(self.call)
             def action(*args, **kwargs):
                 self.signaler.publish(
@@ -545,7 +571,8 @@ def _create_graph_classes() -> Tuple[Graph, Node]:
                 )
                 if self.llm is not None:
                     kwargs["llm"] = self.llm
-                return self.call(*args, **kwargs)
+                with llm_context(suit=self.suit, node=self.alias):
+                    return self.call(*args, **kwargs)
 
             action.__annotations__ = adjusted_type_hints
             return action
@@ -1,6 +1,6 @@
-from typing import TYPE_CHECKING, Union
+from typing import TYPE_CHECKING, Any, Optional, Union
 
-from aisync.engines.llms import get_llm_object
+from aisync.engines.llms import get_llm_object, release_llm_object
 
 if TYPE_CHECKING:
     from aisync.engines.graph import SupportedHook
@@ -14,18 +14,46 @@ class Kernel:
 
     @property
     def supported_hook(self) -> "SupportedHook":
-        from aisync.decorators.hook import SupportedHook
+        from aisync.engines.graph import SupportedHook
 
         return SupportedHook
 
     def load_natural_language(self, suit: "Suit"):
         self.set_llm(self._load(self.supported_hook.SUIT_LLM, suit=suit, default="LLMChatOpenAI"))
+        self.set_embedder(self._load(self.supported_hook.SUIT_EMBEDDER, suit=suit, default=None))
 
-    def _load(self, hook: "SupportedHook", *, suit: "Suit", default: str) -> Union[str, tuple[str, dict]]:
+    def _load(
+        self, hook: "SupportedHook", *, suit: "Suit", default: Optional[str]
+    ) -> Optional[Union[str, tuple[str, dict]]]:
         return suit.execute_hook(hook, default=default)
 
     def set_llm(self, llm_cls_name: Union[str, tuple[str, dict]]) -> None:
+        previous = getattr(self, "llm", None)
         self.llm = get_llm_object(llm_cls_name)
-
-    def find_llm(self, llm_cls_name: Union[str, tuple[str, dict]]) -> None:
-        return get_llm_object(llm_cls_name)
+        if previous is not None:
+            release_llm_object(previous)
+
+    def find_llm(self, llm_cls_name: Union[str, tuple[str, dict]]) -> Any:
+        # Not pooled: callers keep the LLM without ever giving it back, which would pin a pooled one forever
+        return get_llm_object(llm_cls_name, pooled=False)
+
+    def set_embedder(self, embedder_cls_name: Optional[Union[str, tuple[str, dict]]]) -> None:
+        previous = getattr(self, "embedder", None)
+        self.embedder: Optional[Any] = get_llm_object(embedder_cls_name) if embedder_cls_name else None
+        if previous is not None:
+            release_llm_object(previous)
+
+    def close(self) -> None:
+        """Give the LLM and the embedder back to the client pool. Called when the kernel is garbage collected."""
+        llm, self.llm = getattr(self, "llm", None), None
+        embedder, self.embedder = getattr(self, "embedder", None), None
+        for obj in (llm, embedder):
+            if obj is not None:
+                release_llm_object(obj)
+
+    def __del__(self) -> None:
+        try:
+            self.close()
+        except Exception:
+            # The client pool may already be gone at interpreter shutdown
+            pass
@@ -1,13 +1,60 @@
 from aisync.engines.llms.base import (
+    AISyncEmbedder,
+    AISyncLLM,
+    LLMRegistry,
     get_llm_cls,
     get_llm_object,
+    get_llm_registry,
     get_llm_schemas,
+    list_supported_embedders,
     list_supported_llm_models,
+    register_llm,
+    release_llm_object,
 )
+from aisync.engines.llms.cache import (
+    InMemoryResponseCache,
+    ResponseCache,
+    SQLiteResponseCache,
+    get_response_cache,
+    with_response_cache,
+)
+from aisync.engines.llms.clients import LLMClientPool, get_llm_client_pool, wrap_llm
+from aisync.engines.llms.coalesce import CoalescingStats, SingleFlight, get_single_flight, with_single_flight
+from aisync.engines.llms.ratelimit import RateLimiter, TokenBucket, get_rate_limiter, llm_priority, with_rate_limit
+from aisync.engines.llms.telemetry import LLMTelemetry, get_llm_telemetry, llm_context, llm_retry, with_telemetry
 
 __all__ = [
+    "AISyncEmbedder",
+    "AISyncLLM",
+    "CoalescingStats",
+    "InMemoryResponseCache",
+    "LLMClientPool",
+    "LLMRegistry",
+    "LLMTelemetry",
+    "RateLimiter",
+    "ResponseCache",
+    "SQLiteResponseCache",
+    "SingleFlight",
+    "TokenBucket",
+    "get_llm_client_pool",
     "get_llm_cls",
     "get_llm_object",
+    "get_llm_registry",
     "get_llm_schemas",
+    "get_llm_telemetry",
+    "get_rate_limiter",
+    "get_response_cache",
+    "get_single_flight",
+    "list_supported_embedders",
     "list_supported_llm_models",
+    "llm_context",
+    "llm_priority",
+    "llm_retry",
+    "register_llm",
+    "release_llm_object",
+    "with_rate_limit",
+    "with_response_cache",
+    "with_single_flight",
+    "with_telemetry",
+    "wrap_llm",
 ]
@@ -1,6 +1,10 @@
 import importlib
-from typing import List, Optional, Type, Union
+import threading
+from importlib.metadata import entry_points
+from types import ModuleType
+from typing import Dict, List, Optional, Type, Union
 
+from aisync.log import LogEngine
 from aisync.utils import dict_deep_extend
 from pydantic import BaseModel, ConfigDict
 
@@ -12,13 +16,23 @@ class AISyncLLM(BaseModel):
     language model instances within the AISync framework.
 
     Attributes:
-        _pyclass (Type): A class reference to the default language model implementation.
+        _pyclass (Union[Type, str]): The default language model implementation, or its import path as
+            `"module:Class"` so the provider package is only imported when a model is created.
         model_config (ConfigDict): Configuration options specific to the AISync model.
     """
 
-    _pyclass: Type
+    _pyclass: Union[Type, str]
     model_config = ConfigDict(protected_namespaces=())
 
+    @classmethod
+    def get_pyclass(cls) -> Type:
+        """Return the language model implementation, importing it on first use."""
+        pyclass = cls._pyclass.default
+        if isinstance(pyclass, str):
+            module_name, _, class_name = pyclass.partition(":")
+            pyclass = getattr(importlib.import_module(module_name), class_name)
+        return pyclass
+
     @classmethod
     def get_llm(cls, config) -> Type:
         """Retrieve an LLM instance based on configuration.
@@ -29,27 +43,140 @@ class AISyncLLM(BaseModel):
         Returns:
             Type: An instance of the LLM configured with the provided parameters.
         """
-        return cls._pyclass.default(**config)
+        return cls.get_pyclass()(**config)
 
 
-def list_supported_llm_models() -> List[AISyncLLM]:
-    """Lists all supported AISync LLM classes from the configuration module.
+class AISyncEmbedder(AISyncLLM):
+    """Base class for AISync embedding models.
+
+    Embedders are resolved by name like the chat models, e.g. as the embedder of a suit, but are left out of the
+    chat model listings and schemas.
+    """
+
+
+class LLMRegistry:
+    """Index of the supported AISync LLM classes, by class name.
+
+    The registry is built once, on first use, from the classes defined in `.configs` and the ones exposed by
+    installed packages through the `aisync.llms` entry point group. An entry point may refer to an `AISyncLLM`
+    subclass or to a module whose subclasses are all registered:
+
+        [project.entry-points."aisync.llms"]
+        anthropic = "my_package.llms:LLMChatAnthropic"
+    """
 
-    Dynamically imports the module containing LLM configurations, identifies
-    all classes inheriting from the base `AISyncLLM` class, and returns them.
+    ENTRY_POINT_GROUP = "aisync.llms"
+
+    def __init__(self):
+        self.log = LogEngine(self.__class__.__name__)
+        self._llms: Optional[Dict[str, Type[AISyncLLM]]] = None
+        self._registered: Dict[str, Type[AISyncLLM]] = {}
+        self._schemas: Dict[str, dict] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def llms(self) -> Dict[str, Type[AISyncLLM]]:
+        if self._llms is None:
+            with self._lock:
+                if self._llms is None:
+                    self._llms = self._discover()
+        return self._llms
+
+    def _discover(self) -> Dict[str, Type[AISyncLLM]]:
+        llms: Dict[str, Type[AISyncLLM]] = {}
+        module = importlib.import_module(name=".configs", package=__package__)
+        for llm_cls in self._find_llm_classes(module):
+            llms[llm_cls.__name__] = llm_cls
+
+        for entry_point in entry_points(group=self.ENTRY_POINT_GROUP):
+            try:
+                loaded = entry_point.load()
+            except Exception as e:
+                self.log.error(f"Failed to load LLM entry point {entry_point.name} ({entry_point.value}): {e}")
+                continue
+            found = self._find_llm_classes(loaded) if isinstance(loaded, ModuleType) else [loaded]
+            for llm_cls in found:
+                if not (isinstance(llm_cls, type) and issubclass(llm_cls, AISyncLLM)):
+                    self.log.error(f"LLM entry point {entry_point.name} does not refer to an AISyncLLM subclass")
+                    continue
+                if llm_cls.__name__ in llms and llms[llm_cls.__name__] is not llm_cls:
+                    self.log.warning(
+                        f"LLM {llm_cls.__name__} from entry point {entry_point.name} overrides another one"
+                    )
+                llms[llm_cls.__name__] = llm_cls
+        llms.update(self._registered)
+        return llms
+
+    @staticmethod
+    def _find_llm_classes(module: ModuleType) -> List[Type[AISyncLLM]]:
+        return [
+            attr
+            for attr in vars(module).values()
+            if isinstance(attr, type) and issubclass(attr, AISyncLLM) and attr not in (AISyncLLM, AISyncEmbedder)
+        ]
+
+    def register(self, llm_cls: Type[AISyncLLM], name: Optional[str] = None) -> Type[AISyncLLM]:
+        """Register an LLM class, replacing any class registered under the same name. Usable as a decorator."""
+        if not (isinstance(llm_cls, type) and issubclass(llm_cls, AISyncLLM)):
+            raise ValueError(f"{llm_cls!r} is not an AISyncLLM subclass.")
+        name = name or llm_cls.__name__
+        with self._lock:
+            self._registered[name] = llm_cls
+            if self._llms is not None:
+                self._llms[name] = llm_cls
+            self._schemas.pop(name, None)
+        return llm_cls
+
+    def refresh(self) -> None:
+        """Discover the LLM classes again on next use, e.g. after installing a package providing LLMs."""
+        with self._lock:
+            self._llms = None
+            self._schemas = {}
+
+    def get(self, name: str) -> Optional[Type[AISyncLLM]]:
+        return self.llms.get(name)
+
+    def chat_models(self) -> Dict[str, Type[AISyncLLM]]:
+        return {name: llm_cls for name, llm_cls in self.llms.items() if not issubclass(llm_cls, AISyncEmbedder)}
+
+    def embedders(self) -> Dict[str, Type[AISyncEmbedder]]:
+        return {name: llm_cls for name, llm_cls in self.llms.items() if issubclass(llm_cls, AISyncEmbedder)}
+
+    def schemas(self) -> Dict[str, dict]:
+        """JSON schemas of the registered chat model classes, computed once per class."""
+        llms = self.chat_models()
+        with self._lock:
+            for name, llm_cls in llms.items():
+                if name not in self._schemas:
+                    self._schemas[name] = llm_cls.model_json_schema()
+            return {name: self._schemas[name] for name in llms}
+
+
+_registry = LLMRegistry()
+
+
+def get_llm_registry() -> LLMRegistry:
+    """Returns the process-wide registry of AISync LLM classes."""
+    return _registry
+
+
+def register_llm(llm_cls: Type[AISyncLLM]) -> Type[AISyncLLM]:
+    """Class decorator registering an AISync LLM defined outside of `.configs`."""
+    return _registry.register(llm_cls)
+
+
+def list_supported_llm_models() -> List[AISyncLLM]:
+    """Lists all supported AISync LLM classes.
 
     Returns:
-        List[AISyncLLM]: A list of subclasses of `AISyncLLM` representing supported LLMs.
+        List[AISyncLLM]: A list of subclasses of `AISyncLLM` representing supported LLMs, embedders excluded.
     """
-    supported_llms = []
-    module = importlib.import_module(name=".configs", package=__package__)
+    return list(_registry.chat_models().values())
 
-    for attr_name in dir(module):
-        attr = getattr(module, attr_name)
-        if hasattr(attr, "__bases__") and AISyncLLM in attr.__bases__:
-            supported_llms.append(attr)
 
-    return supported_llms
+def list_supported_embedders() -> List[AISyncEmbedder]:
+    """Lists all supported AISync embedder classes."""
+    return list(_registry.embedders().values())
 
 
 def get_llm_cls(cls_name: str) -> Optional[AISyncLLM]:
@@ -61,40 +188,28 @@ def get_llm_cls(cls_name: str) -> Optional[AISyncLLM]:
     Returns:
         Optional[AISyncLLM]: The corresponding AISyncLLM class if found; otherwise, None.
     """
-    llms = list_supported_llm_models()
-    for llm in llms:
-        if llm.__name__ == cls_name:
-            return llm
-    return None
+    return _registry.get(cls_name)
 
 
 def get_llm_schemas():
     """Retrieve JSON schemas for all supported AISync LLM configurations.
 
-    Iterates over all language models supported by AISync, extracting
-    their respective JSON schemas, and returns a dictionary mapping
-    class names to schemas.
-
     Returns:
         dict: A dictionary where keys are class names of supported AISync LLMs
               and values are their corresponding JSON schemas.
     """
-    schemas = {}
-
-    llms = list_supported_llm_models()
-    for cfg_cls in llms:
-        schemas[cfg_cls.__name__] = cfg_cls.model_json_schema()
+    return _registry.schemas()
 
-    return schemas
 
-
-def get_llm_object(llm_cls_name: Union[str, tuple[str, dict]]):
+def get_llm_object(llm_cls_name: Union[str, tuple[str, dict]], *, pooled: bool = True):
     """Get an LLM object instance by its class name or class/configuration tuple.
 
     Args:
         llm_cls_name (Union[str, tuple[str, dict]]): Either a string representing
             the class name of the LLM (e.g., "LLMChatOpenAI") or a tuple containing
             the class name and a configuration dictionary.
+        pooled (bool): Share the instance (and its HTTP connections) with every caller using the same
+            configuration. Give it back with `release_llm_object` once done. Defaults to True.
 
     Returns:
         Any: An instance of the specified LLM class, configured with provided parameters.
@@ -102,6 +217,8 @@ def get_llm_object(llm_cls_name: Union[str, tuple[str, dict]]):
     Raises:
         ValueError: If the specified LLM class name is not found in the AISync LLMs.
     """
+    from aisync.engines.llms.clients import get_llm_client_pool, wrap_llm
+
     llm_config = None
     if not isinstance(llm_cls_name, str):
         llm_cls_name, llm_config = llm_cls_name
@@ -111,4 +228,13 @@ def get_llm_object(llm_cls_name: Union[str, tuple[str, dict]]):
         raise ValueError(f"LLM {llm_cls_name} not found. Using LLMChatOpenAI instead.")
 
     llm_config = dict_deep_extend(llm_cls().model_dump(), llm_config or {})
-    return llm_cls.get_llm(llm_config)
+    if not pooled:
+        return wrap_llm(llm_cls.get_llm(llm_config))
+    return get_llm_client_pool().acquire(llm_cls, llm_config)
+
+
+def release_llm_object(llm) -> None:
+    """Give back an LLM obtained from `get_llm_object`, so it can be evicted once nobody uses it."""
+    from aisync.engines.llms.clients import get_llm_client_pool
+
+    get_llm_client_pool().release(llm)
@@ -0,0 +1,334 @@
+import abc
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, AsyncIterator, ClassVar, Dict, Iterator, List, Optional, Tuple, Type
+
+from aisync.engines.llms.layers import agenerate_next, astream_next, layer_model_class
+from aisync.log import LogEngine
+from aisync.utils import get_registry_dir
+
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+    from langchain_core.messages import BaseMessage
+    from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "hit_rate": self.hit_rate}
+
+
+class ResponseCache(abc.ABC):
+    """Exact-match store of serialized LLM responses, with an optional time to live and size limit"""
+
+    def __init__(self, *, max_entries: int = 10_000, ttl: Optional[float] = None):
+        """Initialize the cache.
+
+        Args:
+            max_entries: The maximum number of responses kept, least recently used ones are evicted first.
+            ttl: Seconds after which a response expires. None keeps responses until they are evicted.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Return the response stored under `key`, or None if missing or expired."""
+
+    @abc.abstractmethod
+    def set(self, key: str, value: str) -> None:
+        """Store a response under `key`, evicting the least recently used ones beyond `max_entries`."""
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        """Remove every response."""
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl is not None and now - created_at >= self.ttl
+
+
+class InMemoryResponseCache(ResponseCache):
+    """LRU response cache living in the current process"""
+
+    def __init__(self, *, max_entries: int = 1024, ttl: Optional[float] = None):
+        super().__init__(max_entries=max_entries, ttl=ttl)
+        self._entries: OrderedDict[str, Tuple[float, str]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[0], time.time()):
+                del self._entries[key]
+                self.stats.expirations += 1
+                entry = None
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            self.stats.writes += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteResponseCache(ResponseCache):
+    """Response cache persisted in a SQLite database, shared by every process using the same file"""
+
+    def __init__(self, path: Optional[str] = None, *, max_entries: int = 10_000, ttl: Optional[float] = None):
+        super().__init__(max_entries=max_entries, ttl=ttl)
+        self.path = path or os.path.join(get_registry_dir(), "llm_cache.sqlite")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and self._expired(row[1], now):
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.stats.expirations += 1
+                row = None
+            if row is None:
+                self.stats.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self.stats.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self.stats.writes += 1
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+                self.stats.evictions += count - self.max_entries
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _dumps(value: Any) -> str:
+    from langchain_core.load import dumps
+
+    return dumps(value)
+
+
+def _loads(value: str) -> Any:
+    from langchain_core._api import LangChainBetaWarning
+    from langchain_core.load import loads
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", LangChainBetaWarning)
+        return loads(value)
+
+
+def _normalize_messages(messages: List["BaseMessage"]) -> List[dict]:
+    """Messages as plain dicts without their ids, which differ between otherwise identical requests."""
+    from langchain_core.messages import message_to_dict
+
+    normalized = []
+    for message in messages:
+        message_dict = message_to_dict(message)
+        message_dict["data"].pop("id", None)
+        normalized.append(message_dict)
+    return normalized
+
+
+def make_request_key(llm: "BaseChatModel", mode: str, messages: List["BaseMessage"], stop, kwargs) -> Optional[str]:
+    """
+    Hash identifying a chat model request: its mode ("generate" or "stream"), messages, model and parameters.
+    Returns None when the request cannot be serialized, e.g. tools given as functions.
+    """
+    try:
+        payload = json.dumps(
+            [mode, _normalize_messages(messages), llm._get_llm_string(stop=stop, **kwargs)],
+            sort_keys=True,
+            default=repr,
+        )
+    except Exception:
+        return None
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class CachedChatModelMixin:
+    """Chat model layer answering exact repeats of a request from `response_cache`.
+
+    Complete responses and complete streams are cached under different keys. A cached stream is replayed chunk
+    by chunk, so callbacks and streaming consumers see the same tokens as for the original call. Requests are
+    only cached when the model is deterministic (temperature 0) unless `cache_nondeterministic` is set.
+    """
+
+    response_cache: ClassVar[ResponseCache]
+    cache_nondeterministic: ClassVar[bool] = False
+
+    def _response_cache_key(self, mode: str, messages: List["BaseMessage"], stop, kwargs) -> Optional[str]:
+        if not self.cache_nondeterministic and getattr(self, "temperature", None) != 0:
+            return None
+        return make_request_key(self, mode, messages, stop, kwargs)
+
+    @staticmethod
+    def _strip_ids(generations: list) -> list:
+        for generation in generations:
+            generation.message.id = None
+        return generations
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> "ChatResult":
+        from langchain_core.outputs import ChatResult
+
+        key = self._response_cache_key("generate", messages, stop, kwargs)
+        if key is not None and (cached := self.response_cache.get(key)) is not None:
+            return ChatResult(generations=_loads(cached))
+        result = super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        if key is not None:
+            value = _dumps(self._strip_ids([g.model_copy(deep=True) for g in result.generations]))
+            self.response_cache.set(key, value)
+        return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> "ChatResult":
+        from langchain_core.outputs import ChatResult
+
+        key = self._response_cache_key("generate", messages, stop, kwargs)
+        if key is not None and (cached := await asyncio.to_thread(self.response_cache.get, key)) is not None:
+            return ChatResult(generations=_loads(cached))
+        result = await agenerate_next(self, CachedChatModelMixin, messages, stop, run_manager, **kwargs)
+        if key is not None:
+            value = _dumps(self._strip_ids([g.model_copy(deep=True) for g in result.generations]))
+            await asyncio.to_thread(self.response_cache.set, key, value)
+        return result
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator["ChatGenerationChunk"]:
+        key = self._response_cache_key("stream", messages, stop, kwargs)
+        if key is not None and (cached := self.response_cache.get(key)) is not None:
+            yield from _loads(cached)
+            return
+        chunks = []
+        for chunk in super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+            chunks.append(chunk.model_copy(deep=True))
+            yield chunk
+        # Only complete streams are cached, a consumer stopping early never gets here
+        if key is not None:
+            self.response_cache.set(key, _dumps(self._strip_ids(chunks)))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator["ChatGenerationChunk"]:
+        key = self._response_cache_key("stream", messages, stop, kwargs)
+        if key is not None and (cached := await asyncio.to_thread(self.response_cache.get, key)) is not None:
+            for chunk in _loads(cached):
+                yield chunk
+            return
+        chunks = []
+        async for chunk in astream_next(self, CachedChatModelMixin, messages, stop, run_manager, **kwargs):
+            chunks.append(chunk.model_copy(deep=True))
+            yield chunk
+        if key is not None:
+            await asyncio.to_thread(self.response_cache.set, key, _dumps(self._strip_ids(chunks)))
+
+
+def cached_model_class(
+    base: Type["BaseChatModel"], cache: ResponseCache, *, cache_nondeterministic: bool = False
+) -> Type["BaseChatModel"]:
+    """Return a subclass of a chat model class answering from `cache`. Subclasses are created once per cache."""
+    return layer_model_class(
+        CachedChatModelMixin, base, response_cache=cache, cache_nondeterministic=cache_nondeterministic
+    )
+
+
+def with_response_cache(llm: "BaseChatModel", cache: ResponseCache, *, cache_nondeterministic: bool = False):
+    """Return a copy of a chat model that answers exact repeats of a request from `cache`.
+
+    Other LLM objects are returned as-is.
+
+    Example:
+        >>> llm = with_response_cache(ChatOpenAI(temperature=0), InMemoryResponseCache(ttl=3600))
+    """
+    from langchain_core.language_models import BaseChatModel
+
+    if not isinstance(llm, BaseChatModel) or isinstance(llm, CachedChatModelMixin):
+        return llm
+    cached = llm.model_copy()
+    cached.__class__ = cached_model_class(type(llm), cache, cache_nondeterministic=cache_nondeterministic)
+    return cached
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Returns the process-wide LLM response cache configured by the `AISYNC_LLM_CACHE*` settings, or None if
+    response caching is disabled.
+    """
+    from aisync.env import env
+
+    global _response_cache
+    if _response_cache is None and env.AISYNC_LLM_CACHE:
+        with _response_cache_lock:
+            if _response_cache is None:
+                if env.AISYNC_LLM_CACHE == "sqlite":
+                    _response_cache = SQLiteResponseCache(
+                        env.AISYNC_LLM_CACHE_PATH,
+                        max_entries=env.AISYNC_LLM_CACHE_MAX_ENTRIES,
+                        ttl=env.AISYNC_LLM_CACHE_TTL,
+                    )
+                else:
+                    _response_cache = InMemoryResponseCache(
+                        max_entries=env.AISYNC_LLM_CACHE_MAX_ENTRIES,
+                        ttl=env.AISYNC_LLM_CACHE_TTL,
+                    )
+                LogEngine("ResponseCache").info(f"Caching LLM responses in {_response_cache.__class__.__name__}")
+    return _response_cache
@@ -0,0 +1,234 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Optional, Type
+
+from aisync.log import LogEngine
+
+if TYPE_CHECKING:
+    import httpx
+
+    from aisync.engines.llms.base import AISyncLLM
+
+DEFAULT_IDLE_TTL = 300.0
+DEFAULT_MAX_IDLE = 32
+
+
+@dataclass
+class PooledLLM:
+    key: str
+    llm: Any
+    refcount: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class LLMClientPool:
+    """Shared LLM instances, keyed by their class and resolved configuration.
+
+    Equal configurations share one LLM instance, and every instance whose class accepts `http_client` and
+    `http_async_client` (e.g. `ChatOpenAI`) shares the pool's HTTP clients, so concurrent nodes and kernels reuse
+    the same keep-alive connections instead of each opening their own.
+
+    `acquire` and `release` count the users of each instance. Instances nobody uses are evicted once idle for
+    `idle_ttl` seconds, or least recently used first when there are more than `max_idle` of them.
+    """
+
+    def __init__(
+        self,
+        *,
+        idle_ttl: float = DEFAULT_IDLE_TTL,
+        max_idle: int = DEFAULT_MAX_IDLE,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+    ):
+        self.log = LogEngine(self.__class__.__name__)
+        self.idle_ttl = idle_ttl
+        self.max_idle = max_idle
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self._entries: Dict[str, PooledLLM] = {}
+        self._keys: Dict[int, str] = {}
+        # Reentrant, a router creates its backends through the pool while being created
+        self._lock = threading.RLock()
+        self._http_client: Optional["httpx.Client"] = None
+        self._http_async_client: Optional["httpx.AsyncClient"] = None
+
+    @staticmethod
+    def make_key(llm_cls: Type["AISyncLLM"], config: Dict[str, Any]) -> str:
+        """Hash of the LLM class and its resolved configuration."""
+        payload = json.dumps([f"{llm_cls.__module__}.{llm_cls.__qualname__}", config], sort_keys=True, default=repr)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _limits(self) -> "httpx.Limits":
+        import httpx
+
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    @staticmethod
+    def _event_hooks(asynchronous: bool) -> Dict[str, list]:
+        from aisync.env import env
+
+        hooks = {}
+        if env.AISYNC_LLM_TELEMETRY:
+            from aisync.engines.llms.telemetry import get_llm_telemetry
+
+            telemetry = get_llm_telemetry()
+            hooks["request"] = [telemetry.aon_request if asynchronous else telemetry.on_request]
+        if env.AISYNC_LLM_RATE_LIMIT:
+            from aisync.engines.llms.ratelimit import get_rate_limiter
+
+            rate_limiter = get_rate_limiter()
+            hooks["response"] = [rate_limiter.aon_response if asynchronous else rate_limiter.on_response]
+        return hooks
+
+    @property
+    def http_client(self) -> "httpx.Client":
+        if self._http_client is None:
+            import httpx
+
+            self._http_client = httpx.Client(limits=self._limits(), event_hooks=self._event_hooks(asynchronous=False))
+        return self._http_client
+
+    @property
+    def http_async_client(self) -> "httpx.AsyncClient":
+        if self._http_async_client is None:
+            import httpx
+
+            self._http_async_client = httpx.AsyncClient(
+                limits=self._limits(), event_hooks=self._event_hooks(asynchronous=True)
+            )
+        return self._http_async_client
+
+    def _create(self, llm_cls: Type["AISyncLLM"], config: Dict[str, Any]) -> Any:
+        pyclass = llm_cls.get_pyclass()
+        fields = getattr(pyclass, "model_fields", {})
+        shared_clients = {}
+        if "http_client" in fields and config.get("http_client") is None:
+            shared_clients["http_client"] = self.http_client
+        if "http_async_client" in fields and config.get("http_async_client") is None:
+            shared_clients["http_async_client"] = self.http_async_client
+        return wrap_llm(llm_cls.get_llm({**config, **shared_clients}))
+
+    def acquire(self, llm_cls: Type["AISyncLLM"], config: Dict[str, Any]) -> Any:
+        """Return the shared LLM for this configuration, creating it if needed. Pair with `release`."""
+        key = self.make_key(llm_cls, config)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = PooledLLM(key=key, llm=self._create(llm_cls, config))
+                self._entries[key] = entry
+                self._keys[id(entry.llm)] = key
+            entry.refcount += 1
+            entry.last_used = time.monotonic()
+            self._evict_idle()
+            return entry.llm
+
+    def release(self, llm: Any) -> None:
+        """Give back an LLM obtained from `acquire`. Unknown objects are ignored."""
+        with self._lock:
+            key = self._keys.get(id(llm))
+            entry = self._entries.get(key) if key else None
+            if entry is None or entry.llm is not llm:
+                return
+            entry.refcount = max(entry.refcount - 1, 0)
+            entry.last_used = time.monotonic()
+            self._evict_idle()
+
+    def evict_idle(self) -> int:
+        """Drop the LLMs that are not used anymore and idle for too long. Returns how many were dropped."""
+        with self._lock:
+            return self._evict_idle()
+
+    def _evict_idle(self) -> int:
+        now = time.monotonic()
+        idle = sorted((entry for entry in self._entries.values() if entry.refcount == 0), key=lambda e: e.last_used)
+        expired = [entry for entry in idle if now - entry.last_used >= self.idle_ttl]
+        overflow = idle[len(expired) :][: max(len(idle) - len(expired) - self.max_idle, 0)]
+        for entry in expired + overflow:
+            del self._entries[entry.key]
+            self._keys.pop(id(entry.llm), None)
+        return len(expired) + len(overflow)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            in_use = sum(1 for entry in self._entries.values() if entry.refcount > 0)
+            return {"clients": len(self._entries), "in_use": in_use, "idle": len(self._entries) - in_use}
+
+    def close(self) -> None:
+        """Drop every LLM and close the shared HTTP clients. Prefer `aclose` from a running event loop."""
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+            http_client, self._http_client = self._http_client, None
+            http_async_client, self._http_async_client = self._http_async_client, None
+        if http_client is not None:
+            http_client.close()
+        if http_async_client is not None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                asyncio.run(http_async_client.aclose())
+            else:
+                loop.create_task(http_async_client.aclose())
+
+    async def aclose(self) -> None:
+        """Drop every LLM and close the shared HTTP clients."""
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+            http_client, self._http_client = self._http_client, None
+            http_async_client, self._http_async_client = self._http_async_client, None
+        if http_client is not None:
+            http_client.close()
+        if http_async_client is not None:
+            await http_async_client.aclose()
+
+
+def wrap_llm(llm: Any) -> Any:
+    """
+    Add the layers configured by the `AISYNC_LLM_*` settings to a chat model, from the innermost: telemetry, rate
+    limiting, response cache and coalescing of concurrent identical requests. Other LLM objects are returned as-is.
+    """
+    from aisync.engines.llms.cache import get_response_cache, with_response_cache
+    from aisync.engines.llms.coalesce import with_single_flight
+    from aisync.engines.llms.ratelimit import with_rate_limit
+    from aisync.engines.llms.telemetry import with_telemetry
+    from aisync.env import env
+
+    # Telemetry measures the provider calls themselves, so cache hits and coalesced requests cost no tokens
+    if env.AISYNC_LLM_TELEMETRY:
+        llm = with_telemetry(llm)
+    # Cache hits are not rate limited, and concurrent identical requests check the response cache once
+    if env.AISYNC_LLM_RATE_LIMIT:
+        llm = with_rate_limit(llm)
+    response_cache = get_response_cache()
+    if response_cache is not None:
+        llm = with_response_cache(llm, response_cache)
+    if env.AISYNC_LLM_COALESCE:
+        llm = with_single_flight(llm)
+    return llm
+
+
+_client_pool: Optional[LLMClientPool] = None
+_client_pool_lock = threading.Lock()
+
+
+def get_llm_client_pool() -> LLMClientPool:
+    """
+    Returns the process-wide pool of LLM clients.
+    """
+    global _client_pool
+    if _client_pool is None:
+        with _client_pool_lock:
+            if _client_pool is None:
+                _client_pool = LLMClientPool()
+    return _client_pool
@@ -0,0 +1,341 @@
+import asyncio
+import threading
+from dataclasses import asdict, dataclass, field
+from functools import partial
+from typing import TYPE_CHECKING, Any, AsyncIterator, ClassVar, Dict, Hashable, Iterator, List, Optional, Tuple, Type
+
+from aisync.engines.llms.cache import make_request_key
+from aisync.engines.llms.layers import agenerate_next, astream_next, layer_model_class
+
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+    from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+
+@dataclass
+class CoalescingStats:
+    requests: int = 0
+    """Requests that went through the single-flight layer."""
+    upstream_calls: int = 0
+    """Requests that actually called the model."""
+    coalesced: int = 0
+    """Requests served by another request's in-flight call."""
+
+    @property
+    def coalescing_ratio(self) -> float:
+        return self.coalesced / self.requests if self.requests else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "coalescing_ratio": self.coalescing_ratio}
+
+
+@dataclass
+class _Flight:
+    """An in-flight `generate` call, awaited by threads."""
+
+    done: threading.Event = field(default_factory=threading.Event)
+    result: Optional["ChatResult"] = None
+    error: Optional[BaseException] = None
+
+    def wait(self) -> "ChatResult":
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result.model_copy(deep=True)
+
+
+@dataclass
+class _StreamFlight:
+    """An in-flight `stream` call, followed by threads from its first chunk whenever they join."""
+
+    chunks: List["ChatGenerationChunk"] = field(default_factory=list)
+    done: bool = False
+    error: Optional[BaseException] = None
+    changed: threading.Condition = field(default_factory=threading.Condition)
+    followers: int = 0
+    """Requests that joined the call, counted under the lock of the `SingleFlight`."""
+
+    def publish(self, chunk: "ChatGenerationChunk") -> None:
+        with self.changed:
+            self.chunks.append(chunk.model_copy(deep=True))
+            self.changed.notify_all()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        with self.changed:
+            self.done, self.error = True, error
+            self.changed.notify_all()
+
+    def follow(self) -> Iterator["ChatGenerationChunk"]:
+        index = 0
+        while True:
+            with self.changed:
+                self.changed.wait_for(lambda: index < len(self.chunks) or self.done)
+                chunk = self.chunks[index] if index < len(self.chunks) else None
+                if chunk is None and self.error is not None:
+                    raise self.error
+            if chunk is None:
+                return
+            index += 1
+            yield chunk.model_copy(deep=True)
+
+
+@dataclass
+class _AsyncFlight:
+    """An in-flight `agenerate` call. The call runs in its own task, cancelled once nobody awaits it anymore."""
+
+    task: asyncio.Task
+    waiters: int = 0
+
+    async def wait(self) -> "ChatResult":
+        self.waiters += 1
+        try:
+            result = await asyncio.shield(self.task)
+        finally:
+            self.waiters -= 1
+            if self.waiters == 0 and not self.task.done():
+                self.task.cancel()
+        return result.model_copy(deep=True)
+
+
+@dataclass
+class _AsyncStreamFlight:
+    """An in-flight `astream` call, pumped by its own task so a reader leaving early does not stop the others."""
+
+    chunks: List["ChatGenerationChunk"] = field(default_factory=list)
+    done: bool = False
+    error: Optional[BaseException] = None
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+    readers: int = 0
+    task: Optional[asyncio.Task] = None
+
+    def _notify(self) -> None:
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    async def pump(self, stream: AsyncIterator["ChatGenerationChunk"], on_done) -> None:
+        try:
+            async for chunk in stream:
+                self.chunks.append(chunk.model_copy(deep=True))
+                self._notify()
+        except BaseException as e:
+            self.error = e
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            on_done()
+            self.done = True
+            self._notify()
+
+    async def follow(self, on_abandon) -> AsyncIterator["ChatGenerationChunk"]:
+        index = 0
+        self.readers += 1
+        try:
+            while True:
+                if index < len(self.chunks):
+                    index += 1
+                    yield self.chunks[index - 1].model_copy(deep=True)
+                elif self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                else:
+                    await self.changed.wait()
+        finally:
+            self.readers -= 1
+            if self.readers == 0 and not self.done:
+                on_abandon()
+                self.task.cancel()
+
+
+class SingleFlight:
+    """Registry of in-flight chat model calls, so concurrent identical requests share one upstream call.
+
+    A request arriving while an identical one is in flight waits for that call instead of making its own. Streaming
+    requests joining late first receive the chunks produced so far, then the live tail. Calls are only shared while
+    in flight, see `ResponseCache` to reuse completed responses.
+    """
+
+    def __init__(self):
+        self.stats = CoalescingStats()
+        self._flights: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key: Hashable, factory, on_follow=None) -> Tuple[Any, bool]:
+        """Return the flight in progress for `key`, or a new one from `factory`, and whether the caller leads it.
+
+        `on_follow` is called with the flight, under the lock, when the caller joins a flight in progress.
+        """
+        with self._lock:
+            self.stats.requests += 1
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.stats.coalesced += 1
+                if on_follow is not None:
+                    on_follow(flight)
+                return flight, False
+            flight = self._flights[key] = factory()
+            self.stats.upstream_calls += 1
+            return flight, True
+
+    def _leave(self, key: Hashable, flight: Any) -> None:
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+    def generate(self, key: str, call) -> "ChatResult":
+        flight, leader = self._join(("generate", key), _Flight)
+        if not leader:
+            return flight.wait()
+        try:
+            result = call()
+            flight.result = result.model_copy(deep=True)
+            return result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            self._leave(("generate", key), flight)
+            flight.done.set()
+
+    def _follow(self, flight: _StreamFlight) -> None:
+        flight.followers += 1
+
+    def _abandon(self, key: Hashable, flight: _StreamFlight) -> bool:
+        """Leave a stream its first caller stopped reading, unless other requests follow it. Returns True if left."""
+        with self._lock:
+            if flight.followers:
+                return False
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            return True
+
+    def _drain(self, key: Hashable, flight: _StreamFlight, chunks: Iterator["ChatGenerationChunk"]) -> None:
+        error = None
+        try:
+            for chunk in chunks:
+                flight.publish(chunk)
+        except Exception as e:
+            error = e
+        finally:
+            self._leave(key, flight)
+            flight.finish(error)
+
+    def stream(self, key: str, call) -> Iterator["ChatGenerationChunk"]:
+        flight_key = ("stream", key)
+        flight, leader = self._join(flight_key, _StreamFlight, on_follow=self._follow)
+        if not leader:
+            yield from flight.follow()
+            return
+        # The first caller drives the call
+        chunks = call()
+        try:
+            for chunk in chunks:
+                flight.publish(chunk)
+                yield chunk
+        except GeneratorExit:
+            # Stopped early: the requests following it get the rest of the call, read in the background
+            if self._abandon(flight_key, flight):
+                flight.finish(RuntimeError("The coalesced stream was stopped before completion."))
+            else:
+                threading.Thread(target=self._drain, args=(flight_key, flight, chunks), daemon=True).start()
+            raise
+        except BaseException as e:
+            self._leave(flight_key, flight)
+            flight.finish(e)
+            raise
+        self._leave(flight_key, flight)
+        flight.finish()
+
+    async def agenerate(self, key: str, call) -> "ChatResult":
+        flight_key = ("agenerate", id(asyncio.get_running_loop()), key)
+
+        def factory():
+            task = asyncio.ensure_future(call())
+            task.add_done_callback(lambda _: self._leave(flight_key, flight))
+            flight = _AsyncFlight(task=task)
+            return flight
+
+        flight, _ = self._join(flight_key, factory)
+        return await flight.wait()
+
+    async def astream(self, key: str, call) -> AsyncIterator["ChatGenerationChunk"]:
+        flight_key = ("astream", id(asyncio.get_running_loop()), key)
+
+        def factory():
+            flight = _AsyncStreamFlight()
+            flight.task = asyncio.ensure_future(flight.pump(call(), lambda: self._leave(flight_key, flight)))
+            return flight
+
+        flight, _ = self._join(flight_key, factory)
+        async for chunk in flight.follow(lambda: self._leave(flight_key, flight)):
+            yield chunk
+
+
+class CoalescingChatModelMixin:
+    """Chat model layer sharing one upstream call between concurrent identical requests, see `SingleFlight`.
+
+    Like the response cache, only requests to a deterministic model (temperature 0) are coalesced, so concurrent
+    requests sampling several answers each get their own.
+    """
+
+    single_flight: ClassVar[SingleFlight]
+
+    def _coalescing_key(self, mode: str, messages, stop, kwargs) -> Optional[str]:
+        if kwargs.get("temperature", getattr(self, "temperature", None)) != 0:
+            return None
+        return make_request_key(self, mode, messages, stop, kwargs)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> "ChatResult":
+        key = self._coalescing_key("generate", messages, stop, kwargs)
+        call = partial(super()._generate, messages, stop=stop, run_manager=run_manager, **kwargs)
+        return call() if key is None else self.single_flight.generate(key, call)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> "ChatResult":
+        key = self._coalescing_key("generate", messages, stop, kwargs)
+        call = partial(agenerate_next, self, CoalescingChatModelMixin, messages, stop, run_manager, **kwargs)
+        return await (call() if key is None else self.single_flight.agenerate(key, call))
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator["ChatGenerationChunk"]:
+        key = self._coalescing_key("stream", messages, stop, kwargs)
+        call = partial(super()._stream, messages, stop=stop, run_manager=run_manager, **kwargs)
+        yield from call() if key is None else self.single_flight.stream(key, call)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator["ChatGenerationChunk"]:
+        key = self._coalescing_key("stream", messages, stop, kwargs)
+        call = partial(astream_next, self, CoalescingChatModelMixin, messages, stop, run_manager, **kwargs)
+        async for chunk in call() if key is None else self.single_flight.astream(key, call):
+            yield chunk
+
+
+def coalescing_model_class(base: Type["BaseChatModel"], single_flight: SingleFlight) -> Type["BaseChatModel"]:
+    """Return a subclass of a chat model class coalescing its requests through `single_flight`."""
+    return layer_model_class(CoalescingChatModelMixin, base, single_flight=single_flight)
+
+
+def with_single_flight(llm: "BaseChatModel", single_flight: Optional[SingleFlight] = None):
+    """Return a copy of a chat model sharing one upstream call between concurrent identical requests.
+
+    Other LLM objects are returned as-is. Uses the process-wide `SingleFlight` unless one is given.
+
+    Example:
+        >>> llm = with_single_flight(ChatOpenAI(temperature=0))
+    """
+    from langchain_core.language_models import BaseChatModel
+
+    if not isinstance(llm, BaseChatModel) or isinstance(llm, CoalescingChatModelMixin):
+        return llm
+    coalescing = llm.model_copy()
+    coalescing.__class__ = coalescing_model_class(type(llm), single_flight or get_single_flight())
+    return coalescing
+
+
+_single_flight = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    """Returns the process-wide registry of in-flight chat model calls."""
+    return _single_flight
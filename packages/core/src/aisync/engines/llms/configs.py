@@ -1,11 +1,43 @@
-from typing import Type
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-from aisync.engines.llms.base import AISyncLLM
-from langchain_openai import ChatOpenAI
+from aisync.engines.llms.base import AISyncEmbedder, AISyncLLM
 
 
 class LLMChatOpenAI(AISyncLLM):
-    _pyclass: Type = ChatOpenAI
+    _pyclass: str = "langchain_openai:ChatOpenAI"
 
     model: str = "gpt-4o-mini"
     temperature: float = 0.0
+
+
+class LLMRouter(AISyncLLM):
+    """Routes each request to the fastest healthy backend, failing over to the next ones on errors."""
+
+    _pyclass: str = "aisync.engines.llms.router:RouterChatModel"
+
+    backends: List[Union[str, Tuple[str, Dict[str, Any]]]] = ["LLMChatOpenAI"]
+    alpha: float = 0.3
+    max_error_rate: float = 0.5
+    cooldown: float = 30.0
+
+
+class LLMChatFake(AISyncLLM):
+    """Local chat model with a configurable pace and error injection, for load tests without a provider."""
+
+    _pyclass: str = "aisync.engines.llms.fake:FakeChatModel"
+
+    model: str = "fake-chat"
+    template: str = "You said: {input}"
+    time_to_first_token: float = 0.2
+    tokens_per_second: float = 50.0
+    error_rate: float = 0.0
+    error_after_tokens: Optional[int] = None
+    seed: Optional[int] = None
+
+
+class EmbedderFeatureHashing(AISyncEmbedder):
+    """Deterministic local embeddings, usable as the embedder of `PGVector` without a provider."""
+
+    _pyclass: str = "aisync.engines.llms.fake:FeatureHashingEmbeddings"
+
+    dimension: int = 1536
@@ -0,0 +1,188 @@
+import asyncio
+import hashlib
+import math
+import random
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import BaseModel, PrivateAttr
+
+_TOKEN = re.compile(r"\s*\S+")
+_WORD = re.compile(r"\w+")
+
+
+class FakeLLMError(RuntimeError):
+    """Error injected by `FakeChatModel`."""
+
+
+class FakeChatModel(BaseChatModel):
+    """Local chat model answering from a template at a configurable pace, for load tests without a provider.
+
+    The answer is `template` formatted with `input` (the last message), `messages` (the number of messages) and
+    `model`, and is streamed word by word: the first after `time_to_first_token` seconds, the next ones at
+    `tokens_per_second`. Errors are injected at random with `error_rate`, either before the first token or, with
+    `error_after_tokens`, in the middle of the answer. With a `seed`, the injected errors are reproducible.
+    """
+
+    model: str = "fake-chat"
+    template: str = "You said: {input}"
+    time_to_first_token: float = 0.2
+    tokens_per_second: float = 50.0
+    """Pace of the tokens after the first one, 0 for no delay."""
+    error_rate: float = 0.0
+    error_after_tokens: Optional[int] = None
+    seed: Optional[int] = None
+    temperature: float = 0.0
+
+    _random: random.Random = PrivateAttr()
+    _random_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def model_post_init(self, __context: Any) -> None:
+        super().model_post_init(__context)
+        self._random = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model, "template": self.template, "temperature": self.temperature}
+
+    def _answer(self, messages: List[BaseMessage]) -> List[str]:
+        last = messages[-1].content if messages else ""
+        return _TOKEN.findall(self.template.format(input=last, messages=len(messages), model=self.model))
+
+    def _fails_after(self) -> Optional[int]:
+        """Number of tokens produced before the injected error of this call, None when the call succeeds."""
+        with self._random_lock:
+            fails = self.error_rate > 0 and self._random.random() < self.error_rate
+        return (self.error_after_tokens or 0) if fails else None
+
+    def _delay(self, index: int) -> float:
+        if index == 0:
+            return self.time_to_first_token
+        return 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _usage(self, messages: List[BaseMessage], tokens: List[str]) -> Dict[str, int]:
+        input_tokens = sum(len(_TOKEN.findall(str(message.content))) for message in messages)
+        return {"input_tokens": input_tokens, "output_tokens": len(tokens), "total_tokens": input_tokens + len(tokens)}
+
+    def _chunks(self, messages: List[BaseMessage]) -> Iterator[tuple[float, Optional[ChatGenerationChunk]]]:
+        """Delays and chunks of an answer. A None chunk means the injected error is due."""
+        tokens = self._answer(messages)
+        fails_after = self._fails_after()
+        for index, token in enumerate(tokens):
+            if fails_after is not None and index >= fails_after:
+                yield self._delay(index), None
+                return
+            usage = self._usage(messages, tokens) if index == len(tokens) - 1 else None
+            yield self._delay(index), ChatGenerationChunk(message=AIMessageChunk(content=token, usage_metadata=usage))
+        if fails_after is not None:
+            yield 0.0, None
+
+    def _error(self) -> FakeLLMError:
+        return FakeLLMError(f"Injected error from {self.model}")
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        chunks = []
+        for delay, chunk in self._chunks(messages):
+            time.sleep(delay)
+            if chunk is None:
+                raise self._error()
+            chunks.append(chunk)
+        return _to_result(chunks)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        chunks = []
+        for delay, chunk in self._chunks(messages):
+            await asyncio.sleep(delay)
+            if chunk is None:
+                raise self._error()
+            chunks.append(chunk)
+        return _to_result(chunks)
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        for delay, chunk in self._chunks(messages):
+            time.sleep(delay)
+            if chunk is None:
+                raise self._error()
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        for delay, chunk in self._chunks(messages):
+            await asyncio.sleep(delay)
+            if chunk is None:
+                raise self._error()
+            yield chunk
+
+
+def _to_result(chunks: List[ChatGenerationChunk]) -> ChatResult:
+    message = AIMessage(content="".join(chunk.message.content for chunk in chunks))
+    if chunks:
+        message.usage_metadata = chunks[-1].message.usage_metadata
+    return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class FeatureHashingEmbeddings(BaseModel, Embeddings):
+    """Deterministic embeddings hashing the words and word pairs of a text into a fixed number of dimensions.
+
+    Texts sharing words get close vectors, so similarity search behaves plausibly, without a model or a network.
+    Vectors are L2-normalized, and identical in every process for the same text and dimension.
+    """
+
+    dimension: int = 1536
+
+    def _features(self, text: str) -> List[str]:
+        words = _WORD.findall(text.lower())
+        return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimension
+        for feature in self._features(text):
+            digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            # The lowest bit gives the sign, so colliding features tend to cancel out instead of adding up
+            vector[(value >> 1) % self.dimension] += 1.0 if value & 1 else -1.0
+        norm = math.sqrt(sum(x * x for x in vector))
+        return [x / norm for x in vector] if norm else vector
+
+    def embed_documents(self, texts: List[str], chunk_size: Optional[int] = None) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self.embed_query(text)
+
+    async def aembed_documents(self, texts: List[str], chunk_size: Optional[int] = None) -> List[List[float]]:
+        return self.embed_documents(texts)
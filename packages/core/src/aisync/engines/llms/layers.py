@@ -0,0 +1,95 @@
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Optional, Tuple, Type
+
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+    from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+_layered_classes: Dict[Tuple[type, type, Tuple], type] = {}
+_layered_classes_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _implements(cls: type, name: str, after: Optional[type] = None) -> bool:
+    """
+    Whether `cls`, or the classes after `after` in its MRO, implement `name` rather than `BaseChatModel`'s fallback.
+    """
+    from langchain_core.language_models import BaseChatModel
+
+    mro = cls.__mro__
+    for klass in mro[mro.index(after) + 1 :] if after else mro:
+        if name in vars(klass):
+            return vars(klass)[name] is not vars(BaseChatModel)[name]
+    return False
+
+
+def _base_to_json(instance: "BaseChatModel", base: type) -> Dict[str, Any]:
+    """Serialize a layered model as `base`, including the name which defaults to the name of the layered class."""
+    serialized = base.to_json(instance)
+    if serialized.get("name") == type(instance).__name__:
+        serialized["name"] = base.__name__
+    return serialized
+
+
+def layer_model_class(mixin: type, base: Type["BaseChatModel"], **class_vars: Any) -> Type["BaseChatModel"]:
+    """Return a subclass of a chat model class with a layer mixin on top, created once per mixin, base and values.
+
+    The streaming methods the base class does not implement are left to `BaseChatModel`, so langchain still falls
+    back to a single generation instead of calling a stream that does not exist.
+    """
+    key = (mixin, base, tuple((name, id(value)) for name, value in sorted(class_vars.items())))
+    with _layered_classes_lock:
+        if key not in _layered_classes:
+            from langchain_core.language_models import BaseChatModel
+
+            namespace = {
+                "__module__": base.__module__,
+                "__annotations__": {name: mixin.__annotations__[name] for name in class_vars},
+                # Serialized, hence in response cache keys, as the base model whatever layers are enabled
+                "lc_id": classmethod(lambda cls: base.lc_id()),
+                "to_json": lambda self: _base_to_json(self, base),
+                **class_vars,
+            }
+            if not _implements(base, "_stream"):
+                namespace["_stream"] = BaseChatModel._stream
+                if not _implements(base, "_astream"):
+                    namespace["_astream"] = BaseChatModel._astream
+            # The mixin's own name ends with "ChatModelMixin", e.g. CachedChatModelMixin gives CachedChatOpenAI
+            prefix = mixin.__name__.removesuffix("ChatModelMixin")
+            _layered_classes[key] = type(f"{prefix}{base.__name__}", (mixin, base), namespace)
+        return _layered_classes[key]
+
+
+async def agenerate_next(instance, mixin: type, messages, stop=None, run_manager=None, **kwargs) -> "ChatResult":
+    """
+    Call `_agenerate` of the class after `mixin`. When that class only generates synchronously, its `_generate` runs
+    in an executor, instead of `BaseChatModel`'s fallback which would go through the layers again.
+    """
+    following = super(mixin, instance)
+    if _implements(type(instance), "_agenerate", after=mixin):
+        return await following._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    from langchain_core.runnables.config import run_in_executor
+
+    sync_run_manager = run_manager.get_sync() if run_manager else None
+    return await run_in_executor(None, following._generate, messages, stop, sync_run_manager, **kwargs)
+
+
+async def astream_next(
+    instance, mixin: type, messages, stop=None, run_manager=None, **kwargs
+) -> AsyncIterator["ChatGenerationChunk"]:
+    """Call `_astream` of the class after `mixin`, or iterate its `_stream` in an executor, see `agenerate_next`."""
+    following = super(mixin, instance)
+    if _implements(type(instance), "_astream", after=mixin):
+        async for chunk in following._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+            yield chunk
+        return
+
+    from langchain_core.runnables.config import run_in_executor
+
+    sync_run_manager = run_manager.get_sync() if run_manager else None
+    iterator = await run_in_executor(None, following._stream, messages, stop, sync_run_manager, **kwargs)
+    done = object()
+    while (chunk := await run_in_executor(None, next, iterator, done)) is not done:
+        yield chunk
@@ -0,0 +1,505 @@
+import asyncio
+import heapq
+import itertools
+import math
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    ClassVar,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Type,
+)
+
+from aisync.engines.llms.layers import agenerate_next, astream_next, layer_model_class
+from aisync.log import LogEngine
+
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+    from langchain_core.messages import BaseMessage
+    from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+DEFAULT_PRIORITY = 100
+DEFAULT_COMPLETION_TOKENS = 256
+DEFAULT_RETRY_AFTER = 1.0
+
+_priority: ContextVar[int] = ContextVar("aisync_llm_priority", default=DEFAULT_PRIORITY)
+_current_key: ContextVar[Optional[Tuple[str, str]]] = ContextVar("aisync_llm_rate_limit_key", default=None)
+
+
+@contextmanager
+def llm_priority(priority: int):
+    """Run the LLM calls made inside the block with a priority, lower values being served first.
+
+    Example:
+        >>> with llm_priority(0):
+        ...     llm.invoke("Classify this message")
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """Bucket of `capacity` tokens refilled continuously at `refill_rate` tokens per second.
+
+    Taking tokens may leave the bucket negative, e.g. when a request used more tokens than estimated, which
+    delays the next requests until the debt is refilled.
+    """
+
+    def __init__(self, capacity: float = math.inf, refill_rate: float = math.inf):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.tokens = capacity
+        self.blocked_until = 0.0
+        self._updated_at = time.monotonic()
+
+    @classmethod
+    def per_minute(cls, limit: Optional[float]) -> "TokenBucket":
+        return cls() if limit is None else cls(limit, limit / 60)
+
+    def _refill(self, now: float) -> None:
+        if math.isinf(self.capacity):
+            self.tokens = self.capacity
+        elif now > self._updated_at:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.refill_rate)
+        self._updated_at = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """Seconds to wait before `amount` tokens can be taken. Amounts above the capacity wait for a full bucket."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.tokens
+        wait = missing / self.refill_rate if missing > 0 else 0.0
+        return max(wait, self.blocked_until - now)
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.tokens -= amount
+
+    def give(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def sync(
+        self,
+        now: float,
+        limit: Optional[float] = None,
+        remaining: Optional[float] = None,
+        reset: Optional[float] = None,
+    ) -> None:
+        """Align the bucket with the limits reported by the provider, e.g. through rate-limit headers."""
+        self._refill(now)
+        if limit is not None and limit != self.capacity:
+            self.capacity, self.refill_rate = limit, limit / 60
+            self.tokens = min(self.tokens, limit)
+        if remaining is not None:
+            self.tokens = min(self.tokens, remaining)
+            if remaining <= 0 and reset is not None:
+                self.blocked_until = max(self.blocked_until, now + reset)
+
+
+@dataclass
+class _Waiter:
+    priority: int
+    seq: int
+    wake: Callable[[], None] = field(compare=False)
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+@dataclass
+class _ModelLimits:
+    requests: TokenBucket
+    tokens: TokenBucket
+    queue: List[_Waiter] = field(default_factory=list)
+    waited: float = 0.0
+    throttled: int = 0
+
+    def delay(self, tokens: float, now: float) -> float:
+        return max(self.requests.delay(1, now), self.tokens.delay(tokens, now))
+
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def _parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse a reset duration as sent by OpenAI-compatible providers, e.g. "1s", "6m0s" or "20ms"."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts) if parts else None
+
+
+def _parse_number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class RateLimiter:
+    """Token buckets for requests and tokens per minute, per provider and model, shared by the whole process.
+
+    Each call first estimates its token cost, then waits in a priority queue until both buckets of its model allow
+    it. Once answered, the estimate is corrected with the actual usage. Limits come from the configuration, keyed
+    by provider (`"openai-chat"`) or provider and model (`"openai-chat:gpt-4o"`), and are adjusted with the
+    `x-ratelimit-*` and `retry-after` headers of the provider's responses. Models without known limits are not
+    throttled until a response reports them.
+    """
+
+    def __init__(self, limits: Optional[Mapping[str, Mapping[str, float]]] = None):
+        """Initialize the rate limiter.
+
+        Args:
+            limits: `requests_per_minute` and `tokens_per_minute` by provider or `provider:model`.
+        """
+        self.log = LogEngine(self.__class__.__name__)
+        self._limits: Dict[str, Dict[str, float]] = {}
+        self._models: Dict[Tuple[str, str], _ModelLimits] = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        for name, config in (limits or {}).items():
+            provider, _, model = name.partition(":")
+            self.configure(provider, model or None, **config)
+
+    def configure(
+        self,
+        provider: str,
+        model: Optional[str] = None,
+        *,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+    ) -> None:
+        """Set the limits of a provider, or of one of its models. Applies to the buckets created afterwards too."""
+        name = f"{provider}:{model}" if model else provider
+        with self._lock:
+            self._limits[name] = {"requests_per_minute": requests_per_minute, "tokens_per_minute": tokens_per_minute}
+            for (bucket_provider, bucket_model), limits in self._models.items():
+                if bucket_provider == provider and (model is None or bucket_model == model):
+                    config = self._config(bucket_provider, bucket_model)
+                    limits.requests = TokenBucket.per_minute(config.get("requests_per_minute"))
+                    limits.tokens = TokenBucket.per_minute(config.get("tokens_per_minute"))
+
+    def _config(self, provider: str, model: str) -> Dict[str, float]:
+        return self._limits.get(f"{provider}:{model}") or self._limits.get(provider) or {}
+
+    def _get(self, key: Tuple[str, str]) -> _ModelLimits:
+        limits = self._models.get(key)
+        if limits is None:
+            config = self._config(*key)
+            limits = self._models[key] = _ModelLimits(
+                requests=TokenBucket.per_minute(config.get("requests_per_minute")),
+                tokens=TokenBucket.per_minute(config.get("tokens_per_minute")),
+            )
+        return limits
+
+    def _try_take(self, key: Tuple[str, str], waiter: _Waiter, tokens: float) -> Optional[float]:
+        """Take the request and tokens if `waiter` is next and the buckets allow it, else return the delay."""
+        now = time.monotonic()
+        limits = self._get(key)
+        if limits.queue[0] is not waiter:
+            return None
+        delay = limits.delay(tokens, now)
+        if delay > 0:
+            return delay
+        heapq.heappop(limits.queue)
+        limits.requests.take(1, now)
+        limits.tokens.take(tokens, now)
+        self._wake(limits)
+        return 0.0
+
+    def _enqueue(self, key: Tuple[str, str], priority: Optional[int], wake: Callable[[], None]) -> _Waiter:
+        waiter = _Waiter(priority=_priority.get() if priority is None else priority, seq=next(self._seq), wake=wake)
+        heapq.heappush(self._get(key).queue, waiter)
+        return waiter
+
+    def _dequeue(self, key: Tuple[str, str], waiter: _Waiter) -> None:
+        limits = self._get(key)
+        if waiter in limits.queue:
+            limits.queue.remove(waiter)
+            heapq.heapify(limits.queue)
+            self._wake(limits)
+
+    @staticmethod
+    def _wake(limits: _ModelLimits) -> None:
+        if limits.queue:
+            limits.queue[0].wake()
+
+    def _record_wait(self, key: Tuple[str, str], started_at: float) -> None:
+        waited = time.monotonic() - started_at
+        if waited > 0.001:
+            limits = self._get(key)
+            limits.waited += waited
+            limits.throttled += 1
+
+    def acquire(self, key: Tuple[str, str], tokens: float, priority: Optional[int] = None) -> None:
+        """Block until a request of `tokens` tokens to the `(provider, model)` key is allowed."""
+        started_at = time.monotonic()
+        woken = threading.Event()
+        with self._lock:
+            waiter = self._enqueue(key, priority, woken.set)
+        try:
+            while True:
+                with self._lock:
+                    delay = self._try_take(key, waiter, tokens)
+                    if delay == 0:
+                        break
+                    woken.clear()
+                woken.wait(delay)
+        finally:
+            with self._lock:
+                self._dequeue(key, waiter)
+        self._record_wait(key, started_at)
+
+    async def aacquire(self, key: Tuple[str, str], tokens: float, priority: Optional[int] = None) -> None:
+        """Wait until a request of `tokens` tokens to the `(provider, model)` key is allowed."""
+        started_at = time.monotonic()
+        loop = asyncio.get_running_loop()
+        woken = asyncio.Event()
+        with self._lock:
+            waiter = self._enqueue(key, priority, lambda: loop.call_soon_threadsafe(woken.set))
+        try:
+            while True:
+                with self._lock:
+                    delay = self._try_take(key, waiter, tokens)
+                    if delay == 0:
+                        break
+                    woken.clear()
+                try:
+                    await asyncio.wait_for(woken.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self._lock:
+                self._dequeue(key, waiter)
+        self._record_wait(key, started_at)
+
+    def settle(self, key: Tuple[str, str], estimated: float, used: Optional[float]) -> None:
+        """Correct the tokens taken for a request with its actual usage, when known."""
+        if used is None or used == estimated:
+            return
+        now = time.monotonic()
+        with self._lock:
+            limits = self._get(key)
+            if used > estimated:
+                limits.tokens.take(used - estimated, now)
+            else:
+                limits.tokens.give(estimated - used, now)
+                self._wake(limits)
+
+    def update_from_headers(self, key: Tuple[str, str], headers: Mapping[str, str], status_code: int = 200) -> None:
+        """Adjust the buckets of a model with the rate-limit headers of one of its responses."""
+        now = time.monotonic()
+        with self._lock:
+            limits = self._get(key)
+            limits.requests.sync(
+                now,
+                limit=_parse_number(headers.get("x-ratelimit-limit-requests")),
+                remaining=_parse_number(headers.get("x-ratelimit-remaining-requests")),
+                reset=_parse_duration(headers.get("x-ratelimit-reset-requests")),
+            )
+            limits.tokens.sync(
+                now,
+                limit=_parse_number(headers.get("x-ratelimit-limit-tokens")),
+                remaining=_parse_number(headers.get("x-ratelimit-remaining-tokens")),
+                reset=_parse_duration(headers.get("x-ratelimit-reset-tokens")),
+            )
+            if status_code == 429:
+                retry_after_ms = _parse_number(headers.get("retry-after-ms"))
+                retry_after = retry_after_ms / 1000 if retry_after_ms is not None else None
+                retry_after = retry_after or _parse_duration(headers.get("retry-after")) or DEFAULT_RETRY_AFTER
+                limits.requests.blocked_until = max(limits.requests.blocked_until, now + retry_after)
+                self.log.warning(f"Rate limited by {key[0]} for {key[1]}, pausing requests for {retry_after:.2f}s")
+
+    def on_response(self, response: Any) -> None:
+        """`httpx` response hook adjusting the limits of the model whose call is running."""
+        key = _current_key.get()
+        if key is not None:
+            self.update_from_headers(key, response.headers, response.status_code)
+
+    async def aon_response(self, response: Any) -> None:
+        """`httpx.AsyncClient` response hook, see `on_response`."""
+        self.on_response(response)
+
+    def stats(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Current state of each model's limits. Available requests or tokens are None when unlimited."""
+        now = time.monotonic()
+        with self._lock:
+            stats = {}
+            for (provider, model), limits in self._models.items():
+                limits.requests.delay(0, now)
+                limits.tokens.delay(0, now)
+                stats[f"{provider}:{model}"] = {
+                    # Infinity is not valid JSON
+                    "requests_available": None if math.isinf(limits.requests.capacity) else limits.requests.tokens,
+                    "tokens_available": None if math.isinf(limits.tokens.capacity) else limits.tokens.tokens,
+                    "queued": len(limits.queue),
+                    "throttled": limits.throttled,
+                    "waited_seconds": limits.waited,
+                }
+            return stats
+
+
+def estimate_tokens(messages: List["BaseMessage"], max_tokens: Optional[int] = None) -> int:
+    """
+    Rough token cost of a request, about 4 characters per token for the prompt plus the completion budget, which
+    providers count against the token limit up front.
+    """
+    prompt_tokens = sum(4 + len(str(message.content)) // 4 for message in messages)
+    return prompt_tokens + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+
+def _used_tokens(messages: List[Any]) -> Optional[int]:
+    usages = [message.usage_metadata for message in messages if getattr(message, "usage_metadata", None)]
+    return sum(usage.get("total_tokens", 0) for usage in usages) if usages else None
+
+
+class RateLimitedChatModelMixin:
+    """Chat model layer waiting for `shared_rate_limiter` to allow each call, see `RateLimiter`."""
+
+    shared_rate_limiter: ClassVar[RateLimiter]
+
+    def _rate_limit_key(self) -> Tuple[str, str]:
+        model = getattr(self, "model_name", None) or getattr(self, "model", None) or ""
+        return self._llm_type, str(model)
+
+    def _estimate_tokens(self, messages: List["BaseMessage"]) -> int:
+        return estimate_tokens(messages, getattr(self, "max_tokens", None))
+
+    def _on_error(self, key: Tuple[str, str], error: BaseException) -> None:
+        response = getattr(error, "response", None)
+        if getattr(response, "status_code", None) == 429:
+            self.shared_rate_limiter.update_from_headers(key, response.headers, 429)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> "ChatResult":
+        key, tokens = self._rate_limit_key(), self._estimate_tokens(messages)
+        self.shared_rate_limiter.acquire(key, tokens)
+        token = _current_key.set(key)
+        try:
+            result = super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        except Exception as e:
+            self._on_error(key, e)
+            raise
+        finally:
+            _current_key.reset(token)
+        self.shared_rate_limiter.settle(key, tokens, _used_tokens([g.message for g in result.generations]))
+        return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> "ChatResult":
+        key, tokens = self._rate_limit_key(), self._estimate_tokens(messages)
+        await self.shared_rate_limiter.aacquire(key, tokens)
+        token = _current_key.set(key)
+        try:
+            result = await agenerate_next(self, RateLimitedChatModelMixin, messages, stop, run_manager, **kwargs)
+        except Exception as e:
+            self._on_error(key, e)
+            raise
+        finally:
+            _current_key.reset(token)
+        self.shared_rate_limiter.settle(key, tokens, _used_tokens([g.message for g in result.generations]))
+        return result
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator["ChatGenerationChunk"]:
+        key, tokens = self._rate_limit_key(), self._estimate_tokens(messages)
+        self.shared_rate_limiter.acquire(key, tokens)
+        stream = super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs)
+        chunks = []
+        try:
+            while True:
+                # The key is only set while the stream runs, not while the consumer handles a chunk
+                token = _current_key.set(key)
+                try:
+                    chunk = next(stream, None)
+                finally:
+                    _current_key.reset(token)
+                if chunk is None:
+                    break
+                chunks.append(chunk.message)
+                yield chunk
+        except Exception as e:
+            self._on_error(key, e)
+            raise
+        finally:
+            self.shared_rate_limiter.settle(key, tokens, _used_tokens(chunks))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator["ChatGenerationChunk"]:
+        key, tokens = self._rate_limit_key(), self._estimate_tokens(messages)
+        await self.shared_rate_limiter.aacquire(key, tokens)
+        stream = astream_next(self, RateLimitedChatModelMixin, messages, stop, run_manager, **kwargs)
+        chunks = []
+        try:
+            while True:
+                token = _current_key.set(key)
+                try:
+                    chunk = await anext(stream, None)
+                finally:
+                    _current_key.reset(token)
+                if chunk is None:
+                    break
+                chunks.append(chunk.message)
+                yield chunk
+        except Exception as e:
+            self._on_error(key, e)
+            raise
+        finally:
+            self.shared_rate_limiter.settle(key, tokens, _used_tokens(chunks))
+
+
+def rate_limited_model_class(base: Type["BaseChatModel"], rate_limiter: RateLimiter) -> Type["BaseChatModel"]:
+    """Return a subclass of a chat model class waiting for `rate_limiter` before each call."""
+    return layer_model_class(RateLimitedChatModelMixin, base, shared_rate_limiter=rate_limiter)
+
+
+def with_rate_limit(llm: "BaseChatModel", rate_limiter: Optional[RateLimiter] = None):
+    """Return a copy of a chat model waiting for the rate limiter before each call.
+
+    Other LLM objects are returned as-is. Uses the process-wide `RateLimiter` unless one is given.
+
+    Example:
+        >>> llm = with_rate_limit(ChatOpenAI(model="gpt-4o"))
+    """
+    from langchain_core.language_models import BaseChatModel
+
+    if not isinstance(llm, BaseChatModel) or isinstance(llm, RateLimitedChatModelMixin):
+        return llm
+    rate_limited = llm.model_copy()
+    rate_limited.__class__ = rate_limited_model_class(type(llm), rate_limiter or get_rate_limiter())
+    return rate_limited
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Returns the process-wide rate limiter, configured by the `AISYNC_LLM_RATE_LIMITS` setting.
+    """
+    from aisync.env import env
+
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter(env.AISYNC_LLM_RATE_LIMITS)
+    return _rate_limiter
@@ -0,0 +1,292 @@
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, ClassVar, Dict, Iterator, List, Optional, Tuple, Union
+
+from aisync.engines.llms.telemetry import llm_retry
+from aisync.log import LogEngine
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+BackendSpec = Union[str, Tuple[str, Dict[str, Any]]]
+
+
+@dataclass
+class BackendStats:
+    name: str
+    latency: Optional[float] = None
+    """Latency EWMA of complete generations, in seconds."""
+    first_token_latency: Optional[float] = None
+    """Latency EWMA of the first streamed chunk, in seconds."""
+    error_rate: float = 0.0
+    """Error rate EWMA, between 0 and 1."""
+    requests: int = 0
+    errors: int = 0
+    routed: int = 0
+    """Requests for which this backend was the first choice."""
+    cooldown_until: float = 0.0
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.cooldown_until
+
+    def expected_latency(self, streaming: bool) -> float:
+        # Backends never measured come first, so each one gets measured
+        if streaming:
+            return self.first_token_latency or self.latency or 0.0
+        return self.latency or self.first_token_latency or 0.0
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        return {
+            "latency": self.latency,
+            "first_token_latency": self.first_token_latency,
+            "error_rate": self.error_rate,
+            "requests": self.requests,
+            "errors": self.errors,
+            "routed": self.routed,
+            "healthy": self.healthy(now),
+        }
+
+
+class _Backends:
+    """Backend models of a router with their statistics, shared by the copies of the router."""
+
+    def __init__(self, specs: List[BackendSpec], alpha: float, max_error_rate: float, cooldown: float):
+        from aisync.engines.llms.base import get_llm_object, release_llm_object
+
+        self.llms = [get_llm_object(spec) for spec in specs]
+        # Pooled backends go back to the pool once the router and all its copies are gone
+        self._finalizer = weakref.finalize(self, _release_backends, list(self.llms), release_llm_object)
+        self.stats = []
+        for index, llm in enumerate(self.llms):
+            name = f"{llm._llm_type}:{getattr(llm, 'model_name', None) or getattr(llm, 'model', None) or index}"
+            if any(stats.name == name for stats in self.stats):
+                name = f"{name}#{index}"
+            self.stats.append(BackendStats(name=name))
+        self.alpha = alpha
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+        self.failovers = 0
+        self._lock = threading.Lock()
+
+    def _ewma(self, average: Optional[float], value: float) -> float:
+        return value if average is None else self.alpha * value + (1 - self.alpha) * average
+
+    def order(self, streaming: bool) -> List[int]:
+        """Backend indexes by preference: healthy ones fastest first, then the others by end of cooldown."""
+        now = time.monotonic()
+        with self._lock:
+            healthy = [i for i, stats in enumerate(self.stats) if stats.healthy(now)]
+            healthy.sort(key=lambda i: self.stats[i].expected_latency(streaming))
+            cooling = [i for i, stats in enumerate(self.stats) if not stats.healthy(now)]
+            cooling.sort(key=lambda i: self.stats[i].cooldown_until)
+            order = healthy + cooling
+            self.stats[order[0]].routed += 1
+            return order
+
+    def succeeded(self, index: int, latency: float, streaming: bool) -> None:
+        with self._lock:
+            stats = self.stats[index]
+            stats.requests += 1
+            stats.error_rate = self._ewma(stats.error_rate, 0.0)
+            if streaming:
+                stats.first_token_latency = self._ewma(stats.first_token_latency, latency)
+            else:
+                stats.latency = self._ewma(stats.latency, latency)
+
+    def failed(self, index: int, failover: bool) -> None:
+        with self._lock:
+            stats = self.stats[index]
+            stats.requests += 1
+            stats.errors += 1
+            stats.error_rate = self._ewma(stats.error_rate, 1.0)
+            if stats.error_rate > self.max_error_rate:
+                stats.cooldown_until = time.monotonic() + self.cooldown
+            if failover:
+                self.failovers += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {"backends": {stats.name: stats.to_dict(now) for stats in self.stats}, "failovers": self.failovers}
+
+
+def _release_backends(llms: List[Any], release: Any) -> None:
+    for llm in llms:
+        release(llm)
+
+
+# Backends of the routers in use, shared by each router and its copies
+_routers: "weakref.WeakSet[_Backends]" = weakref.WeakSet()
+
+
+class RouterChatModel(BaseChatModel):
+    """Chat model routing each request to the fastest healthy backend among several.
+
+    Latency and error rate of each backend are tracked as exponentially weighted moving averages. A backend whose
+    error rate goes above `max_error_rate` is skipped for `cooldown` seconds. A request failing on a backend is
+    retried on the next one, streams included as long as no chunk was produced yet.
+
+    Example:
+        >>> router = RouterChatModel(backends=[("LLMChatOpenAI", {"model": "gpt-4o"}), "LLMChatOpenAI"])
+    """
+
+    backends: List[BackendSpec]
+    """Backends as given to `get_llm_object`: an AISync LLM class name, or a class name and its configuration."""
+    alpha: float = 0.3
+    """Weight of the newest sample in the moving averages."""
+    max_error_rate: float = 0.5
+    cooldown: float = 30.0
+    """Seconds a failing backend is skipped before being tried again."""
+
+    telemetry_exempt: ClassVar[bool] = True
+    """The backends record their own calls, failovers being counted as retries."""
+
+    _backends: _Backends = PrivateAttr()
+    _log: LogEngine = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        super().model_post_init(__context)
+        self._log = LogEngine(self.__class__.__name__)
+        self._backends = _Backends(self.backends, self.alpha, self.max_error_rate, self.cooldown)
+        _routers.add(self._backends)
+
+    @property
+    def _llm_type(self) -> str:
+        return "aisync-router"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"backends": self.backends}
+
+    def stats(self) -> Dict[str, Any]:
+        """Statistics and routing decisions of each backend, plus the number of failovers."""
+        return self._backends.to_dict()
+
+    def bind_tools(self, tools, **kwargs):
+        """Bind tools in the OpenAI format, understood by the OpenAI-compatible backends."""
+        from langchain_core.utils.function_calling import convert_to_openai_tool
+
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _failed(self, index: int, order: List[int], error: Exception) -> None:
+        failover = order[-1] != index
+        self._backends.failed(index, failover)
+        name = self._backends.stats[index].name
+        if failover:
+            self._log.warning(f"Backend {name} failed, failing over: {error}")
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        order = self._backends.order(streaming=False)
+        for index in order:
+            started_at = time.monotonic()
+            try:
+                with llm_retry(index != order[0]):
+                    message = self._backends.llms[index].invoke(messages, stop=stop, **kwargs)
+            except Exception as e:
+                self._failed(index, order, e)
+                if index == order[-1]:
+                    raise
+                continue
+            self._backends.succeeded(index, time.monotonic() - started_at, streaming=False)
+            return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        order = self._backends.order(streaming=False)
+        for index in order:
+            started_at = time.monotonic()
+            try:
+                with llm_retry(index != order[0]):
+                    message = await self._backends.llms[index].ainvoke(messages, stop=stop, **kwargs)
+            except Exception as e:
+                self._failed(index, order, e)
+                if index == order[-1]:
+                    raise
+                continue
+            self._backends.succeeded(index, time.monotonic() - started_at, streaming=False)
+            return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        order = self._backends.order(streaming=True)
+        for index in order:
+            started_at = time.monotonic()
+            stream = self._backends.llms[index].stream(messages, stop=stop, **kwargs)
+            try:
+                with llm_retry(index != order[0]):
+                    first = next(stream)
+            except StopIteration:
+                first = None
+            except Exception as e:
+                self._failed(index, order, e)
+                if index == order[-1]:
+                    raise
+                continue
+            # Once a chunk is produced the request is committed to this backend
+            self._backends.succeeded(index, time.monotonic() - started_at, streaming=True)
+            if first is not None:
+                yield ChatGenerationChunk(message=first)
+            try:
+                for chunk in stream:
+                    yield ChatGenerationChunk(message=chunk)
+            except Exception:
+                self._backends.failed(index, failover=False)
+                raise
+            return
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        order = self._backends.order(streaming=True)
+        for index in order:
+            started_at = time.monotonic()
+            stream = self._backends.llms[index].astream(messages, stop=stop, **kwargs)
+            try:
+                with llm_retry(index != order[0]):
+                    first = await anext(stream)
+            except StopAsyncIteration:
+                first = None
+            except Exception as e:
+                self._failed(index, order, e)
+                if index == order[-1]:
+                    raise
+                continue
+            self._backends.succeeded(index, time.monotonic() - started_at, streaming=True)
+            if first is not None:
+                yield ChatGenerationChunk(message=first)
+            try:
+                async for chunk in stream:
+                    yield ChatGenerationChunk(message=chunk)
+            except Exception:
+                self._backends.failed(index, failover=False)
+                raise
+            return
+
+
+def get_router_stats() -> Dict[str, Dict[str, Any]]:
+    """Statistics of the routers in use, keyed by their backend names."""
+    return {" | ".join(stats.name for stats in backends.stats): backends.to_dict() for backends in list(_routers)}
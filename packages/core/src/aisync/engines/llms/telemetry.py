@@ -0,0 +1,410 @@
+import asyncio
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, AsyncIterator, ClassVar, Dict, Iterator, List, Optional, Tuple, Type
+
+from aisync.engines.llms.layers import agenerate_next, astream_next, layer_model_class
+from aisync.log import LogEngine
+
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+    from langchain_core.messages import BaseMessage
+    from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+    from aisync.signalers import BaseSignaler
+
+_context: ContextVar[Tuple[str, str]] = ContextVar("aisync_llm_context", default=("", ""))
+_current_call: ContextVar[Optional["LLMCall"]] = ContextVar("aisync_llm_call", default=None)
+_retry: ContextVar[bool] = ContextVar("aisync_llm_retry", default=False)
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0)
+THROUGHPUT_BUCKETS = (5, 10, 20, 50, 100, 200, 500)
+
+
+@contextmanager
+def llm_context(suit: Optional[str] = None, node: Optional[str] = None):
+    """Attribute the LLM calls made inside the block to a suit and a node. Unset values are kept from outer blocks.
+
+    Graph nodes run inside this context already, with their suit and alias.
+
+    Example:
+        >>> with llm_context(suit="mark_i", node="summarize"):
+        ...     llm.invoke("Summarize this document")
+    """
+    outer_suit, outer_node = _context.get()
+    token = _context.set((suit or outer_suit, node or outer_node))
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+@contextmanager
+def llm_retry(retry: bool = True):
+    """Count the LLM calls made inside the block as retries of a failed one, e.g. on a failover to another backend.
+
+    Example:
+        >>> with llm_retry():
+        ...     fallback_llm.invoke(messages)
+    """
+    token = _retry.set(retry)
+    try:
+        yield
+    finally:
+        _retry.reset(token)
+
+
+@dataclass
+class LLMCall:
+    """Measures of a single LLM call, as exported to Prometheus and published on `Channel.LLM_CALL`."""
+
+    suit: str
+    node: str
+    model: str
+    streaming: bool
+    started_at: float = field(default_factory=time.perf_counter)
+    first_token_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    attempts: int = 0
+    """HTTP requests sent for this call, more than one when the provider client retried."""
+    is_retry: bool = False
+    """Whether the call retries a failed one, see `llm_retry`."""
+    input_tokens: int = 0
+    output_tokens: int = 0
+    estimated_tokens: bool = False
+    """Whether the provider reported no usage and the token counts are estimated from the text length."""
+    error: Optional[str] = None
+
+    @property
+    def latency(self) -> float:
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        return self.first_token_at - self.started_at if self.first_token_at is not None else None
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """Output throughput. For streams it is measured after the first token, the wait before it being TTFT."""
+        end = self.finished_at or time.perf_counter()
+        if self.first_token_at is None:
+            tokens, duration = self.output_tokens, end - self.started_at
+        else:
+            tokens, duration = self.output_tokens - 1, end - self.first_token_at
+        return tokens / duration if tokens > 0 and duration > 0 else None
+
+    @property
+    def retries(self) -> int:
+        return max(self.attempts - 1, 0) + self.is_retry
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "suit": self.suit,
+            "node": self.node,
+            "model": self.model,
+            "streaming": self.streaming,
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+            "latency": self.latency,
+            "time_to_first_token": self.time_to_first_token,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "estimated_tokens": self.estimated_tokens,
+            "tokens_per_second": self.tokens_per_second,
+            "retries": self.retries,
+        }
+
+
+def _estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+def _count_tokens(call: LLMCall, messages: List["BaseMessage"], outputs: List[Any]) -> None:
+    usages = [output.usage_metadata for output in outputs if getattr(output, "usage_metadata", None)]
+    if usages:
+        call.input_tokens = sum(usage.get("input_tokens", 0) for usage in usages)
+        call.output_tokens = sum(usage.get("output_tokens", 0) for usage in usages)
+        return
+    call.estimated_tokens = True
+    call.input_tokens = sum(_estimate_tokens(str(message.content)) for message in messages)
+    call.output_tokens = _estimate_tokens("".join(str(output.content) for output in outputs))
+
+
+class _Metrics:
+    """Prometheus metrics of the LLM calls, registered once in the default registry."""
+
+    def __init__(self):
+        from prometheus_client import Counter, Histogram
+
+        labels = ["suit", "node", "model"]
+        self.requests = Counter("aisync_llm_requests_total", "Total LLM calls", [*labels, "status"])
+        self.latency = Histogram(
+            "aisync_llm_request_duration_seconds", "Total latency of LLM calls", labels, buckets=LATENCY_BUCKETS
+        )
+        self.time_to_first_token = Histogram(
+            "aisync_llm_time_to_first_token_seconds",
+            "Time to the first streamed token of LLM calls",
+            labels,
+            buckets=LATENCY_BUCKETS,
+        )
+        self.input_tokens = Counter("aisync_llm_input_tokens_total", "Total input tokens of LLM calls", labels)
+        self.output_tokens = Counter("aisync_llm_output_tokens_total", "Total output tokens of LLM calls", labels)
+        self.tokens_per_second = Histogram(
+            "aisync_llm_output_tokens_per_second",
+            "Output throughput of LLM calls",
+            labels,
+            buckets=THROUGHPUT_BUCKETS,
+        )
+        self.retries = Counter("aisync_llm_retries_total", "Total retries and failovers of LLM calls", labels)
+
+    def observe(self, call: LLMCall) -> None:
+        labels = {"suit": call.suit, "node": call.node, "model": call.model}
+        self.requests.labels(**labels, status="error" if call.error else "ok").inc()
+        self.latency.labels(**labels).observe(call.latency)
+        if call.time_to_first_token is not None:
+            self.time_to_first_token.labels(**labels).observe(call.time_to_first_token)
+        self.input_tokens.labels(**labels).inc(call.input_tokens)
+        self.output_tokens.labels(**labels).inc(call.output_tokens)
+        if call.tokens_per_second is not None:
+            self.tokens_per_second.labels(**labels).observe(call.tokens_per_second)
+        if call.retries:
+            self.retries.labels(**labels).inc(call.retries)
+
+
+_metrics: Optional[_Metrics] = None
+_metrics_available = True
+_metrics_lock = threading.Lock()
+
+
+def _get_metrics() -> Optional[_Metrics]:
+    """The Prometheus metrics, or None when `prometheus_client` is not installed."""
+    global _metrics, _metrics_available
+    if _metrics is None and _metrics_available:
+        with _metrics_lock:
+            if _metrics is None and _metrics_available:
+                try:
+                    _metrics = _Metrics()
+                except ImportError:
+                    _metrics_available = False
+    return _metrics
+
+
+class LLMTelemetry:
+    """Records LLM calls into Prometheus metrics, when `prometheus_client` is installed, and publishes each one as
+    a `Channel.LLM_CALL` signal on the attached signalers.
+
+    Calls are labelled with the suit and node set by `llm_context`, and the model name.
+    """
+
+    def __init__(self):
+        self.log = LogEngine(self.__class__.__name__)
+        # Attachments of each signaler, per suit (None for every suit), counted so each attach has its detach
+        self._signalers: Counter[Tuple["BaseSignaler", Optional[str]]] = Counter()
+        self._tasks: set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+
+    def attach(self, signaler: "BaseSignaler", suit: Optional[str] = None) -> None:
+        """Publish the LLM calls made for `suit`, or for every suit if None, on `signaler` too."""
+        with self._lock:
+            self._signalers[(signaler, suit)] += 1
+
+    def detach(self, signaler: "BaseSignaler", suit: Optional[str] = None) -> None:
+        """Undo one `attach` with the same arguments."""
+        with self._lock:
+            key = (signaler, suit)
+            if key in self._signalers:
+                self._signalers[key] -= 1
+                if self._signalers[key] <= 0:
+                    del self._signalers[key]
+
+    def start(self, model: str, streaming: bool) -> LLMCall:
+        suit, node = _context.get()
+        return LLMCall(suit=suit, node=node, model=model, streaming=streaming, is_retry=_retry.get())
+
+    def finish(
+        self,
+        call: LLMCall,
+        messages: List["BaseMessage"],
+        outputs: List[Any],
+        error: Optional[BaseException] = None,
+    ) -> None:
+        call.finished_at = time.perf_counter()
+        call.error = f"{type(error).__name__}: {error}" if error is not None else None
+        # A call failing before any output is not billed
+        if error is None or outputs:
+            _count_tokens(call, messages, outputs)
+        metrics = _get_metrics()
+        if metrics is not None:
+            metrics.observe(call)
+        self._publish(call)
+
+    def _publish(self, call: LLMCall) -> None:
+        from aisync.signalers import Channel, Signal
+
+        with self._lock:
+            signalers = list(
+                dict.fromkeys(signaler for signaler, suit in self._signalers if suit is None or suit == call.suit)
+            )
+        if not signalers:
+            return
+        signal = Signal(
+            id=f"{uuid.uuid4()}",
+            channel=Channel.LLM_CALL,
+            content="LLM call failed" if call.error else "LLM call completed",
+            timestamp=datetime.now(),
+            metadata=call.to_dict(),
+        )
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        for signaler in signalers:
+            try:
+                if loop is None:
+                    signaler.publish(channel=Channel.LLM_CALL, message=signal)
+                else:
+                    # Publishing synchronously from the loop's own thread would wait on the loop forever
+                    task = loop.create_task(signaler.apublish(channel=Channel.LLM_CALL, message=signal))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+            except Exception as e:
+                self.log.warning(f"Failed to publish LLM call: {e}")
+
+    def on_request(self, request: Any) -> None:
+        """`httpx` request hook counting the attempts of the call running, so client retries are seen."""
+        call = _current_call.get()
+        if call is not None:
+            call.attempts += 1
+
+    async def aon_request(self, request: Any) -> None:
+        """`httpx.AsyncClient` request hook, see `on_request`."""
+        self.on_request(request)
+
+
+class TelemetryChatModelMixin:
+    """Chat model layer recording each call with `telemetry`, see `LLMTelemetry`."""
+
+    telemetry: ClassVar[LLMTelemetry]
+
+    def _telemetry_model(self) -> str:
+        return str(getattr(self, "model_name", None) or getattr(self, "model", None) or self._llm_type)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> "ChatResult":
+        call = self.telemetry.start(self._telemetry_model(), streaming=False)
+        token = _current_call.set(call)
+        try:
+            result = super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        except Exception as e:
+            self.telemetry.finish(call, messages, [], e)
+            raise
+        finally:
+            _current_call.reset(token)
+        self.telemetry.finish(call, messages, [generation.message for generation in result.generations])
+        return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> "ChatResult":
+        call = self.telemetry.start(self._telemetry_model(), streaming=False)
+        token = _current_call.set(call)
+        try:
+            result = await agenerate_next(self, TelemetryChatModelMixin, messages, stop, run_manager, **kwargs)
+        except Exception as e:
+            self.telemetry.finish(call, messages, [], e)
+            raise
+        finally:
+            _current_call.reset(token)
+        self.telemetry.finish(call, messages, [generation.message for generation in result.generations])
+        return result
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator["ChatGenerationChunk"]:
+        call = self.telemetry.start(self._telemetry_model(), streaming=True)
+        stream = super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs)
+        chunks, error = [], None
+        try:
+            while True:
+                # The call is only current while the stream runs, not while the consumer handles a chunk
+                token = _current_call.set(call)
+                try:
+                    chunk = next(stream, None)
+                finally:
+                    _current_call.reset(token)
+                if chunk is None:
+                    break
+                if call.first_token_at is None:
+                    call.first_token_at = time.perf_counter()
+                chunks.append(chunk.message)
+                yield chunk
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.telemetry.finish(call, messages, chunks, error)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator["ChatGenerationChunk"]:
+        call = self.telemetry.start(self._telemetry_model(), streaming=True)
+        stream = astream_next(self, TelemetryChatModelMixin, messages, stop, run_manager, **kwargs)
+        chunks, error = [], None
+        try:
+            while True:
+                token = _current_call.set(call)
+                try:
+                    chunk = await anext(stream, None)
+                finally:
+                    _current_call.reset(token)
+                if chunk is None:
+                    break
+                if call.first_token_at is None:
+                    call.first_token_at = time.perf_counter()
+                chunks.append(chunk.message)
+                yield chunk
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.telemetry.finish(call, messages, chunks, error)
+
+
+def telemetry_model_class(base: Type["BaseChatModel"], telemetry: LLMTelemetry) -> Type["BaseChatModel"]:
+    """Return a subclass of a chat model class recording each call with `telemetry`."""
+    return layer_model_class(TelemetryChatModelMixin, base, telemetry=telemetry)
+
+
+def with_telemetry(llm: "BaseChatModel", telemetry: Optional[LLMTelemetry] = None):
+    """Return a copy of a chat model recording the latency, token usage and retries of each call.
+
+    Other LLM objects, and models whose class sets `telemetry_exempt` such as routers whose backends are recorded
+    already, are returned as-is. Uses the process-wide `LLMTelemetry` unless one is given.
+
+    Example:
+        >>> llm = with_telemetry(ChatOpenAI(model="gpt-4o"))
+    """
+    from langchain_core.language_models import BaseChatModel
+
+    if not isinstance(llm, BaseChatModel) or isinstance(llm, TelemetryChatModelMixin):
+        return llm
+    if getattr(llm, "telemetry_exempt", False):
+        return llm
+    instrumented = llm.model_copy()
+    instrumented.__class__ = telemetry_model_class(type(llm), telemetry or get_llm_telemetry())
+    return instrumented
+
+
+_telemetry: Optional[LLMTelemetry] = None
+_telemetry_lock = threading.Lock()
+
+
+def get_llm_telemetry() -> LLMTelemetry:
+    """
+    Returns the process-wide LLM telemetry.
+    """
+    global _telemetry
+    if _telemetry is None:
+        with _telemetry_lock:
+            if _telemetry is None:
+                _telemetry = LLMTelemetry()
+    return _telemetry
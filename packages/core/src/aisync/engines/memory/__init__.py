@@ -1,5 +1,34 @@
+from aisync.engines.memory.backends import (
+    MemoryBackend,
+    MessageConflictError,
+    PostgresMemoryBackend,
+    SQLiteMemoryBackend,
+)
 from aisync.engines.memory.buffer_memory import BufferMemory
+from aisync.engines.memory.compaction import CompactionStats, MemoryCompactor, get_memory_compactor
+from aisync.engines.memory.long_term import LongTermMemory, LongTermMemoryStats
+from aisync.engines.memory.store import (
+    ConversationMemoryStore,
+    MemoryStoreStats,
+    SessionMemory,
+    get_memory_store,
+    last_message_text,
+)
 
 __all__ = [
     "BufferMemory",
+    "CompactionStats",
+    "ConversationMemoryStore",
+    "LongTermMemory",
+    "LongTermMemoryStats",
+    "MemoryBackend",
+    "MemoryCompactor",
+    "MemoryStoreStats",
+    "MessageConflictError",
+    "PostgresMemoryBackend",
+    "SQLiteMemoryBackend",
+    "SessionMemory",
+    "get_memory_compactor",
+    "get_memory_store",
+    "last_message_text",
 ]
@@ -1,36 +1,181 @@
-from typing import TYPE_CHECKING, List
+import threading
+from collections import deque
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
 
 if TYPE_CHECKING:
     from core.assistants.base import Assistant
 
+    from aisync.engines.memory.compaction import MemoryCompactor
+
+SUMMARY_SENDER = "system"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text, about 4 characters per token."""
+    return (len(text) + 3) // 4
+
 
 class BufferMemory(dict):
-    def __init__(self, memory_size=100):
-        super().__init__({"pending_message": "", "buffer_memory": []})
+    """Conversation buffer keeping the last `memory_size` messages in a ring buffer.
+
+    Each message is counted in tokens once, when saved, with `token_counter` or about 4 characters per token. The
+    windows of the last messages fitting a token budget slide along as messages are saved, so they are never
+    computed from scratch again. Formatted views are cached until the buffer changes and are shared between
+    callers, which must not modify them.
+
+    With a `compactor`, older messages are replaced by a summary in the background once the buffer grows past its
+    token threshold. The summary comes first in the formatted views, followed by the messages after it, which
+    `max_tokens` applies to.
+
+    Example:
+        >>> memory = BufferMemory(memory_size=50, token_counter=llm.get_num_tokens)
+        >>> memory.save_message("user", "Hello")
+        >>> memory.format_buffer_memory(max_tokens=2000)
+    """
+
+    def __init__(
+        self,
+        memory_size: int = 100,
+        token_counter: Optional[Callable[[str], int]] = None,
+        compactor: Optional["MemoryCompactor"] = None,
+    ):
+        if memory_size < 1:
+            raise ValueError(f"Memory size must be at least 1, got {memory_size}.")
+        super().__init__({"pending_message": "", "buffer_memory": deque(maxlen=memory_size)})
         self.memory_size = memory_size
+        self.token_counter = token_counter or estimate_tokens
+        self.compactor = compactor
+        self.summary = ""
+        self.summary_tokens = 0
+        # Sequence number of the next message, the buffer holds the `len(buffer)` ones before it
+        self._saved = 0
+        # Incremented when the buffer is loaded again, which numbers its messages anew
+        self.generation = 0
+        self._tokens = 0
+        # Sliding windows by token budget: sequence number of their first message and their number of tokens
+        self._windows: Dict[int, List[int]] = {}
+        self._views: Dict[Tuple[str, Optional[int]], Any] = {}
+        # Compaction updates the buffer from another thread
+        self._lock = threading.RLock()
 
-    def __call__(self) -> str:
+    def __call__(self) -> List[tuple]:
         return self.format_buffer_memory()
 
-    def format_buffer_memory(self, assistant: "Assistant") -> List[tuple]:
-        index = len(self["buffer_memory"]) - 1
-        buffer_memory: List[tuple] = []
-        while index >= 0:
-            msg = self["buffer_memory"][index]
-            index -= 1
-            buffer_memory.append((msg["sender"], msg["message"]))
-        buffer_memory.reverse()
-        return buffer_memory
+    @property
+    def token_count(self) -> int:
+        """Number of tokens of the messages in the buffer, without the summary."""
+        return self._tokens
+
+    def _message_at(self, sequence: int) -> Dict[str, Any]:
+        buffer = self["buffer_memory"]
+        return buffer[sequence - (self._saved - len(buffer))]
+
+    def _window(self, max_tokens: int) -> List[int]:
+        """The window of the last messages within `max_tokens`, scanning the buffer only the first time."""
+        window = self._windows.get(max_tokens)
+        if window is None:
+            start, tokens = self._saved, 0
+            for message in reversed(self["buffer_memory"]):
+                if tokens + message["tokens"] > max_tokens:
+                    break
+                start -= 1
+                tokens += message["tokens"]
+            window = self._windows[max_tokens] = [start, tokens]
+        return window
 
-    def format_buffer_memory_no_token(self) -> str:
-        return "\n".join([f"{msg['sender']}: {msg['message']}" for msg in self["buffer_memory"]])
+    def _messages(self, max_tokens: Optional[int]) -> List[Dict[str, Any]]:
+        buffer = self["buffer_memory"]
+        if max_tokens is None:
+            messages = list(buffer)
+        else:
+            count = self._saved - self._window(max_tokens)[0]
+            messages = list(islice(reversed(buffer), count))
+            messages.reverse()
+        if self.summary:
+            messages.insert(0, {"sender": SUMMARY_SENDER, "message": self.summary, "tokens": self.summary_tokens})
+        return messages
+
+    def _view(self, kind: str, max_tokens: Optional[int], format: Callable[[List[Dict[str, Any]]], Any]) -> Any:
+        key = (kind, max_tokens)
+        with self._lock:
+            if key not in self._views:
+                self._views[key] = format(self._messages(max_tokens))
+            return self._views[key]
+
+    @property
+    def first_sequence(self) -> int:
+        """Number of the oldest message in the buffer, messages being numbered from 0 as they are saved."""
+        return self._saved - len(self["buffer_memory"])
+
+    def sequence_within(self, max_tokens: int) -> int:
+        """Number of the oldest message among the last ones within `max_tokens`."""
+        with self._lock:
+            return self._window(max_tokens)[0]
+
+    def messages_before(self, sequence: int) -> List[Dict[str, Any]]:
+        """The messages of the buffer numbered below `sequence`."""
+        with self._lock:
+            return list(islice(self["buffer_memory"], max(sequence - self.first_sequence, 0)))
+
+    def compact(self, summary: str, until: int, *, generation: Optional[int] = None) -> bool:
+        """Replace the messages numbered below `until` by `summary`, which should cover the previous summary too.
+
+        Does nothing and returns False if `generation` is given and the buffer was loaded again since.
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return False
+            buffer = self["buffer_memory"]
+            for _ in range(min(max(until - self.first_sequence, 0), len(buffer))):
+                self._tokens -= buffer.popleft()["tokens"]
+            self.summary = summary
+            self.summary_tokens = self.token_counter(summary)
+            # Rare enough for the windows to be scanned again on their next use
+            self._windows.clear()
+            self._views.clear()
+            return True
+
+    def format_buffer_memory(
+        self, assistant: Optional["Assistant"] = None, *, max_tokens: Optional[int] = None
+    ) -> List[tuple]:
+        """The messages as (sender, message) tuples, only the last ones within `max_tokens` if given."""
+        return self._view("tuples", max_tokens, lambda messages: [(msg["sender"], msg["message"]) for msg in messages])
+
+    def format_buffer_memory_no_token(self, *, max_tokens: Optional[int] = None) -> str:
+        return self._view(
+            "text", max_tokens, lambda messages: "\n".join([f"{msg['sender']}: {msg['message']}" for msg in messages])
+        )
 
     def clear_pending_message(self) -> None:
         self["pending_message"] = ""
 
     def save_message(self, sender: str, message: str) -> None:
-        self["buffer_memory"].append({"sender": sender, "message": message})
-        self["buffer_memory"] = self["buffer_memory"][-self.memory_size :]
+        tokens = self.token_counter(message)
+        with self._lock:
+            self._append(sender, message, tokens)
+        if self.compactor is not None:
+            self.compactor.maybe_compact(self)
+
+    def _append(self, sender: str, message: str, tokens: int) -> None:
+        buffer = self["buffer_memory"]
+        if len(buffer) == buffer.maxlen:
+            # The oldest message is about to be dropped, along with its tokens
+            dropped, sequence = buffer[0], self._saved - len(buffer)
+            self._tokens -= dropped["tokens"]
+            for window in self._windows.values():
+                if window[0] == sequence:
+                    window[0] += 1
+                    window[1] -= dropped["tokens"]
+        buffer.append({"sender": sender, "message": message, "tokens": tokens})
+        self._saved += 1
+        self._tokens += tokens
+        for max_tokens, window in self._windows.items():
+            window[1] += tokens
+            while window[1] > max_tokens:
+                window[1] -= self._message_at(window[0])["tokens"]
+                window[0] += 1
+        self._views.clear()
 
     def save_pending_message(self, message: str) -> None:
         self["pending_message"] = message
@@ -0,0 +1,176 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple, Union
+
+from aisync.log import LogEngine
+
+if TYPE_CHECKING:
+    from aisync.engines.memory.buffer_memory import BufferMemory
+
+SUMMARY_PROMPT = """Summarize the conversation below for an assistant that will continue it.
+Keep the facts, names, numbers, decisions, open questions and user preferences. Drop greetings and repetitions.
+Write at most a few short paragraphs, without any preamble.
+
+Summary of the earlier conversation:
+{summary}
+
+Conversation:
+{transcript}"""
+
+
+@dataclass
+class CompactionStats:
+    compactions: int = 0
+    failures: int = 0
+    discarded: int = 0
+    """Summaries not applied because their buffer was loaded again while they were written."""
+    summarized_tokens: int = 0
+    """Tokens of the messages and previous summaries that were summarized."""
+    summary_tokens: int = 0
+    """Tokens of the summaries that replaced them."""
+    total_latency: float = 0.0
+    last_latency: Optional[float] = None
+
+    @property
+    def compression_ratio(self) -> float:
+        return self.summarized_tokens / self.summary_tokens if self.summary_tokens else 0.0
+
+    @property
+    def average_latency(self) -> Optional[float]:
+        return self.total_latency / self.compactions if self.compactions else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "compression_ratio": self.compression_ratio, "average_latency": self.average_latency}
+
+
+class MemoryCompactor:
+    """Summarizes the older messages of buffer memories in the background, see `BufferMemory`.
+
+    Once the messages of a buffer exceed `threshold` tokens, all but the last ones within `keep_tokens` are
+    summarized by `llm`, together with the previous summary, and replaced by the new summary. Summaries run in a
+    thread pool so saving a message never waits for them, and a buffer is compacted by one summary at a time.
+
+    Example:
+        >>> compactor = MemoryCompactor("LLMChatOpenAI", threshold=4000, keep_tokens=1000)
+        >>> memory = BufferMemory(compactor=compactor)
+    """
+
+    def __init__(
+        self,
+        llm: Union[str, Tuple[str, Dict[str, Any]], Any],
+        *,
+        threshold: int = 3000,
+        keep_tokens: int = 1000,
+        prompt: str = SUMMARY_PROMPT,
+        max_workers: int = 2,
+    ):
+        if keep_tokens >= threshold:
+            raise ValueError(f"Tokens kept ({keep_tokens}) must be below the threshold ({threshold}).")
+        self.log = LogEngine(self.__class__.__name__)
+        self.threshold = threshold
+        self.keep_tokens = keep_tokens
+        self.prompt = prompt
+        self.stats = CompactionStats()
+        self._llm_spec = llm
+        self._llm: Optional[Any] = None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="memory-compaction")
+        # Buffers being compacted, by id
+        self._running: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def llm(self) -> Any:
+        """The summarizing model, created on first use when given as an AISync LLM class name."""
+        if self._llm is None:
+            if isinstance(self._llm_spec, (str, tuple)):
+                from aisync.engines.llms import get_llm_object
+
+                self._llm = get_llm_object(self._llm_spec)
+            else:
+                self._llm = self._llm_spec
+        return self._llm
+
+    def maybe_compact(self, memory: "BufferMemory") -> Optional[Future]:
+        """Start compacting `memory` in the background if it is past the threshold and not being compacted yet."""
+        if memory.token_count <= self.threshold:
+            return None
+        with self._lock:
+            if id(memory) in self._running:
+                return None
+            future = self._executor.submit(self._compact, memory)
+            self._running[id(memory)] = future
+        future.add_done_callback(lambda _: self._done(memory))
+        return future
+
+    def _done(self, memory: "BufferMemory") -> None:
+        with self._lock:
+            self._running.pop(id(memory), None)
+
+    def _compact(self, memory: "BufferMemory") -> None:
+        from aisync.engines.llms import llm_context
+
+        with memory._lock:
+            generation = memory.generation
+            until = memory.sequence_within(self.keep_tokens)
+            messages = memory.messages_before(until)
+            previous = memory.summary
+        if not messages:
+            return
+        transcript = "\n".join(f"{msg['sender']}: {msg['message']}" for msg in messages)
+        started_at = time.perf_counter()
+        try:
+            with llm_context(node="memory_compaction"):
+                response = self.llm.invoke(self.prompt.format(summary=previous or "(none)", transcript=transcript))
+        except Exception as e:
+            self.stats.failures += 1
+            self.log.warning(f"Failed to summarize {len(messages)} message(s): {e}")
+            return
+        latency = time.perf_counter() - started_at
+        summary = str(getattr(response, "content", response)).strip()
+        # Messages saved meanwhile come after `until`, and are kept as they are. A buffer loaded again meanwhile
+        # numbers its messages anew, `until` would not designate the summarized ones anymore.
+        if not memory.compact(summary, until, generation=generation):
+            with self._lock:
+                self.stats.discarded += 1
+            self.log.debug(f"Discarded the summary of {len(messages)} message(s), the memory was loaded again")
+            return
+
+        summarized = sum(msg["tokens"] for msg in messages) + (memory.token_counter(previous) if previous else 0)
+        with self._lock:
+            self.stats.compactions += 1
+            self.stats.summarized_tokens += summarized
+            self.stats.summary_tokens += memory.summary_tokens
+            self.stats.total_latency += latency
+            self.stats.last_latency = latency
+        self.log.debug(
+            f"Summarized {len(messages)} message(s) in {latency:.2f}s, {summarized} -> {memory.summary_tokens} tokens"
+        )
+
+    def close(self) -> None:
+        """Wait for the running compactions and stop the thread pool."""
+        self._executor.shutdown(wait=True)
+
+
+_memory_compactor: Optional[MemoryCompactor] = None
+_memory_compactor_lock = threading.Lock()
+
+
+def get_memory_compactor() -> Optional[MemoryCompactor]:
+    """
+    Returns the process-wide memory compactor configured by the `AISYNC_MEMORY_COMPACTION_*` settings, or None if
+    memories are not compacted.
+    """
+    from aisync.env import env
+
+    global _memory_compactor
+    if _memory_compactor is None and env.AISYNC_MEMORY_COMPACTION_LLM:
+        with _memory_compactor_lock:
+            if _memory_compactor is None:
+                _memory_compactor = MemoryCompactor(
+                    env.AISYNC_MEMORY_COMPACTION_LLM,
+                    threshold=env.AISYNC_MEMORY_COMPACTION_THRESHOLD,
+                    keep_tokens=env.AISYNC_MEMORY_COMPACTION_KEEP_TOKENS,
+                )
+    return _memory_compactor
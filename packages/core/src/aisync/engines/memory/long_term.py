@@ -0,0 +1,350 @@
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+from aisync.log import LogEngine
+
+if TYPE_CHECKING:
+    from aisync.engines.memory.buffer_memory import BufferMemory
+    from aisync.stores import PGVector
+
+# (user id, turn id, message, metadata)
+_Turn = Tuple[str, str, str, Dict[str, Any]]
+
+
+@dataclass
+class LongTermMemoryStats:
+    written: int = 0
+    flushes: int = 0
+    write_errors: int = 0
+    recalls: int = 0
+    recall_latency: float = 0.0
+    """Total time spent recalling, query embedding included, in seconds."""
+    query_cache_hits: int = 0
+    query_cache_misses: int = 0
+
+    @property
+    def average_recall_latency(self) -> Optional[float]:
+        return self.recall_latency / self.recalls if self.recalls else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "average_recall_latency": self.average_recall_latency}
+
+
+class LongTermMemory:
+    """Conversation turns embedded into a `PGVector` collection per user, to recall the relevant ones later.
+
+    Remembered turns are embedded and written behind in batches, by a thread for a sync store or by a task of the
+    running loop for an async one: every `flush_interval` seconds, or as soon as `batch_size` turns are waiting.
+    Recalls embed the query once and keep it in an LRU of `query_cache_size` entries, since the same questions come
+    back across turns and users.
+
+    Example:
+        >>> long_term = LongTermMemory(PGVector("memory", embedder, connection=url))
+        >>> long_term.remember("user-1", "user", "My dog is called Rex")
+        >>> long_term.prompt_messages("user-1", "What is my dog's name?", memory, filter={"sender": "user"})
+    """
+
+    def __init__(
+        self,
+        vectorstore: "PGVector",
+        *,
+        collection_prefix: str = "memory",
+        k: int = 4,
+        batch_size: int = 64,
+        flush_interval: float = 1.0,
+        query_cache_size: int = 1024,
+    ):
+        self.log = LogEngine(self.__class__.__name__)
+        self.vectorstore = vectorstore
+        self.collection_prefix = collection_prefix
+        self.k = k
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.query_cache_size = query_cache_size
+        self.stats = LongTermMemoryStats()
+        self._pending: List[_Turn] = []
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._collections: set[str] = set()
+        self._query_cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        self._closed = False
+        # Sync stores are written by a thread, async ones by a task of the loop using them
+        self._wake = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        self._awake: Optional[asyncio.Event] = None
+        self._atask: Optional[asyncio.Task] = None
+
+    @property
+    def embedder(self) -> Any:
+        return self.vectorstore.embedder
+
+    def collection_name(self, user_id: str) -> str:
+        return f"{self.collection_prefix}_{user_id}"
+
+    # Writes
+
+    def _enqueue(self, user_id: str, sender: str, message: str, metadata: Optional[Dict[str, Any]]) -> bool:
+        turn_metadata = {**(metadata or {}), "user_id": user_id, "sender": sender, "created_at": time.time()}
+        with self._pending_lock:
+            # Set once, so a batch written again after an error overwrites its turns instead of duplicating them
+            self._pending.append((user_id, str(uuid.uuid4()), message, turn_metadata))
+            return len(self._pending) >= self.batch_size
+
+    def _take_pending(self) -> List[_Turn]:
+        with self._pending_lock:
+            turns, self._pending = self._pending, []
+        return turns
+
+    def _requeue(self, turns: List[_Turn], error: Exception) -> None:
+        with self._pending_lock:
+            self._pending[:0] = turns
+        self.stats.write_errors += 1
+        self.log.error(f"Failed to write {len(turns)} turn(s) to long-term memory, retrying later: {error}")
+
+    @staticmethod
+    def _by_user(turns: List[_Turn], embeddings: List[List[float]]) -> Dict[str, Tuple[list, list, list, list]]:
+        by_user: Dict[str, Tuple[list, list, list, list]] = {}
+        for (user_id, turn_id, message, metadata), embedding in zip(turns, embeddings):
+            ids, documents, metadatas, user_embeddings = by_user.setdefault(user_id, ([], [], [], []))
+            ids.append(turn_id)
+            documents.append(message)
+            metadatas.append(metadata)
+            user_embeddings.append(embedding)
+        return by_user
+
+    def remember(self, user_id: str, sender: str, message: str, *, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """Queue a turn to be embedded and written to the user's collection, without waiting for it."""
+        full = self._enqueue(user_id, sender, message, metadata)
+        if self._writer is None:
+            with self._pending_lock:
+                if self._writer is None and not self._closed:
+                    self._writer = threading.Thread(target=self._run_writer, name="long-term-memory", daemon=True)
+                    self._writer.start()
+        if full:
+            self._wake.set()
+
+    def _run_writer(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """Embed and write the queued turns, in one embedding request and one insert per user."""
+        with self._flush_lock:
+            turns = self._take_pending()
+            if not turns:
+                return
+            try:
+                embeddings = self.embedder.embed_documents([message for _, _, message, _ in turns])
+                for user_id, (ids, documents, metadatas, user_embeddings) in self._by_user(turns, embeddings).items():
+                    collection_name = self.collection_name(user_id)
+                    if collection_name not in self._collections:
+                        self.vectorstore.create_collection(collection_name, metadata={"user_id": user_id})
+                        self._collections.add(collection_name)
+                    self.vectorstore.add_documents(
+                        collection_name, documents, metadatas, ids=ids, embeddings=user_embeddings
+                    )
+            except Exception as e:
+                # Turns written before the error are written again under the same ids
+                self._requeue(turns, e)
+                return
+            self.stats.written += len(turns)
+            self.stats.flushes += 1
+
+    async def aremember(
+        self, user_id: str, sender: str, message: str, *, metadata: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Same as `remember`, for an async store, written by a task of the running loop."""
+        full = self._enqueue(user_id, sender, message, metadata)
+        if self._atask is None or self._atask.done():
+            self._awake = asyncio.Event()
+            self._atask = asyncio.get_running_loop().create_task(self._arun_writer())
+        if full:
+            self._awake.set()
+
+    async def _arun_writer(self) -> None:
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._awake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._awake.clear()
+            await self.aflush()
+
+    async def aflush(self) -> None:
+        turns = self._take_pending()
+        if not turns:
+            return
+        try:
+            embeddings = await self.embedder.aembed_documents([message for _, _, message, _ in turns])
+            for user_id, (ids, documents, metadatas, user_embeddings) in self._by_user(turns, embeddings).items():
+                collection_name = self.collection_name(user_id)
+                if collection_name not in self._collections:
+                    await self.vectorstore.acreate_collection(collection_name, metadata={"user_id": user_id})
+                    self._collections.add(collection_name)
+                await self.vectorstore.aadd_documents(
+                    collection_name, documents, metadatas, ids=ids, embeddings=user_embeddings
+                )
+        except Exception as e:
+            self._requeue(turns, e)
+            return
+        self.stats.written += len(turns)
+        self.stats.flushes += 1
+
+    # Recalls
+
+    def _cached_query(self, query: str) -> Optional[List[float]]:
+        with self._query_cache_lock:
+            embedding = self._query_cache.get(query)
+            if embedding is None:
+                self.stats.query_cache_misses += 1
+                return None
+            self._query_cache.move_to_end(query)
+            self.stats.query_cache_hits += 1
+            return embedding
+
+    def _cache_query(self, query: str, embedding: List[float]) -> None:
+        with self._query_cache_lock:
+            self._query_cache[query] = embedding
+            while len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
+
+    def _embed_query(self, query: str) -> List[float]:
+        embedding = self._cached_query(query)
+        if embedding is None:
+            embedding = self.embedder.embed_query(query)
+            self._cache_query(query, embedding)
+        return embedding
+
+    async def _aembed_query(self, query: str) -> List[float]:
+        embedding = self._cached_query(query)
+        if embedding is None:
+            embedding = await self.embedder.aembed_query(query)
+            self._cache_query(query, embedding)
+        return embedding
+
+    def _turns(self, rows: List[Any], k: int, exclude: set[str]) -> List[Tuple[str, str]]:
+        turns = []
+        for embedding, _ in rows:
+            if embedding.document in exclude:
+                continue
+            turns.append(((embedding.cmetadata or {}).get("sender", ""), embedding.document))
+            if len(turns) == k:
+                break
+        return turns
+
+    def _recorded(self, started_at: float) -> None:
+        self.stats.recalls += 1
+        self.stats.recall_latency += time.perf_counter() - started_at
+
+    def recall(
+        self,
+        user_id: str,
+        query: str,
+        *,
+        k: Optional[int] = None,
+        filter: Optional[dict] = None,
+        exclude: Iterable[str] = (),
+    ) -> List[Tuple[str, str]]:
+        """The `k` past turns of a user most relevant to `query`, as (sender, message) tuples, most relevant first.
+
+        Args:
+            filter: Filter on the metadata of the turns, in the `PGVector` filter syntax.
+            exclude: Messages to leave out, e.g. those already in the recent buffer.
+        """
+        from aisync.stores.pgvector import CollectionNotFoundError
+
+        started_at = time.perf_counter()
+        k = k or self.k
+        exclude = set(exclude)
+        embedding = self._embed_query(query)
+        try:
+            rows = self.vectorstore.similarity_search_by_vector(
+                self.collection_name(user_id), embedding, k + min(len(exclude), k), filter
+            )
+        except CollectionNotFoundError:
+            # No collection yet, nothing was remembered for this user
+            rows = []
+        self._recorded(started_at)
+        return self._turns(rows, k, exclude)
+
+    async def arecall(
+        self,
+        user_id: str,
+        query: str,
+        *,
+        k: Optional[int] = None,
+        filter: Optional[dict] = None,
+        exclude: Iterable[str] = (),
+    ) -> List[Tuple[str, str]]:
+        from aisync.stores.pgvector import CollectionNotFoundError
+
+        started_at = time.perf_counter()
+        k = k or self.k
+        exclude = set(exclude)
+        embedding = await self._aembed_query(query)
+        try:
+            rows = await self.vectorstore.asimilarity_search_by_vector(
+                self.collection_name(user_id), embedding, k + min(len(exclude), k), filter
+            )
+        except CollectionNotFoundError:
+            rows = []
+        self._recorded(started_at)
+        return self._turns(rows, k, exclude)
+
+    def prompt_messages(
+        self,
+        user_id: str,
+        query: str,
+        memory: "BufferMemory",
+        *,
+        k: Optional[int] = None,
+        filter: Optional[dict] = None,
+        max_tokens: Optional[int] = None,
+    ) -> List[Tuple[str, str]]:
+        """The recalled turns not in the recent buffer, oldest relevant first, followed by the recent buffer."""
+        recent = memory.format_buffer_memory(max_tokens=max_tokens)
+        recalled = self.recall(user_id, query, k=k, filter=filter, exclude=(message for _, message in recent))
+        return [*reversed(recalled), *recent]
+
+    async def aprompt_messages(
+        self,
+        user_id: str,
+        query: str,
+        memory: "BufferMemory",
+        *,
+        k: Optional[int] = None,
+        filter: Optional[dict] = None,
+        max_tokens: Optional[int] = None,
+    ) -> List[Tuple[str, str]]:
+        recent = memory.format_buffer_memory(max_tokens=max_tokens)
+        recalled = await self.arecall(user_id, query, k=k, filter=filter, exclude=(message for _, message in recent))
+        return [*reversed(recalled), *recent]
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._pending_lock:
+            pending = len(self._pending)
+        return {**self.stats.to_dict(), "pending": pending, "cached_queries": len(self._query_cache)}
+
+    def close(self) -> None:
+        """Stop writing behind and write the remaining turns, for a sync store."""
+        self._closed = True
+        self._wake.set()
+        if self._writer is not None:
+            self._writer.join()
+        self.flush()
+
+    async def aclose(self) -> None:
+        """Stop writing behind and write the remaining turns, for an async store."""
+        self._closed = True
+        if self._atask is not None:
+            self._awake.set()
+            await self._atask
+        await self.aflush()
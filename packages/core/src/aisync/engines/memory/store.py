@@ -0,0 +1,477 @@
+import asyncio
+import atexit
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from aisync.engines.memory.backends import (
+    MemoryBackend,
+    MessageConflictError,
+    MessageRow,
+    PostgresMemoryBackend,
+    SQLiteMemoryBackend,
+)
+from aisync.engines.memory.buffer_memory import BufferMemory
+from aisync.engines.memory.compaction import MemoryCompactor, get_memory_compactor
+from aisync.log import LogEngine
+
+
+class SessionMemory(BufferMemory):
+    """Buffer memory of a session from a `ConversationMemoryStore`, which saves its messages.
+
+    The buffer holds the last `memory_size` messages. Older ones are read from the store on demand with
+    `load_older`. The summary of a compacted session is saved to the store as well, and restored in place of the
+    messages it covers when the session is loaded. A memory evicted from the store while still in use is put back
+    on its next save, reloaded first if its session was written to since.
+    """
+
+    def __init__(
+        self,
+        store: "ConversationMemoryStore",
+        session_id: str,
+        rows: List[tuple],
+        next_sequence: int,
+        memory_size: int,
+        token_counter: Optional[Callable[[str], int]] = None,
+        compactor: Optional[MemoryCompactor] = None,
+        *,
+        summary: Optional[Tuple[str, int]] = None,
+    ):
+        super().__init__(memory_size, token_counter, compactor)
+        self.session_id = session_id
+        self._store = store
+        # Set by the store when evicting this memory, under the lock of its shard
+        self._stale = False
+        self._load(rows, next_sequence, summary)
+        if compactor is not None:
+            compactor.maybe_compact(self)
+
+    def _load(self, rows: List[tuple], next_sequence: int, summary: Optional[Tuple[str, int]]) -> None:
+        with self._lock:
+            self.generation += 1
+            self["buffer_memory"].clear()
+            self._saved = 0
+            self._tokens = 0
+            self._windows.clear()
+            self._views.clear()
+            self.summary, self.summary_tokens = "", 0
+            if summary is not None:
+                # The messages the summary covers are not loaded again
+                self.summary, until = summary
+                self.summary_tokens = self.token_counter(self.summary)
+                rows = [row for row in rows if row[0] >= until]
+            # Sequence number of the first message of this buffer, later ones are numbered from it
+            self._first_sequence = next_sequence - len(rows)
+            self._history_cursor: Optional[int] = None
+            for _, sender, message in rows:
+                self._append(sender, message, self.token_counter(message))
+
+    @property
+    def next_sequence(self) -> int:
+        return self._first_sequence + self._saved
+
+    def save_message(self, sender: str, message: str) -> None:
+        tokens = self.token_counter(message)
+        # Numbered under the shard lock, so the session cannot be evicted and loaded again meanwhile
+        with self._store._shard(self.session_id).lock:
+            if self._stale:
+                self._store._revive(self)
+            with self._lock:
+                sequence = self.next_sequence
+                self._append(sender, message, tokens)
+            self._store._enqueue((self.session_id, sequence, sender, message, time.time()))
+        if self.compactor is not None:
+            self.compactor.maybe_compact(self)
+
+    def compact(self, summary: str, until: int, *, generation: Optional[int] = None) -> bool:
+        with self._lock:
+            if not super().compact(summary, until, generation=generation):
+                return False
+            # `until` is numbered from the start of this buffer, the store numbers from the start of the session
+            until += self._first_sequence
+        self._store._save_summary(self.session_id, summary, until)
+        return True
+
+    def load_older(self, limit: Optional[int] = None) -> List[tuple]:
+        """The page of (sender, message) tuples before the previous one, starting before the buffer. Empty once
+        the beginning of the conversation is reached."""
+        if self._history_cursor is None:
+            self._history_cursor = self.next_sequence - len(self["buffer_memory"])
+        if self._history_cursor <= 0:
+            return []
+        rows = self._store._page(self.session_id, self._history_cursor, limit)
+        self._history_cursor = rows[0][0] if rows else 0
+        return [(sender, message) for _, sender, message in rows]
+
+
+@dataclass
+class MemoryStoreStats:
+    hits: int = 0
+    loads: int = 0
+    evictions: int = 0
+    written: int = 0
+    flushes: int = 0
+    write_errors: int = 0
+    conflicts: int = 0
+    """Messages numbered like stored ones, moved to `dead_letters` instead of being written."""
+    dropped: int = 0
+    """Messages dropped unwritten because more than `max_pending` were waiting."""
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class _Shard:
+    """Part of the hot sessions, with its own lock so sessions of different shards are served concurrently."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.sessions: "OrderedDict[str, tuple[SessionMemory, float]]" = OrderedDict()
+        self.lock = threading.Lock()
+
+
+class ConversationMemoryStore:
+    """Conversation memories keyed by session id, persisted in a `MemoryBackend`.
+
+    The memories of recently used sessions are kept in an LRU of at most `max_sessions` entries, split into
+    `shards`. Sessions unused for `idle_timeout` seconds are evicted too, so RAM stays bounded by `max_sessions`
+    buffers of `memory_size` messages however many sessions are served. A session is loaded with its last
+    `memory_size` messages, older ones are read page by page with `SessionMemory.load_older`.
+
+    Saved messages are written behind, in batches: every `flush_interval` seconds, or as soon as `flush_batch`
+    messages are waiting. Messages failing to be written are retried on the next flush, except those conflicting
+    with stored ones, which are moved to `dead_letters`. At most `max_pending` messages wait, the oldest ones are
+    dropped beyond. With a `compactor`, the buffers of the sessions are compacted as well, while their full history
+    stays in the backend.
+
+    Example:
+        >>> store = ConversationMemoryStore(SQLiteMemoryBackend())
+        >>> memory = store.get("session-42")
+        >>> memory.save_message("user", "Hello")
+        >>> memory.format_buffer_memory(max_tokens=2000)
+    """
+
+    def __init__(
+        self,
+        backend: MemoryBackend,
+        *,
+        max_sessions: int = 10_000,
+        shards: int = 16,
+        memory_size: int = 100,
+        page_size: int = 50,
+        idle_timeout: Optional[float] = None,
+        flush_interval: float = 1.0,
+        flush_batch: int = 500,
+        max_pending: int = 100_000,
+        max_dead_letters: int = 1000,
+        token_counter: Optional[Callable[[str], int]] = None,
+        compactor: Optional[MemoryCompactor] = None,
+    ):
+        if max_sessions < shards:
+            raise ValueError(f"Max sessions ({max_sessions}) must be at least the number of shards ({shards}).")
+        self.log = LogEngine(self.__class__.__name__)
+        self.backend = backend
+        self.memory_size = memory_size
+        self.page_size = page_size
+        self.idle_timeout = idle_timeout
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.max_pending = max_pending
+        self.token_counter = token_counter
+        self.compactor = compactor
+        self.stats = MemoryStoreStats()
+        self._shards = [_Shard(max_sessions // shards) for _ in range(shards)]
+        self._pending: List[MessageRow] = []
+        self._pending_sessions: Counter = Counter()
+        # Messages which will never be written, the last `max_dead_letters` ones
+        self.dead_letters: "deque[MessageRow]" = deque(maxlen=max_dead_letters)
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    def _shard(self, session_id: str) -> _Shard:
+        return self._shards[hash(session_id) % len(self._shards)]
+
+    def get(self, session_id: str) -> SessionMemory:
+        """The memory of a session, loaded from the backend unless the session is hot."""
+        shard = self._shard(session_id)
+        now = time.monotonic()
+        with shard.lock:
+            entry = shard.sessions.get(session_id)
+            if entry is not None:
+                shard.sessions[session_id] = (entry[0], now)
+                shard.sessions.move_to_end(session_id)
+                self.stats.hits += 1
+                return entry[0]
+            # Loading under the shard lock, so a session is never loaded twice at once
+            rows, next_sequence, summary = self._load(session_id)
+            memory = SessionMemory(
+                self,
+                session_id,
+                rows,
+                next_sequence,
+                self.memory_size,
+                self.token_counter,
+                self.compactor,
+                summary=summary,
+            )
+            self._insert(shard, memory, now)
+            self.stats.loads += 1
+            return memory
+
+    async def aget(self, session_id: str) -> SessionMemory:
+        return await asyncio.to_thread(self.get, session_id)
+
+    def _insert(self, shard: _Shard, memory: SessionMemory, now: float) -> None:
+        shard.sessions[memory.session_id] = (memory, now)
+        while len(shard.sessions) > shard.capacity:
+            shard.sessions.popitem(last=False)[1][0]._stale = True
+            self.stats.evictions += 1
+
+    def _revive(self, memory: SessionMemory) -> None:
+        """
+        Put back an evicted memory still in use, under the lock of its shard. It is reloaded if its session was
+        written to since, and must not be used anymore if its session was loaded again meanwhile.
+        """
+        shard = self._shard(memory.session_id)
+        if memory.session_id in shard.sessions:
+            raise RuntimeError(
+                f"Memory of session {memory.session_id} was evicted and loaded again, get it from the store again."
+            )
+        rows, next_sequence, summary = self._load(memory.session_id)
+        if next_sequence != memory.next_sequence:
+            memory._load(rows, next_sequence, summary)
+            self.stats.loads += 1
+        memory._stale = False
+        self._insert(shard, memory, time.monotonic())
+
+    def delete(self, session_id: str) -> None:
+        """Forget a session, in memory and in the backend."""
+        shard = self._shard(session_id)
+        with shard.lock:
+            entry = shard.sessions.pop(session_id, None)
+            if entry is not None:
+                entry[0]._stale = True
+        self.flush()
+        self.backend.delete(session_id)
+
+    def _load(self, session_id: str) -> Tuple[List[tuple], int, Optional[Tuple[str, int]]]:
+        """The last messages of a session, the number of the next one and the summary of the session if any."""
+        rows = self._page(session_id, None, self.memory_size)
+        next_sequence = rows[-1][0] + 1 if rows else 0
+        summary = self.backend.load_summary(session_id)
+        return rows, next_sequence, summary
+
+    def _save_summary(self, session_id: str, summary: str, until: int) -> None:
+        try:
+            self.backend.save_summary(session_id, summary, until)
+        except Exception as e:
+            self.stats.write_errors += 1
+            self.log.error(f"Failed to save the summary of session {session_id}: {e}")
+
+    def _page(self, session_id: str, before: Optional[int], limit: Optional[int]) -> List[tuple]:
+        # Messages written behind may not be in the backend yet
+        if session_id in self._pending_sessions:
+            self.flush()
+            if session_id in self._pending_sessions:
+                raise RuntimeError(f"Messages of session {session_id} could not be written, see the logs.")
+        return self.backend.page(session_id, before, limit or self.page_size)
+
+    def _enqueue(self, row: MessageRow) -> None:
+        with self._pending_lock:
+            self._pending.append(row)
+            self._pending_sessions[row[0]] += 1
+            self._trim_pending()
+            full = len(self._pending) >= self.flush_batch
+        self._ensure_flusher()
+        if full:
+            self._wake.set()
+
+    def _trim_pending(self) -> None:
+        """Drop the oldest waiting messages beyond `max_pending`, under the pending lock."""
+        overflow = len(self._pending) - self.max_pending
+        if overflow <= 0:
+            return
+        dropped, self._pending = self._pending[:overflow], self._pending[overflow:]
+        self._forget_pending(dropped)
+        self.stats.dropped += overflow
+        self.log.error(f"More than {self.max_pending} messages waiting to be written, dropped the {overflow} oldest")
+
+    def _forget_pending(self, rows: List[MessageRow]) -> None:
+        """Stop counting messages as waiting for their sessions, under the pending lock."""
+        self._pending_sessions.subtract(row[0] for row in rows)
+        self._pending_sessions = +self._pending_sessions
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is None:
+            with self._pending_lock:
+                if self._flusher is None and not self._closed.is_set():
+                    self._flusher = threading.Thread(target=self._run_flusher, name="memory-flusher", daemon=True)
+                    self._flusher.start()
+
+    def _run_flusher(self) -> None:
+        while not self._closed.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+            if self.idle_timeout is not None:
+                self.evict_idle()
+
+    def flush(self) -> None:
+        """Write the saved messages still waiting to the backend."""
+        with self._flush_lock:
+            with self._pending_lock:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return
+            failed, conflicting = self._append(rows)
+            if conflicting:
+                self.dead_letters.extend(conflicting)
+                self.stats.conflicts += len(conflicting)
+            with self._pending_lock:
+                if failed:
+                    self._pending[:0] = failed
+                    self._trim_pending()
+                    self.stats.write_errors += 1
+                retried = {(row[0], row[1]) for row in failed}
+                # Written or given up on
+                self._forget_pending([row for row in rows if (row[0], row[1]) not in retried])
+            written = len(rows) - len(failed) - len(conflicting)
+            if written:
+                self.stats.written += written
+                self.stats.flushes += 1
+
+    def _append(self, rows: List[MessageRow]) -> Tuple[List[MessageRow], List[MessageRow]]:
+        """
+        Write messages to the backend, session by session if the batch fails so a session whose messages cannot be
+        written does not hold back the others. The messages of a session conflicting with stored ones are written
+        one by one, as they would fail again.
+
+        Returns:
+            The messages to retry, and the messages conflicting with stored ones.
+        """
+        try:
+            self.backend.append(rows)
+            return [], []
+        except Exception as e:
+            error = e
+        by_session: Dict[str, List[MessageRow]] = {}
+        for row in rows:
+            by_session.setdefault(row[0], []).append(row)
+        if len(by_session) == 1 and not isinstance(error, MessageConflictError):
+            self.log.error(f"Failed to write {len(rows)} message(s), retrying later: {error}")
+            return rows, []
+        failed: List[MessageRow] = []
+        conflicting: List[MessageRow] = []
+        for session_id, session_rows in by_session.items():
+            if len(by_session) > 1:
+                try:
+                    self.backend.append(session_rows)
+                    continue
+                except MessageConflictError:
+                    pass
+                except Exception as e:
+                    self.log.error(
+                        f"Failed to write {len(session_rows)} message(s) of session {session_id}, retrying later: {e}"
+                    )
+                    failed.extend(session_rows)
+                    continue
+            for row in session_rows:
+                try:
+                    self.backend.append([row])
+                except MessageConflictError as e:
+                    self.log.error(f"Message {row[1]} of session {session_id} conflicts with a stored one: {e}")
+                    conflicting.append(row)
+                except Exception as e:
+                    self.log.error(f"Failed to write message {row[1]} of session {session_id}, retrying later: {e}")
+                    failed.append(row)
+        return failed, conflicting
+
+    def evict_idle(self) -> int:
+        """Evict the sessions unused for `idle_timeout` seconds, return how many were evicted."""
+        if self.idle_timeout is None:
+            return 0
+        deadline = time.monotonic() - self.idle_timeout
+        evicted = 0
+        for shard in self._shards:
+            with shard.lock:
+                # Least recently used first, so the scan stops at the first session still in use
+                while shard.sessions and next(iter(shard.sessions.values()))[1] < deadline:
+                    shard.sessions.popitem(last=False)[1][0]._stale = True
+                    evicted += 1
+        self.stats.evictions += evicted
+        return evicted
+
+    @property
+    def sessions(self) -> int:
+        """Number of hot sessions."""
+        return sum(len(shard.sessions) for shard in self._shards)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._pending_lock:
+            pending = len(self._pending)
+        return {**self.stats.to_dict(), "sessions": self.sessions, "pending": pending}
+
+    def close(self) -> None:
+        """Stop writing behind, write the remaining messages and close the backend."""
+        self._closed.set()
+        self._wake.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+        self.backend.close()
+
+
+def last_message_text(value: Any) -> Optional[str]:
+    """
+    Text of the last message of a graph input or output: a string, a message, or a state whose `messages` are
+    (sender, text) pairs or messages. None if there is none.
+    """
+    if isinstance(value, dict):
+        messages = value.get("messages")
+        if not messages:
+            return None
+        value = messages[-1]
+    if isinstance(value, (tuple, list)) and len(value) == 2:
+        value = value[1]
+    content = getattr(value, "content", value)
+    if isinstance(content, str):
+        return content
+    return None if content is None else str(content)
+
+
+_memory_store: Optional[ConversationMemoryStore] = None
+_memory_store_lock = threading.Lock()
+
+
+def get_memory_store() -> Optional[ConversationMemoryStore]:
+    """
+    Returns the process-wide conversation memory store configured by the `AISYNC_MEMORY_*` settings, or None if
+    conversations are not persisted.
+    """
+    from aisync.env import env
+
+    global _memory_store
+    if _memory_store is None and env.AISYNC_MEMORY_STORE:
+        with _memory_store_lock:
+            if _memory_store is None:
+                if env.AISYNC_MEMORY_STORE == "postgres":
+                    if not env.AISYNC_MEMORY_STORE_URL:
+                        raise ValueError("AISYNC_MEMORY_STORE_URL is required to store memories in PostgreSQL.")
+                    backend = PostgresMemoryBackend(env.AISYNC_MEMORY_STORE_URL)
+                else:
+                    backend = SQLiteMemoryBackend(env.AISYNC_MEMORY_STORE_URL)
+                _memory_store = ConversationMemoryStore(
+                    backend,
+                    max_sessions=env.AISYNC_MEMORY_MAX_SESSIONS,
+                    idle_timeout=env.AISYNC_MEMORY_IDLE_TIMEOUT,
+                    compactor=get_memory_compactor(),
+                )
+                # Messages still written behind are saved on exit
+                atexit.register(_memory_store.close)
+                LogEngine("ConversationMemoryStore").info(f"Storing conversations in {backend.__class__.__name__}")
+    return _memory_store
@@ -1,11 +1,32 @@
 from pydantic_settings import BaseSettings
 
-from typing import Literal, Optional
+from typing import Dict, Literal, Optional
 
 
 class AISyncSettings(BaseSettings):
     AISYNC_DEBUG: Optional[bool] = True
     AISYNC_LOG_LEVEL: Literal["DEBUG", "INFO", "WARN", "ERROR", "FATAL"] = "DEBUG"
+    AISYNC_OFFLINE_INSTALL: Optional[bool] = False
+    AISYNC_POOL_SIZE: int = 0
+    AISYNC_POOL_PRELOAD_SUITS: str = ""
+    AISYNC_POOL_MAX_RUNS: int = 100
+    AISYNC_POOL_MAX_RSS_MB: Optional[float] = None
+    AISYNC_POOL_CALL_TIMEOUT: Optional[float] = 300
+    AISYNC_LLM_CACHE: Optional[Literal["memory", "sqlite"]] = None
+    AISYNC_LLM_CACHE_PATH: Optional[str] = None
+    AISYNC_LLM_CACHE_TTL: Optional[float] = None
+    AISYNC_LLM_CACHE_MAX_ENTRIES: int = 10_000
+    AISYNC_LLM_COALESCE: bool = True
+    AISYNC_LLM_RATE_LIMIT: bool = True
+    AISYNC_LLM_RATE_LIMITS: Dict[str, Dict[str, Optional[float]]] = {}
+    AISYNC_LLM_TELEMETRY: bool = True
+    AISYNC_MEMORY_STORE: Optional[Literal["sqlite", "postgres"]] = None
+    AISYNC_MEMORY_STORE_URL: Optional[str] = None
+    AISYNC_MEMORY_MAX_SESSIONS: int = 10_000
+    AISYNC_MEMORY_IDLE_TIMEOUT: Optional[float] = 1800.0
+    AISYNC_MEMORY_COMPACTION_LLM: Optional[str] = None
+    AISYNC_MEMORY_COMPACTION_THRESHOLD: int = 3000
+    AISYNC_MEMORY_COMPACTION_KEEP_TOKENS: int = 1000
 
 
 class LLMSettings(BaseSettings):
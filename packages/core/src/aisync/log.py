@@ -1,24 +1,40 @@
-from loguru import logger
-
 import inspect
 import sys
-from typing import Any
-
-from aisync.env import env
+from typing import Any, Optional
 
 
 class LogEngine:
     def __init__(self, service: str) -> None:
         """
-        Initialize the logger.
+        Initialize the logger. loguru and the settings are only loaded on the first log call.
 
         Args:
             service (str): The name of the service.
         """
         self.service = service
-        self._logger = logger
-        self.setup()
-        self.log_level = env.AISYNC_LOG_LEVEL
+        self._logger = None
+        self._log_level: Optional[str] = None
+
+    @property
+    def logger(self):
+        if self._logger is None:
+            from loguru import logger
+
+            self._logger = logger
+            self.setup()
+        return self._logger
+
+    @property
+    def log_level(self) -> str:
+        if self._log_level is None:
+            from aisync.env import env
+
+            self._log_level = env.AISYNC_LOG_LEVEL
+        return self._log_level
+
+    @log_level.setter
+    def log_level(self, level: str) -> None:
+        self._log_level = level
 
     def setup(self):
         log_format = (
@@ -89,7 +105,7 @@ class LogEngine:
     def log(self, level="DEBUG", *items: Any, full_path: bool = False) -> None:
         if self._get_level(level) < self._get_level(self.log_level):
             return
-        self._logger.remove()
+        self.logger.remove()
         caller_info = self.get_caller_info()
         context = {
             "original_name": f"{caller_info['package']}.{caller_info['module']}",
@@ -0,0 +1,74 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Union
+
+from pydantic import BaseModel, ValidationError
+
+from aisync.utils import dump_json_atomic, get_registry_dir
+
+MANIFEST_VERSION = 2
+
+
+class ManifestEntry(BaseModel):
+    """Index of the hooks, nodes and graphs defined by a single suit file, and of what it imports"""
+
+    module: str
+    mtime_ns: int
+    size: int
+    sha256: str
+    hooks: List[str] = []
+    nodes: List[str] = []
+    graphs: List[str] = []
+    imports: List[str] = []
+
+    @property
+    def is_empty(self) -> bool:
+        """Whether the file defines nothing the suit has to import."""
+        return not (self.hooks or self.nodes or self.graphs)
+
+    def is_fresh(self, stat: os.stat_result) -> bool:
+        """Whether the file is unchanged since it was indexed, judging by its stat only."""
+        return self.mtime_ns == stat.st_mtime_ns and self.size == stat.st_size
+
+
+class SuitManifest(BaseModel):
+    """On-disk index of a suit, keyed by file path relative to the registry directory"""
+
+    version: int = MANIFEST_VERSION
+    files: Dict[str, ManifestEntry] = {}
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "SuitManifest":
+        """Load a manifest, falling back to an empty one if it is missing, corrupt or outdated."""
+        try:
+            with open(path, "r") as f:
+                manifest = cls.model_validate(json.load(f))
+        except (OSError, ValueError, ValidationError):
+            return cls()
+        if manifest.version != MANIFEST_VERSION:
+            return cls()
+        return manifest
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Atomically write the manifest so a concurrent reader never sees a partial file."""
+        dump_json_atomic(str(path), self.model_dump())
+
+
+def hash_file(path: Union[str, Path]) -> str:
+    """
+    Returns the SHA-256 hex digest of a file's content.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(65536), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_manifest_path(suit_name: str) -> str:
+    """
+    Returns the path to the manifest of the given suit.
+    """
+    return os.path.join(get_registry_dir(), "manifests", f"{suit_name}.json")
@@ -0,0 +1,116 @@
+import ast
+from collections import deque
+from typing import Iterable, Mapping, Union
+
+
+def find_imports(source: Union[str, bytes], module_path: str) -> list[str]:
+    """
+    Find every module name a source file may import, resolving relative imports.
+
+    Both `pkg.name` and `pkg` are reported for `from pkg import name`, since `name` may be either a submodule
+    or an attribute. Callers are expected to keep only the names they know about.
+
+    Args:
+        source (Union[str, bytes]): The source code of the module.
+        module_path (str): The dotted name of the module, e.g. `suits.mark_i.nodes`.
+
+    Example:
+        >>> find_imports("from .nodes import a", "suits.mark_i.graph")
+        ['suits.mark_i.nodes', 'suits.mark_i.nodes.a']
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return []
+
+    package = module_path.rsplit(".", 1)[0] if "." in module_path else ""
+    imports: set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                parts = package.split(".") if package else []
+                if node.level - 1 > len(parts):
+                    continue
+                base = ".".join(parts[: len(parts) - (node.level - 1)])
+                target = f"{base}.{node.module}" if node.module and base else (node.module or base)
+            else:
+                target = node.module
+            if not target:
+                continue
+            imports.add(target)
+            imports.update(f"{target}.{alias.name}" for alias in node.names if alias.name != "*")
+    return sorted(imports)
+
+
+class ModuleDependencyGraph:
+    """Import dependency graph between the modules of a suit
+
+    Edges go from a module to the modules it imports. Imports of modules outside the graph are ignored.
+    A package is known by its `__init__` module (e.g. `suits.mark_i.__init__`), so importing `suits.mark_i`
+    is an edge to it.
+    """
+
+    def __init__(self, imports: Mapping[str, Iterable[str]]):
+        """Initialize the graph.
+
+        Args:
+            imports: Mapping from each module to the names it imports (see `find_imports`).
+        """
+        self._order = {module: index for index, module in enumerate(imports)}
+        self._dependencies: dict[str, set[str]] = {}
+        self._dependents: dict[str, set[str]] = {module: set() for module in imports}
+        for module, imported in imports.items():
+            dependencies = {self._resolve(name) for name in imported} - {None, module}
+            self._dependencies[module] = dependencies
+            for dependency in dependencies:
+                self._dependents[dependency].add(module)
+
+    def _resolve(self, name: str):
+        if name in self._order:
+            return name
+        package_init = f"{name}.__init__"
+        if package_init in self._order:
+            return package_init
+        return None
+
+    def dependencies(self, module: str) -> set[str]:
+        """Modules directly imported by `module`."""
+        return set(self._dependencies.get(module, ()))
+
+    def dependents(self, modules: Iterable[str]) -> set[str]:
+        """The given modules and every module that transitively imports one of them."""
+        seen = {module for module in modules if module in self._order}
+        queue = deque(seen)
+        while queue:
+            module = queue.popleft()
+            for dependent in self._dependents.get(module, ()):
+                if dependent not in seen:
+                    seen.add(dependent)
+                    queue.append(dependent)
+        return seen
+
+    def topological_order(self, modules: Iterable[str]) -> list[str]:
+        """
+        Order modules so that each one comes after the modules it imports.
+
+        Only the edges between the given modules are considered. Modules caught in an import cycle keep
+        their discovery order, after everything that can be ordered.
+        """
+        selected = {module for module in modules if module in self._order}
+        in_degree = {module: len(self._dependencies[module] & selected) for module in selected}
+        ready = sorted((module for module, degree in in_degree.items() if degree == 0), key=self._order.get)
+        queue = deque(ready)
+        ordered: list[str] = []
+        while queue:
+            module = queue.popleft()
+            ordered.append(module)
+            for dependent in sorted(self._dependents[module] & selected, key=self._order.get):
+                in_degree[dependent] -= 1
+                if in_degree[dependent] == 0:
+                    queue.append(dependent)
+        if len(ordered) < len(selected):
+            cyclic = selected.difference(ordered)
+            ordered.extend(sorted(cyclic, key=self._order.get))
+        return ordered
@@ -0,0 +1,198 @@
+import contextlib
+import errno
+import hashlib
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+
+from pydantic import BaseModel, Field
+
+# ioctl request to clone a file's extents (reflink) on btrfs, xfs and friends
+_FICLONE = 0x40049409
+_READ_ONLY = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+_IGNORED_NAMES = {".git", "__pycache__"}
+# Objects younger than this are never collected, they may belong to a version being stored by another process
+DEFAULT_GC_MIN_AGE = 3600.0
+
+
+class SuitVersion(BaseModel):
+    """Model for an installed version of a suit, mapping each file to the object holding its content"""
+
+    name: str
+    commit: str
+    source: Optional[str] = None
+    files: Dict[str, str] = {}
+    installed_at: datetime = Field(default_factory=datetime.now)
+
+
+class _SharedLock:
+    """Lock held in shared mode by any number of threads, or in exclusive mode by one thread."""
+
+    def __init__(self) -> None:
+        self._condition = threading.Condition()
+        self._shared = 0
+        self._exclusive = False
+
+    @contextlib.contextmanager
+    def shared(self) -> Iterator[None]:
+        with self._condition:
+            self._condition.wait_for(lambda: not self._exclusive)
+            self._shared += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._shared -= 1
+                self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def exclusive(self) -> Iterator[None]:
+        with self._condition:
+            self._condition.wait_for(lambda: not self._exclusive)
+            # New shared holders wait from now on, so the exclusive one is not starved
+            self._exclusive = True
+            self._condition.wait_for(lambda: self._shared == 0)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._exclusive = False
+                self._condition.notify_all()
+
+
+class ObjectStore:
+    """Content-addressed file store
+
+    Each file is stored once under `<root>/<digest[:2]>/<digest[2:]>`, keyed by the SHA-256 of its content, and
+    is read-only. Directory trees are materialized from the store as hardlinks (or reflinks, or copies as a last
+    resort), so installing another version of a tree only writes the files whose content changed. Trees meant to
+    be edited are materialized as copies instead, so editing them never modifies the stored objects.
+
+    Adding objects and recording the versions referencing them happens under `lock.shared()`, and collecting
+    unreferenced objects under `lock.exclusive()`, so `gc` never removes the objects of a version being stored.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.lock = _SharedLock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def object_path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:])
+
+    def __contains__(self, digest: str) -> bool:
+        return os.path.exists(self.object_path(digest))
+
+    def add_file(self, path: str) -> str:
+        """Store a file if its content is not in the store yet, and return its digest."""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(65536), b""):
+                digest.update(block)
+        hexdigest = digest.hexdigest()
+
+        object_path = self.object_path(hexdigest)
+        if os.path.exists(object_path):
+            return hexdigest
+
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(object_path), suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(path, temp_path)
+            os.chmod(temp_path, _READ_ONLY)
+            os.replace(temp_path, object_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return hexdigest
+
+    def add_tree(self, directory: str) -> Dict[str, str]:
+        """Store every file of a directory (except VCS and bytecode caches) and map relative paths to digests."""
+        files = {}
+        for current_dir, dir_names, file_names in os.walk(directory):
+            dir_names[:] = sorted(name for name in dir_names if name not in _IGNORED_NAMES)
+            for file_name in sorted(file_names):
+                path = os.path.join(current_dir, file_name)
+                if os.path.islink(path) or not os.path.isfile(path):
+                    continue
+                files[Path(os.path.relpath(path, directory)).as_posix()] = self.add_file(path)
+        return files
+
+    def materialize(self, files: Dict[str, str], destination: str, *, copy: bool = False) -> None:
+        """Recreate a directory tree from the store. `destination` must not exist yet.
+
+        Args:
+            copy: Write independent, writable copies of the objects instead of read-only links to them.
+        """
+        os.makedirs(destination)
+        for relative_path, digest in files.items():
+            target = os.path.join(destination, *relative_path.split("/"))
+            if not os.path.abspath(target).startswith(os.path.abspath(destination) + os.sep):
+                raise ValueError(f"Refusing to materialize {relative_path!r} outside of {destination}")
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if copy:
+                self._copy(self.object_path(digest), target)
+            else:
+                self._link(self.object_path(digest), target)
+
+    @classmethod
+    def _link(cls, source: str, target: str) -> None:
+        try:
+            os.link(source, target)
+            return
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP, errno.EACCES):
+                raise
+
+        cls._copy(source, target)
+        os.chmod(target, _READ_ONLY)
+
+    @staticmethod
+    def _copy(source: str, target: str) -> None:
+        """Copy an object, as a reflink sharing its blocks until written where the filesystem supports it."""
+        if sys.platform.startswith("linux"):
+            import fcntl
+
+            try:
+                with open(source, "rb") as src, open(target, "wb") as dst:
+                    fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+                return
+            except OSError:
+                os.remove(target)
+
+        shutil.copyfile(source, target)
+
+    def gc(self, referenced: Iterable[str], *, min_age: float = DEFAULT_GC_MIN_AGE) -> int:
+        """Remove the objects that are not referenced anymore, and return how many were removed.
+
+        Call it under `lock.exclusive()`, with the objects referenced at that time. Files being written and objects
+        added less than `min_age` seconds ago are kept, as other processes may be storing a version using them.
+        """
+        referenced = set(referenced)
+        deadline = time.time() - min_age
+        removed = 0
+        with os.scandir(self.root) as prefixes:
+            for prefix in prefixes:
+                if not prefix.is_dir():
+                    continue
+                with os.scandir(prefix.path) as objects:
+                    for obj in objects:
+                        if obj.name.endswith(".tmp") or prefix.name + obj.name in referenced:
+                            continue
+                        try:
+                            if obj.stat().st_mtime > deadline:
+                                continue
+                            os.remove(obj.path)
+                        except FileNotFoundError:
+                            continue
+                        removed += 1
+        return removed
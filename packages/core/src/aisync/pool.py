@@ -0,0 +1,383 @@
+import asyncio
+import multiprocessing
+import os
+import pickle
+import queue
+import sys
+import threading
+import traceback
+from contextlib import contextmanager
+from multiprocessing.connection import Connection
+from typing import Any, Iterator, Optional, Sequence
+
+from aisync.log import LogEngine
+
+DEFAULT_PRELOAD_MODULES = (
+    "aisync.pool",
+    "aisync.suit",
+    "aisync.engines.graph",
+    "langchain_core.runnables",
+    "langgraph.graph",
+    "langchain_openai",
+)
+
+
+def _rss_mb() -> float:
+    """Resident set size of the current process, in MiB."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss / 2**20 if sys.platform == "darwin" else max_rss / 2**10
+
+
+def _portable_exception(e: Exception) -> Exception:
+    """Return the exception itself if it can be sent to the parent, otherwise a RuntimeError describing it."""
+    try:
+        pickle.dumps(e)
+        return e
+    except Exception:
+        return RuntimeError(f"{e.__class__.__name__}: {e}\n{traceback.format_exc()}")
+
+
+class _GraphRunner:
+    """Activates suits and runs their graphs in the current process, compiling each graph once."""
+
+    def __init__(self) -> None:
+        from aisync.armory import get_armory
+
+        self.armory = get_armory()
+        self._compiled: set[tuple[str, str]] = set()
+        self._lock = threading.Lock()
+
+    def preload(self, suit: str) -> None:
+        for name in self.activate(suit)["graphs"]:
+            self._graph(suit, name)
+
+    def activate(self, suit: str) -> dict[str, list[str]]:
+        with self._lock:
+            if not self.armory.suits[suit].active:
+                self.armory.activate(suit)
+        activated = self.armory.suits[suit]
+        return {"hooks": list(activated.hooks), "nodes": list(activated.nodes), "graphs": list(activated.graphs)}
+
+    def _graph(self, suit: str, graph: str) -> Any:
+        graphs = self.armory.suits[suit].graphs
+        if graph not in graphs:
+            raise ValueError(f"Graph {graph} not found in suit {suit}. Available graphs: {', '.join(graphs)}")
+        with self._lock:
+            if (suit, graph) not in self._compiled:
+                graphs[graph].compile()
+                self._compiled.add((suit, graph))
+        return graphs[graph]
+
+    def invoke(self, suit: str, graph: str, input: Any, config: Optional[dict] = None, **kwargs: Any) -> Any:
+        self.activate(suit)
+        output = self._graph(suit, graph).invoke(input, config, **kwargs)
+        # Plain dict, so the parent does not import langgraph just to unpickle the output
+        return dict(output) if isinstance(output, dict) else output
+
+
+def _worker_main(conn: Connection, preload_suits: Sequence[str]) -> None:
+    """Entry point of a pool worker: warm up, then serve requests from the parent until told to stop."""
+    log = LogEngine("PoolWorker")
+    runner = _GraphRunner()
+    for suit in preload_suits:
+        try:
+            runner.preload(suit)
+        except Exception as e:
+            log.error(f"Failed to preload suit {suit}: {e}")
+
+    handlers = {"activate": runner.activate, "invoke": runner.invoke}
+    conn.send((True, None, _rss_mb()))
+    while True:
+        try:
+            op, args, kwargs = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if op == "stop":
+            break
+        try:
+            result = handlers[op](*args, **kwargs)
+            conn.send((True, result, _rss_mb()))
+        except Exception as e:
+            conn.send((False, _portable_exception(e), _rss_mb()))
+    conn.close()
+
+
+class PoolWorker:
+    """Handle on a pre-forked worker process, talking to it over a pipe"""
+
+    def __init__(
+        self,
+        context: multiprocessing.context.BaseContext,
+        preload_suits: Sequence[str],
+        call_timeout: Optional[float] = None,
+    ):
+        self.call_timeout = call_timeout
+        self._conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, tuple(preload_suits)), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self._ready = False
+        self.runs = 0
+        self.rss_mb = 0.0
+        self.broken = False
+
+    def _recv(self, timeout: Optional[float] = None) -> tuple[bool, Any, float]:
+        try:
+            answered = timeout is None or self._conn.poll(timeout)
+            if answered:
+                ok, result, rss_mb = self._conn.recv()
+        except (EOFError, OSError) as e:
+            raise RuntimeError(f"Pool worker {self.process.pid} exited unexpectedly") from e
+        if not answered:
+            # The reply may still come later and would be read as the reply to the next call
+            self.broken = True
+            raise TimeoutError(f"Pool worker {self.process.pid} did not answer within {timeout} seconds")
+        self.rss_mb = rss_mb
+        return ok, result, rss_mb
+
+    def wait_ready(self) -> None:
+        """Block until the worker has imported its preloaded suits and compiled their graphs."""
+        if not self._ready:
+            self._recv()
+            self._ready = True
+
+    def call(self, op: str, *args: Any, **kwargs: Any) -> Any:
+        self.wait_ready()
+        try:
+            self._conn.send((op, args, kwargs))
+        except (BrokenPipeError, OSError) as e:
+            raise RuntimeError(f"Pool worker {self.process.pid} exited unexpectedly") from e
+        ok, result, _ = self._recv(self.call_timeout)
+        self.runs += 1
+        if not ok:
+            raise result
+        return result
+
+    def activate(self, suit: str) -> dict[str, list[str]]:
+        """Activate a suit in the worker and return the names of its hooks, nodes and graphs."""
+        return self.call("activate", suit)
+
+    def invoke(self, suit: str, graph: str, input: Any, config: Optional[dict] = None, **kwargs: Any) -> Any:
+        """Run a graph of a suit in the worker. Inputs, outputs and keyword arguments must be picklable."""
+        return self.call("invoke", suit, graph, input, config, **kwargs)
+
+    @property
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if not self.broken:
+            try:
+                self._conn.send(("stop", (), {}))
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self._conn.close()
+
+
+class WarmPool:
+    """Pool of pre-forked worker processes with the core stack and selected suits already imported
+
+    Workers are forked from a forkserver that has imported the heavy modules (langchain, langgraph, ...) once,
+    so starting or replacing a worker costs a fork rather than a cold interpreter start. A worker is recycled
+    after `max_runs` calls, or as soon as its resident memory exceeds `max_rss_mb`. A call that takes longer than
+    `call_timeout` seconds raises a TimeoutError and the worker running it is killed and replaced.
+
+    Example:
+        >>> pool = WarmPool(2, preload_suits=["mark_i"])
+        >>> pool.start()
+        >>> pool.invoke("mark_i", "chat", {"messages": [("user", "Hello")]})
+        >>> pool.shutdown()
+    """
+
+    def __init__(
+        self,
+        size: int,
+        *,
+        preload_suits: Sequence[str] = (),
+        max_runs: Optional[int] = 100,
+        max_rss_mb: Optional[float] = None,
+        call_timeout: Optional[float] = None,
+        preload_modules: Sequence[str] = DEFAULT_PRELOAD_MODULES,
+    ):
+        if size < 1:
+            raise ValueError(f"Pool size must be at least 1, got {size}.")
+        self.log = LogEngine(self.__class__.__name__)
+        self.size = size
+        self.preload_suits = list(preload_suits)
+        self.max_runs = max_runs
+        self.max_rss_mb = max_rss_mb
+        self.call_timeout = call_timeout
+
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self._context = multiprocessing.get_context(method)
+        if method == "forkserver":
+            self._context.set_forkserver_preload(list(preload_modules))
+        self._idle: queue.Queue[PoolWorker] = queue.Queue()
+        self._workers: set[PoolWorker] = set()
+        self._lock = threading.Lock()
+        self._closed = True
+
+    def start(self) -> None:
+        """Start the workers and wait until all of them are warm."""
+        with self._lock:
+            if not self._closed:
+                return
+            self._closed = False
+            workers = [self._spawn() for _ in range(self.size)]
+        for worker in workers:
+            worker.wait_ready()
+            self._idle.put(worker)
+        self.log.info(f"Started {self.size} warm worker(s), preloaded suits: {self.preload_suits}")
+
+    def _spawn(self) -> PoolWorker:
+        worker = PoolWorker(self._context, self.preload_suits, self.call_timeout)
+        self._workers.add(worker)
+        return worker
+
+    def acquire(self, timeout: Optional[float] = None) -> PoolWorker:
+        """Take an idle worker, waiting up to `timeout` seconds for one to be released."""
+        if self._closed:
+            raise RuntimeError("The pool is not running.")
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No pool worker available after {timeout} seconds.") from None
+
+    def release(self, worker: PoolWorker) -> None:
+        """Return a worker to the pool, replacing it if it is dead, worn out or using too much memory."""
+        recycle = (
+            not worker.alive
+            or worker.broken
+            or (self.max_runs is not None and worker.runs >= self.max_runs)
+            or (self.max_rss_mb is not None and worker.rss_mb > self.max_rss_mb)
+        )
+        with self._lock:
+            closed = self._closed
+            if closed or recycle:
+                self._workers.discard(worker)
+        if closed:
+            worker.stop()
+            return
+        if recycle:
+            self.log.info(f"Recycling pool worker {worker.process.pid} ({worker.runs} runs, {worker.rss_mb:.0f} MiB)")
+            # Replaced outside the lock, so other releases and `shutdown` do not wait for the fork
+            worker.stop()
+            worker = PoolWorker(self._context, self.preload_suits, self.call_timeout)
+            with self._lock:
+                closed = self._closed
+                if not closed:
+                    self._workers.add(worker)
+            if closed:
+                worker.stop()
+                return
+        self._idle.put(worker)
+
+    @contextmanager
+    def worker(self, timeout: Optional[float] = None) -> Iterator[PoolWorker]:
+        """Borrow a worker for the duration of the block."""
+        worker = self.acquire(timeout)
+        try:
+            yield worker
+        finally:
+            self.release(worker)
+
+    def activate(self, suit: str, timeout: Optional[float] = None) -> dict[str, list[str]]:
+        with self.worker(timeout) as worker:
+            return worker.activate(suit)
+
+    def invoke(self, suit: str, graph: str, input: Any, config: Optional[dict] = None, **kwargs: Any) -> Any:
+        with self.worker() as worker:
+            return worker.invoke(suit, graph, input, config, **kwargs)
+
+    async def ainvoke(self, suit: str, graph: str, input: Any, config: Optional[dict] = None, **kwargs: Any) -> Any:
+        return await asyncio.to_thread(self.invoke, suit, graph, input, config, **kwargs)
+
+    def shutdown(self) -> None:
+        """Stop every worker. Borrowed workers are stopped when they are released."""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._workers.discard(worker)
+            worker.stop()
+        self.log.info("Pool shut down")
+
+
+_pool: Optional[WarmPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> Optional[WarmPool]:
+    """
+    Returns the process-wide warm pool, or None if it is not running.
+    """
+    return _pool
+
+
+_local_runner: Optional[_GraphRunner] = None
+
+
+def run_graph(suit: str, graph: str, input: Any, config: Optional[dict] = None, **kwargs: Any) -> Any:
+    """
+    Runs a graph of a suit in a warm worker of the process-wide pool when it is running, otherwise in the current
+    process. Inputs, outputs and keyword arguments must be picklable in the first case.
+    """
+    global _local_runner
+    pool = get_pool()
+    if pool is not None:
+        return pool.invoke(suit, graph, input, config, **kwargs)
+    if _local_runner is None:
+        with _pool_lock:
+            if _local_runner is None:
+                _local_runner = _GraphRunner()
+    return _local_runner.invoke(suit, graph, input, config, **kwargs)
+
+
+async def arun_graph(suit: str, graph: str, input: Any, config: Optional[dict] = None, **kwargs: Any) -> Any:
+    return await asyncio.to_thread(run_graph, suit, graph, input, config, **kwargs)
+
+
+def start_pool() -> Optional[WarmPool]:
+    """
+    Start the process-wide warm pool as configured by the `AISYNC_POOL_*` settings. Does nothing if
+    `AISYNC_POOL_SIZE` is 0.
+    """
+    from aisync.env import env
+
+    global _pool
+    with _pool_lock:
+        if _pool is None and env.AISYNC_POOL_SIZE > 0:
+            _pool = WarmPool(
+                env.AISYNC_POOL_SIZE,
+                preload_suits=[suit.strip() for suit in env.AISYNC_POOL_PRELOAD_SUITS.split(",") if suit.strip()],
+                max_runs=env.AISYNC_POOL_MAX_RUNS or None,
+                max_rss_mb=env.AISYNC_POOL_MAX_RSS_MB,
+                call_timeout=env.AISYNC_POOL_CALL_TIMEOUT or None,
+            )
+            _pool.start()
+    return _pool
+
+
+def shutdown_pool() -> None:
+    """
+    Stop the process-wide warm pool, if running.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
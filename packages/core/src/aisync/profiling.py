@@ -0,0 +1,148 @@
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from importlib.abc import MetaPathFinder
+from importlib.machinery import ModuleSpec
+from types import ModuleType
+from typing import Optional, Sequence
+
+
+@dataclass
+class ImportTiming:
+    """Time spent executing a module, in the spirit of `python -X importtime`"""
+
+    module: str
+    self_time: float
+    """Seconds spent in the module body itself, excluding the modules it imported."""
+    cumulative_time: float
+    """Seconds spent in the module body, including the modules it imported."""
+    depth: int
+    """Nesting level of the import, 0 for modules imported directly by the profiled code."""
+
+
+class _TimedLoader:
+    """Loader wrapper timing `exec_module` of a single module, then restoring the original loader."""
+
+    def __init__(self, loader, profiler: "ImportProfiler"):
+        self._loader = loader
+        self._profiler = profiler
+
+    def __getattr__(self, name: str):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec: ModuleSpec) -> Optional[ModuleType]:
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module: ModuleType) -> None:
+        module.__loader__ = self._loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self._loader
+        with self._profiler.measure(module.__name__):
+            self._loader.exec_module(module)
+
+
+class ImportProfiler(MetaPathFinder):
+    """Record how long each module takes to import (or reload) while the profiler is active.
+
+    Only modules executed inside the `with` block are recorded, so modules that are already imported and are not
+    reloaded do not show up.
+
+    Example:
+        >>> with ImportProfiler() as profiler:
+        ...     import json
+        >>> profiler.report()
+    """
+
+    def __init__(self):
+        self.timings: list[ImportTiming] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "ImportProfiler":
+        sys.meta_path.insert(0, self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname: str, path: Optional[Sequence[str]], target: Optional[ModuleType] = None):
+        # Let the other finders locate the module, then time its execution
+        if getattr(self._local, "finding", False):
+            return None
+        self._local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._local.finding = False
+
+        if spec.loader is None or not hasattr(spec.loader, "exec_module"):
+            return spec
+        spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+
+    def measure(self, module: str) -> "_Measure":
+        return _Measure(self, module)
+
+    @property
+    def _stack(self) -> list[float]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def report(self, limit: Optional[int] = None) -> str:
+        """Format the recorded timings, see `format_import_timings`."""
+        return format_import_timings(self.timings, limit)
+
+
+def format_import_timings(timings: Sequence[ImportTiming], limit: Optional[int] = None) -> str:
+    """
+    Format import timings like `python -X importtime`: in microseconds, nested imports before their parent.
+    With a `limit`, only the slowest modules by cumulative time are listed, slowest first.
+    """
+    if limit is not None:
+        timings = sorted(timings, key=lambda timing: timing.cumulative_time, reverse=True)[:limit]
+    lines = ["import time: self [us] | cumulative | imported package"]
+    for timing in timings:
+        lines.append(
+            f"import time: {timing.self_time * 1e6:>9.0f} | {timing.cumulative_time * 1e6:>10.0f} | "
+            f"{'  ' * timing.depth}{timing.module}"
+        )
+    return "\n".join(lines)
+
+
+class _Measure:
+    def __init__(self, profiler: ImportProfiler, module: str):
+        self._profiler = profiler
+        self._module = module
+
+    def __enter__(self) -> None:
+        stack = self._profiler._stack
+        self._depth = len(stack)
+        # Time spent in nested imports, subtracted from this module's self time
+        stack.append(0.0)
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        cumulative_time = time.perf_counter() - self._start
+        stack = self._profiler._stack
+        nested_time = stack.pop()
+        if stack:
+            stack[-1] += cumulative_time
+        with self._profiler._lock:
+            self._profiler.timings.append(
+                ImportTiming(
+                    module=self._module,
+                    self_time=cumulative_time - nested_time,
+                    cumulative_time=cumulative_time,
+                    depth=self._depth,
+                )
+            )
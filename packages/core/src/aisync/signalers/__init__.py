@@ -1,6 +1,10 @@
+from typing import TYPE_CHECKING
+
 from aisync.signalers.base import BaseSignaler, Signal, SignalCallback, SignalSubscriber, Subscriber
 from aisync.signalers.enums import Channel
-from aisync.signalers.in_memory import InMemorySignaler
+
+if TYPE_CHECKING:
+    from aisync.signalers.in_memory import InMemorySignaler
 
 __all__ = [
     "BaseSignaler",
@@ -11,3 +15,12 @@ __all__ = [
     "Channel",
     "InMemorySignaler",
 ]
+
+
+def __getattr__(name: str):
+    # Imported on first access, it pulls in asyncio
+    if name == "InMemorySignaler":
+        from aisync.signalers.in_memory import InMemorySignaler
+
+        return InMemorySignaler
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
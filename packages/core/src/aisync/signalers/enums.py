@@ -4,3 +4,4 @@ import enum
 class Channel(str, enum.Enum):
     FILE_CHANGED = "file_changes"
     NODE_EXECUTION = "node_execution"
+    LLM_CALL = "llm_calls"
@@ -1,3 +1,3 @@
-from aisync.stores.pgvector import PGVector
+from aisync.stores.pgvector import CollectionNotFoundError, PGVector
 
-__all__ = ["PGVector"]
+__all__ = ["CollectionNotFoundError", "PGVector"]
@@ -1,8 +1,13 @@
 import asyncio
 import contextlib
+import csv
 import enum
+import inspect
+import io
 import json
-from typing import Any, AsyncGenerator, Generator, List, Optional, Sequence, Tuple, Union
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncGenerator, AsyncIterable, Callable, Dict, Generator, List, Optional, Sequence, Tuple, Union
 from typing import (
     cast as typing_cast,
 )
@@ -66,6 +71,89 @@ class DistanceStrategy(str, enum.Enum):
 DEFAULT_DISTANCE_STRATEGY = DistanceStrategy.COSINE
 
 
+class IndexMethod(str, enum.Enum):
+    """Enumerator of the approximate nearest neighbor indexes of pgvector."""
+
+    HNSW = "hnsw"
+    IVFFLAT = "ivfflat"
+
+
+# Operator class of the index matching each distance, an index only serves queries ordered by its own distance
+INDEX_OPERATOR_CLASSES = {
+    DistanceStrategy.EUCLIDEAN: "vector_l2_ops",
+    DistanceStrategy.COSINE: "vector_cosine_ops",
+    DistanceStrategy.MAX_INNER_PRODUCT: "vector_ip_ops",
+}
+
+# Bulk ingest copies each batch into this temporary table, then merges it into the embeddings. Vectors are copied
+# as real[] and cast on merge, which spares registering the vector type with the driver.
+INGEST_TABLE = "aisync_embeddings_ingest"
+INGEST_COLUMNS = ("id", "collection_id", "embedding", "document", "cmetadata")
+INGEST_TYPES = ("text", "uuid", "float4[]", "text", "jsonb")
+DEFAULT_INGEST_BATCH_SIZE = 5000
+
+
+class CollectionNotFoundError(ValueError):
+    """The collection an operation targets does not exist."""
+
+
+@dataclass
+class IngestStats:
+    rows: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    """Time spent writing the rows, without embedding them."""
+    last_rows_per_second: Optional[float] = None
+
+    @property
+    def rows_per_second(self) -> Optional[float]:
+        return self.rows / self.seconds if self.seconds else None
+
+    def record(self, rows: int, seconds: float) -> None:
+        self.rows += rows
+        self.batches += 1
+        self.seconds += seconds
+        self.last_rows_per_second = rows / seconds if seconds else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "rows_per_second": self.rows_per_second}
+
+
+@dataclass
+class ChunkProgress:
+    """Outcome of a chunk of a streamed ingest, see `PGVector.aadd_documents_stream`."""
+
+    index: int
+    ids: List[str]
+    embed_seconds: float = 0.0
+    write_seconds: float = 0.0
+    error: Optional[Exception] = None
+
+    @property
+    def documents(self) -> int:
+        return len(self.ids)
+
+
+@dataclass
+class StreamIngestResult:
+    chunks: int = 0
+    written: int = 0
+    failed: int = 0
+    """Documents of the chunks that failed to be embedded or written."""
+    failed_chunks: List[int] = field(default_factory=list)
+
+    def record(self, progress: ChunkProgress) -> None:
+        self.chunks += 1
+        if progress.error is None:
+            self.written += progress.documents
+        else:
+            self.failed += progress.documents
+            self.failed_chunks.append(progress.index)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
 def _get_embedding_collection_store(schema: Optional[str] = None, vector_dimension: Optional[int] = None):
     global _classes
     if _classes is not None:
@@ -195,6 +283,9 @@ class PGVector:
         self._schema = schema
         self._async_engine: Optional[AsyncEngine] = None
         self._async_init = False
+        # Collection ids by name, so operations on a collection need no lookup of its id
+        self._collection_ids: dict[str, Any] = {}
+        self.ingest_stats = IngestStats()
 
         if isinstance(connection, str):
             if async_mode:
@@ -279,6 +370,7 @@ class PGVector:
 
     def create_collection(self, name: str, metadata: Optional[dict] = None):
         """Synchronously create a new collection in the database."""
+        self._collection_ids.pop(name, None)
         with self._make_sync_session() as session:
             try:
                 self.Collection.get_or_create(session, name, cmetadata=metadata)
@@ -290,6 +382,7 @@ class PGVector:
     async def acreate_collection(self, name: str, metadata: Optional[dict] = None):
         """Asynchronously create a new collection in the database."""
         await self.__apost_init__()  # Lazy async init
+        self._collection_ids.pop(name, None)
         async with self._make_async_session() as session:
             try:
                 await self.Collection.aget_or_create(session, name, cmetadata=metadata)
@@ -309,6 +402,7 @@ class PGVector:
 
     def delete_collection(self, collection_id: str):
         """Synchronously delete a collection from the database."""
+        self._forget_collection(collection_id)
         with self._make_sync_session() as session:
             try:
                 collection = session.query(self.Collection).filter_by(id=collection_id).first()
@@ -324,6 +418,7 @@ class PGVector:
     async def adelete_collection(self, collection_id: str):
         """Asynchronously delete a collection from the database."""
         await self.__apost_init__()  # Lazy async init
+        self._forget_collection(collection_id)
         async with self._make_async_session() as session:
             try:
                 collection = await session.get(self.Collection, collection_id)
@@ -336,6 +431,203 @@ class PGVector:
                 await session.rollback()
                 raise e
 
+    def _forget_collection(self, collection_id: Any) -> None:
+        for name, cached_id in list(self._collection_ids.items()):
+            if str(cached_id) == str(collection_id):
+                self._collection_ids.pop(name, None)
+
+    def _collection_id(self, collection_name: str, session: Session) -> Any:
+        """Id of a collection, looked up on first use only."""
+        collection_id = self._collection_ids.get(collection_name)
+        if collection_id is None:
+            collection = self.get_collection(collection_name, session)
+            if not collection:
+                raise CollectionNotFoundError(f"Collection {collection_name} not found.")
+            collection_id = self._collection_ids[collection_name] = collection.id
+        return collection_id
+
+    async def _acollection_id(self, collection_name: str, session: AsyncSession) -> Any:
+        collection_id = self._collection_ids.get(collection_name)
+        if collection_id is None:
+            collection = await self.aget_collection(collection_name, session)
+            if not collection:
+                raise CollectionNotFoundError(f"Collection {collection_name} not found.")
+            collection_id = self._collection_ids[collection_name] = collection.id
+        return collection_id
+
+    def _refresh_collection_id(self, collection_name: str, session: Session) -> Any:
+        """Look up the id of a collection again, the cached one being stale, e.g. the collection was recreated."""
+        self._collection_ids.pop(collection_name, None)
+        return self._collection_id(collection_name, session)
+
+    async def _arefresh_collection_id(self, collection_name: str, session: AsyncSession) -> Any:
+        self._collection_ids.pop(collection_name, None)
+        return await self._acollection_id(collection_name, session)
+
+    def _check_collection(self, collection_name: str, session: Session) -> None:
+        """Check that a collection a statement matched no rows of exists, with one lookup of its id by name.
+
+        The lookup replaces a cached id gone stale, e.g. the collection was recreated, for the next statements. The
+        statement is not run again: one made with a stale id matched no rows.
+        """
+        self._collection_ids.pop(collection_name, None)
+        self._collection_id(collection_name, session)
+
+    async def _acheck_collection(self, collection_name: str, session: AsyncSession) -> None:
+        self._collection_ids.pop(collection_name, None)
+        await self._acollection_id(collection_name, session)
+
+    def _collection_clause(self, collection_name: str) -> Any:
+        """Condition on the collection of the embeddings, by its cached id or else by a subquery on its name, so the
+        statement needs no lookup beforehand.
+
+        The planner cannot match the subquery against the predicate of a partial index of the collection, see
+        `create_index`: only statements run once the id is cached use such an index.
+        """
+        collection_id = self._collection_ids.get(collection_name)
+        if collection_id is None:
+            collection_id = (
+                select(self.Collection.id)
+                .where(typing_cast(mapped_column, self.Collection.name) == collection_name)
+                .scalar_subquery()
+            )
+        return self.Embedding.collection_id == collection_id
+
+    def _quote(self, name: str) -> str:
+        """Quote an identifier for the dialect of the engine, if needed."""
+        engine = self._async_engine if self.async_mode else self._engine
+        return engine.dialect.identifier_preparer.quote(name)
+
+    def _index_statement(
+        self,
+        method: IndexMethod,
+        distance_strategy: Optional[DistanceStrategy],
+        collection_id: Optional[Any],
+        name: Optional[str],
+        concurrently: bool,
+        m: int,
+        ef_construction: int,
+        lists: int,
+    ) -> Any:
+        dimension = self.Embedding.embedding.type.dim
+        if dimension is None:
+            raise ValueError("Vector indexes need embeddings of a fixed length, set `embedding_length`.")
+        method = IndexMethod(method)
+        distance_strategy = DistanceStrategy(distance_strategy or self._distance_strategy)
+        table = self.Embedding.__table__
+        schema = f"{self._quote(table.schema)}." if table.schema else ""
+        if method == IndexMethod.HNSW:
+            parameters = f"m = {int(m)}, ef_construction = {int(ef_construction)}"
+        else:
+            parameters = f"lists = {int(lists)}"
+        if name is None:
+            name = f"ix_embeddings_{method.value}_{distance_strategy.value}"
+            if collection_id is not None:
+                name += f"_{str(collection_id).replace('-', '')}"
+        statement = (
+            f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {self._quote(name)} "
+            f"ON {schema}{self._quote(table.name)} USING {method.value} (embedding {INDEX_OPERATOR_CLASSES[distance_strategy]}) "
+            f"WITH ({parameters})"
+        )
+        if collection_id is not None:
+            statement += f" WHERE collection_id = '{collection_id}'"
+        return text(statement)
+
+    def create_index(
+        self,
+        method: IndexMethod = IndexMethod.HNSW,
+        *,
+        distance_strategy: Optional[DistanceStrategy] = None,
+        collection_name: Optional[str] = None,
+        name: Optional[str] = None,
+        concurrently: bool = True,
+        m: int = 16,
+        ef_construction: int = 64,
+        lists: int = 100,
+    ) -> None:
+        """Synchronously create an approximate nearest neighbor index on the embeddings, if it does not exist.
+
+        Without an index, every similarity search scans all the embeddings. The index serves the searches using
+        `distance_strategy`, the one of the store by default, and trades some recall for speed, see `ef_search`
+        and `probes` in `similarity_search`.
+
+        Args:
+            method: HNSW, slower to build but with a better speed/recall tradeoff, or IVFFlat, which should be
+                built once the table holds data.
+            collection_name: Only index the embeddings of this collection, with a partial index. The index is on the
+                id of the collection, so it only serves the searches of a store which already knows that id: the
+                first search of a collection by a store, made by name, scans the collection without it.
+            name: Name of the index, derived from the method, distance and collection by default.
+            concurrently: Build the index without locking writes to the table.
+            m: Max number of connections per layer of an HNSW index.
+            ef_construction: Size of the candidate list when building an HNSW index.
+            lists: Number of lists of an IVFFlat index, about rows / 1000 up to 1M rows and sqrt(rows) above.
+        """
+        collection_id = None
+        if collection_name is not None:
+            with self._make_sync_session() as session:
+                collection_id = self._collection_id(collection_name, session)
+        statement = self._index_statement(
+            method, distance_strategy, collection_id, name, concurrently, m, ef_construction, lists
+        )
+        # Concurrent builds cannot run in a transaction
+        with self._engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(statement)
+
+    async def acreate_index(
+        self,
+        method: IndexMethod = IndexMethod.HNSW,
+        *,
+        distance_strategy: Optional[DistanceStrategy] = None,
+        collection_name: Optional[str] = None,
+        name: Optional[str] = None,
+        concurrently: bool = True,
+        m: int = 16,
+        ef_construction: int = 64,
+        lists: int = 100,
+    ) -> None:
+        """Asynchronously create an approximate nearest neighbor index on the embeddings, see `create_index`."""
+        await self.__apost_init__()  # Lazy async init
+        collection_id = None
+        if collection_name is not None:
+            async with self._make_async_session() as session:
+                collection_id = await self._acollection_id(collection_name, session)
+        statement = self._index_statement(
+            method, distance_strategy, collection_id, name, concurrently, m, ef_construction, lists
+        )
+        async with self._async_engine.connect() as connection:
+            connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+            await connection.execute(statement)
+
+    def drop_index(self, name: str, *, concurrently: bool = True) -> None:
+        """Synchronously drop an index of the embeddings, if it exists."""
+        with self._engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(self._drop_index_statement(name, concurrently))
+
+    async def adrop_index(self, name: str, *, concurrently: bool = True) -> None:
+        """Asynchronously drop an index of the embeddings, if it exists."""
+        await self.__apost_init__()  # Lazy async init
+        async with self._async_engine.connect() as connection:
+            connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+            await connection.execute(self._drop_index_statement(name, concurrently))
+
+    def _drop_index_statement(self, name: str, concurrently: bool) -> Any:
+        schema = self.Embedding.__table__.schema
+        return text(
+            f"DROP INDEX {'CONCURRENTLY ' if concurrently else ''}IF EXISTS "
+            f"{f'{self._quote(schema)}.' if schema else ''}{self._quote(name)}"
+        )
+
+    @staticmethod
+    def _search_settings(ef_search: Optional[int], probes: Optional[int]) -> List[Any]:
+        """Settings of the index scans for the current transaction only."""
+        settings = []
+        if ef_search is not None:
+            settings.append(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+        if probes is not None:
+            settings.append(text(f"SET LOCAL ivfflat.probes = {int(probes)}"))
+        return settings
+
     @contextlib.contextmanager
     def _make_sync_session(self) -> Generator[Session, None, None]:
         """Make an async session."""
@@ -365,7 +657,9 @@ class PGVector:
         metadatas: Optional[List[dict]] = None,
         *,
         ids: Optional[List[str]] = None,
+        embeddings: Optional[List[List[float]]] = None,
     ):
+        """Add documents to a collection, embedded with `embedder` unless their `embeddings` are given."""
         assert not self._async_engine, "This method must be called with sync_mode"
         if ids is None:
             ids = [str(uuid4()) for _ in documents]
@@ -373,32 +667,21 @@ class PGVector:
         if not metadatas:
             metadatas = [{}] * len(documents)
 
-        embeddings = self.embedder.embed_documents(list(documents))
+        if embeddings is None:
+            embeddings = self.embedder.embed_documents(list(documents))
 
+        rows = list(zip(ids, embeddings, documents, metadatas))
         with self._make_sync_session() as session:  # type: ignore[arg-type]
-            collection = self.get_collection(collection_name, session)
-            if not collection:
-                raise ValueError("Collection not found")
-            data = [
-                {
-                    "id": id,
-                    "collection_id": collection.id,
-                    "embedding": embedding,
-                    "document": document,
-                    "cmetadata": metadata or {},
-                }
-                for id, embedding, document, metadata in zip(ids, embeddings, documents, metadatas)
-            ]
-            stmt = insert(self.Embedding).values(data)
-            on_conflict_stmt = stmt.on_conflict_do_update(
-                index_elements=["id"],
-                set_={
-                    "embedding": stmt.excluded.embedding,
-                    "document": stmt.excluded.document,
-                    "cmetadata": stmt.excluded.cmetadata,
-                },
-            )
-            session.execute(on_conflict_stmt)
+            cached = collection_name in self._collection_ids
+            collection_id = self._collection_id(collection_name, session)
+            try:
+                session.execute(self._upsert_statement(collection_id, rows))
+            except IntegrityError:
+                if not cached:
+                    raise
+                session.rollback()
+                collection_id = self._refresh_collection_id(collection_name, session)
+                session.execute(self._upsert_statement(collection_id, rows))
             session.commit()
         return ids
 
@@ -409,7 +692,9 @@ class PGVector:
         metadatas: Optional[List[dict]] = None,
         *,
         ids: Optional[List[str]] = None,
+        embeddings: Optional[List[List[float]]] = None,
     ):
+        """Add documents to a collection, embedded with `embedder` unless their `embeddings` are given."""
         await self.__apost_init__()  # Lazy async init
         if ids is None:
             ids = [str(uuid4()) for _ in documents]
@@ -417,35 +702,306 @@ class PGVector:
         if not metadatas:
             metadatas = [{}] * len(documents)
 
-        embeddings = self.embedder.embed_documents(list(documents), self._embedding_length)
+        if embeddings is None:
+            embeddings = await self.embedder.aembed_documents(list(documents))
 
+        rows = list(zip(ids, embeddings, documents, metadatas))
         async with self._make_async_session() as session:  # type: ignore[arg-type]
-            collection = await self.aget_collection(collection_name, session)
-            if not collection:
-                raise ValueError("Collection not found")
-            data = [
-                {
-                    "id": id,
-                    "collection_id": collection.id,
-                    "embedding": embedding,
-                    "document": document,
-                    "cmetadata": metadata or {},
-                }
-                for id, embedding, document, metadata in zip(ids, embeddings, documents, metadatas)
-            ]
-            stmt = insert(self.Embedding).values(data)
-            on_conflict_stmt = stmt.on_conflict_do_update(
-                index_elements=["id"],
-                set_={
-                    "embedding": stmt.excluded.embedding,
-                    "document": stmt.excluded.document,
-                    "cmetadata": stmt.excluded.cmetadata,
-                },
-            )
-            await session.execute(on_conflict_stmt)
+            cached = collection_name in self._collection_ids
+            collection_id = await self._acollection_id(collection_name, session)
+            try:
+                await session.execute(self._upsert_statement(collection_id, rows))
+            except IntegrityError:
+                if not cached:
+                    raise
+                await session.rollback()
+                collection_id = await self._arefresh_collection_id(collection_name, session)
+                await session.execute(self._upsert_statement(collection_id, rows))
             await session.commit()
         return ids
 
+    def _upsert_statement(self, collection_id: Any, rows: List[tuple]) -> Any:
+        """Insert of (id, embedding, document, metadata) rows, updating the documents already stored."""
+        data = [
+            {
+                "id": id,
+                "collection_id": collection_id,
+                "embedding": embedding,
+                "document": document,
+                "cmetadata": metadata or {},
+            }
+            for id, embedding, document, metadata in rows
+        ]
+        stmt = insert(self.Embedding).values(data)
+        return stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_={
+                "embedding": stmt.excluded.embedding,
+                "document": stmt.excluded.document,
+                "cmetadata": stmt.excluded.cmetadata,
+            },
+        )
+
+    def _ingest_statements(self, format: str = "BINARY") -> Tuple[Any, Any, str]:
+        """Statements creating the ingest table, merging it into the embeddings and copying into it in `format`."""
+        create = text(
+            f"CREATE TEMP TABLE IF NOT EXISTS {INGEST_TABLE} "
+            "(id varchar, collection_id uuid, embedding real[], document varchar, cmetadata jsonb) "
+            "ON COMMIT DELETE ROWS"
+        )
+        merge = text(
+            f"INSERT INTO {self.Embedding.__table__.fullname} ({', '.join(INGEST_COLUMNS)}) "
+            f"SELECT id, collection_id, embedding::vector, document, cmetadata FROM {INGEST_TABLE} "
+            "ON CONFLICT (id) DO UPDATE SET embedding = EXCLUDED.embedding, document = EXCLUDED.document, "
+            "cmetadata = EXCLUDED.cmetadata"
+        )
+        copy = f"COPY {INGEST_TABLE} ({', '.join(INGEST_COLUMNS)}) FROM STDIN (FORMAT {format})"
+        return create, merge, copy
+
+    @staticmethod
+    def _batches(
+        ids: List[str], documents: Sequence[str], metadatas: Optional[List[dict]], batch_size: int
+    ) -> Generator[Tuple[int, List[str], Sequence[str], List[dict]], None, None]:
+        if batch_size < 1:
+            raise ValueError(f"Batch size must be at least 1, got {batch_size}.")
+        metadatas = list(metadatas) if metadatas else [{}] * len(documents)
+        for start in range(0, len(documents), batch_size):
+            end = start + batch_size
+            yield start, ids[start:end], documents[start:end], metadatas[start:end]
+
+    def bulk_add_documents(
+        self,
+        collection_name: str,
+        documents: Sequence[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        embeddings: Optional[List[List[float]]] = None,
+        batch_size: int = DEFAULT_INGEST_BATCH_SIZE,
+    ) -> List[str]:
+        """Same as `add_documents` for large ingests, written in batches of `batch_size` documents.
+
+        Each batch is embedded, streamed with a binary `COPY` into a temporary table and merged into the embeddings
+        in a transaction of its own, so memory and locks stay bounded by the batch size. A failed ingest leaves the
+        previous batches written, and can be run again with the same `ids`. psycopg copies in binary, psycopg2 in
+        CSV with `copy_expert`, and other drivers fall back to batched inserts. The throughput is recorded in
+        `ingest_stats`.
+        """
+        assert not self._async_engine, "This method must be called with sync_mode"
+        if ids is None:
+            ids = [str(uuid4()) for _ in documents]
+        with self._make_sync_session() as session:  # type: ignore[arg-type]
+            cached = collection_name in self._collection_ids
+            collection_id = self._collection_id(collection_name, session)
+
+        for start, batch_ids, batch_documents, batch_metadatas in self._batches(ids, documents, metadatas, batch_size):
+            if embeddings is None:
+                batch_embeddings = self.embedder.embed_documents(list(batch_documents))
+            else:
+                batch_embeddings = embeddings[start : start + batch_size]
+            started_at = time.perf_counter()
+            rows = list(zip(batch_ids, batch_embeddings, batch_documents, batch_metadatas))
+            if self._engine.dialect.driver in ("psycopg", "psycopg2"):
+                try:
+                    self._copy_batch(collection_id, rows)
+                except IntegrityError:
+                    if not cached:
+                        raise
+                    cached = False
+                    with self._make_sync_session() as session:  # type: ignore[arg-type]
+                        collection_id = self._refresh_collection_id(collection_name, session)
+                    self._copy_batch(collection_id, rows)
+            else:
+                self.add_documents(
+                    collection_name, batch_documents, batch_metadatas, ids=batch_ids, embeddings=batch_embeddings
+                )
+            self.ingest_stats.record(len(batch_ids), time.perf_counter() - started_at)
+        return ids
+
+    def _copy_batch(self, collection_id: Any, rows: List[tuple]) -> None:
+        """Copy (id, embedding, document, metadata) rows into the ingest table and merge them, with psycopg or
+        psycopg2."""
+        psycopg2 = self._engine.dialect.driver == "psycopg2"
+        create, merge, copy_statement = self._ingest_statements("CSV" if psycopg2 else "BINARY")
+        with self._engine.begin() as connection:
+            connection.execute(create)
+            with connection.connection.driver_connection.cursor() as cursor:
+                if psycopg2:
+                    cursor.copy_expert(copy_statement, self._csv_rows(collection_id, rows))
+                else:
+                    with cursor.copy(copy_statement) as copy:
+                        copy.set_types(INGEST_TYPES)
+                        for id, embedding, document, metadata in rows:
+                            copy.write_row((id, collection_id, embedding, document, metadata or {}))
+            connection.execute(merge)
+
+    @staticmethod
+    def _csv_rows(collection_id: Any, rows: List[tuple]) -> io.StringIO:
+        """Rows in the CSV format of `COPY`, for drivers without binary copy."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+        for id, embedding, document, metadata in rows:
+            vector = "{" + ",".join(str(float(value)) for value in embedding) + "}"
+            writer.writerow((id, collection_id, vector, document, json.dumps(metadata or {})))
+        buffer.seek(0)
+        return buffer
+
+    async def abulk_add_documents(
+        self,
+        collection_name: str,
+        documents: Sequence[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        embeddings: Optional[List[List[float]]] = None,
+        batch_size: int = DEFAULT_INGEST_BATCH_SIZE,
+    ) -> List[str]:
+        """Same as `bulk_add_documents`, copying with asyncpg `copy_records_to_table` or psycopg `COPY`."""
+        await self.__apost_init__()  # Lazy async init
+        if ids is None:
+            ids = [str(uuid4()) for _ in documents]
+        async with self._make_async_session() as session:  # type: ignore[arg-type]
+            cached = collection_name in self._collection_ids
+            collection_id = await self._acollection_id(collection_name, session)
+
+        for start, batch_ids, batch_documents, batch_metadatas in self._batches(ids, documents, metadatas, batch_size):
+            if embeddings is None:
+                batch_embeddings = await self.embedder.aembed_documents(list(batch_documents))
+            else:
+                batch_embeddings = embeddings[start : start + batch_size]
+            started_at = time.perf_counter()
+            rows = list(zip(batch_ids, batch_embeddings, batch_documents, batch_metadatas))
+            if self._async_engine.dialect.driver in ("asyncpg", "psycopg"):
+                try:
+                    await self._acopy_batch(collection_id, rows)
+                except IntegrityError:
+                    if not cached:
+                        raise
+                    cached = False
+                    async with self._make_async_session() as session:  # type: ignore[arg-type]
+                        collection_id = await self._arefresh_collection_id(collection_name, session)
+                    await self._acopy_batch(collection_id, rows)
+            else:
+                await self.aadd_documents(
+                    collection_name, batch_documents, batch_metadatas, ids=batch_ids, embeddings=batch_embeddings
+                )
+            self.ingest_stats.record(len(batch_ids), time.perf_counter() - started_at)
+        return ids
+
+    async def _acopy_batch(self, collection_id: Any, rows: List[tuple]) -> None:
+        """Same as `_copy_batch`, with asyncpg `copy_records_to_table` or psycopg `COPY`."""
+        create, merge, copy_statement = self._ingest_statements()
+        async with self._async_engine.begin() as connection:
+            await connection.execute(create)
+            raw = (await connection.get_raw_connection()).driver_connection
+            if self._async_engine.dialect.driver == "asyncpg":
+                await raw.copy_records_to_table(
+                    INGEST_TABLE,
+                    records=[(id, collection_id, e, doc, json.dumps(meta or {})) for id, e, doc, meta in rows],
+                    columns=INGEST_COLUMNS,
+                )
+            else:
+                async with raw.cursor() as cursor:
+                    async with cursor.copy(copy_statement) as copy:
+                        copy.set_types(INGEST_TYPES)
+                        for id, embedding, document, metadata in rows:
+                            await copy.write_row((id, collection_id, embedding, document, metadata or {}))
+            await connection.execute(merge)
+
+    async def aadd_documents_stream(
+        self,
+        collection_name: str,
+        documents: AsyncIterable[Union[str, Tuple[str, dict]]],
+        *,
+        chunk_size: int = 500,
+        max_in_flight: int = 2,
+        on_chunk: Optional[Callable[[ChunkProgress], Any]] = None,
+        stop_on_error: bool = False,
+    ) -> StreamIngestResult:
+        """Add documents to a collection as they come, from an iterable of texts or (text, metadata) tuples.
+
+        Documents are read in chunks of `chunk_size`. A chunk is embedded while the previous ones are written with
+        `abulk_add_documents`, and at most `max_in_flight` embedded chunks wait for their write, so memory stays
+        bounded however many documents are streamed.
+
+        Args:
+            on_chunk: Called, or awaited if it is a coroutine function, with the `ChunkProgress` of each chunk once
+                it is written or failed.
+            stop_on_error: Raise the error of the first failed chunk, instead of reporting it and going on.
+        """
+        if chunk_size < 1 or max_in_flight < 1:
+            raise ValueError(f"Chunk size and max in flight must be at least 1, got {chunk_size} and {max_in_flight}.")
+        await self.__apost_init__()  # Lazy async init
+        result = StreamIngestResult()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max_in_flight)
+
+        async def report(progress: ChunkProgress) -> None:
+            result.record(progress)
+            if on_chunk is not None:
+                outcome = on_chunk(progress)
+                if inspect.isawaitable(outcome):
+                    await outcome
+            if progress.error is not None and stop_on_error:
+                raise progress.error
+
+        async def write() -> None:
+            while (item := await queue.get()) is not None:
+                progress, texts, metadatas, embeddings = item
+                started_at = time.perf_counter()
+                try:
+                    await self.abulk_add_documents(
+                        collection_name,
+                        texts,
+                        metadatas,
+                        ids=progress.ids,
+                        embeddings=embeddings,
+                        batch_size=chunk_size,
+                    )
+                except Exception as e:
+                    progress.error = e
+                progress.write_seconds = time.perf_counter() - started_at
+                await report(progress)
+
+        async def submit(item: Optional[tuple]) -> None:
+            # Waits for room in the window, unless the writer stopped on an error meanwhile
+            put = asyncio.ensure_future(queue.put(item))
+            await asyncio.wait({put, writer}, return_when=asyncio.FIRST_COMPLETED)
+            if not put.done():
+                put.cancel()
+                writer.result()
+
+        async def embed(index: int, chunk: List[Union[str, Tuple[str, dict]]]) -> None:
+            texts = [item if isinstance(item, str) else item[0] for item in chunk]
+            metadatas = [{} if isinstance(item, str) else item[1] for item in chunk]
+            progress = ChunkProgress(index, [str(uuid4()) for _ in chunk])
+            started_at = time.perf_counter()
+            try:
+                embeddings = await self.embedder.aembed_documents(texts)
+            except Exception as e:
+                progress.error = e
+            progress.embed_seconds = time.perf_counter() - started_at
+            if progress.error is not None:
+                await report(progress)
+            else:
+                await submit((progress, texts, metadatas, embeddings))
+
+        writer = asyncio.create_task(write())
+        try:
+            index, chunk = 0, []
+            async for item in documents:
+                chunk.append(item)
+                if len(chunk) == chunk_size:
+                    await embed(index, chunk)
+                    index, chunk = index + 1, []
+            if chunk:
+                await embed(index, chunk)
+            await submit(None)
+            await writer
+        finally:
+            if not writer.done():
+                writer.cancel()
+        return result
+
     def delete_documents(
         self,
         collection_name: str,
@@ -453,17 +1009,19 @@ class PGVector:
     ):
         assert not self._async_engine, "This method must be called with sync_mode"
         with self._make_sync_session() as session:  # type: ignore[arg-type]
-            collection = self.get_collection(collection_name, session)
-            if not collection:
-                raise ValueError("Collection not found")
-
-            filter_by = [self.Embedding.collection_id == collection.id]
+            filter_by = []
             if filter:
                 filter_clauses = self._create_filter_clause(filter)
                 if filter_clauses is not None:
                     filter_by.append(filter_clauses)
 
-            session.query(self.Embedding).filter(*filter_by).delete(synchronize_session=False)
+            deleted = (
+                session.query(self.Embedding)
+                .filter(self._collection_clause(collection_name), *filter_by)
+                .delete(synchronize_session=False)
+            )
+            if not deleted:
+                self._check_collection(collection_name, session)
             session.commit()
 
     async def adelete_documents(
@@ -473,17 +1031,17 @@ class PGVector:
     ):
         await self.__apost_init__()  # Lazy async init
         async with self._make_async_session() as session:
-            collection = await self.aget_collection(collection_name, session)
-            if not collection:
-                raise ValueError("Collection not found")
-
-            filter_by = [self.Embedding.collection_id == collection.id]
+            filter_by = []
             if filter:
                 filter_clauses = self._create_filter_clause(filter)
                 if filter_clauses is not None:
                     filter_by.append(filter_clauses)
 
-            await session.execute(delete(self.Embedding).where(*filter_by))
+            result = await session.execute(
+                delete(self.Embedding).where(self._collection_clause(collection_name), *filter_by)
+            )
+            if not result.rowcount:
+                await self._acheck_collection(collection_name, session)
             await session.commit()
 
     def similarity_search(
@@ -494,15 +1052,47 @@ class PGVector:
         filter: Optional[dict] = None,
         *,
         distance_strategy: Optional[DistanceStrategy] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
     ):
+        """The `k` embeddings of a collection closest to `query`, as (embedding, distance) rows.
+
+        `ef_search` (HNSW) and `probes` (IVFFlat) set how much of an index is scanned for this query only, trading
+        speed for recall, see `create_index`.
+        """
         assert not self._async_engine, "This method must be called without async_mode"
         embedding = self.embedder.embed_query(text=query)
+        return self.similarity_search_by_vector(
+            collection_name,
+            embedding,
+            k,
+            filter,
+            distance_strategy=distance_strategy,
+            ef_search=ef_search,
+            probes=probes,
+        )
+
+    def similarity_search_by_vector(
+        self,
+        collection_name: str,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[dict] = None,
+        *,
+        distance_strategy: Optional[DistanceStrategy] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+    ):
+        """Same as `similarity_search`, with a query already embedded."""
+        assert not self._async_engine, "This method must be called without async_mode"
         results = self.__query_collection(
             collection_name=collection_name,
             embedding=embedding,
             k=k,
             filter=filter,
             distance_strategy=distance_strategy,
+            ef_search=ef_search,
+            probes=probes,
         )
         return results
 
@@ -514,15 +1104,42 @@ class PGVector:
         filter: Optional[dict] = None,
         *,
         distance_strategy: Optional[DistanceStrategy] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
     ):
         await self.__apost_init__()  # Lazy async init
         embedding = self.embedder.embed_query(text=query)
+        return await self.asimilarity_search_by_vector(
+            collection_name,
+            embedding,
+            k,
+            filter,
+            distance_strategy=distance_strategy,
+            ef_search=ef_search,
+            probes=probes,
+        )
+
+    async def asimilarity_search_by_vector(
+        self,
+        collection_name: str,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[dict] = None,
+        *,
+        distance_strategy: Optional[DistanceStrategy] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+    ):
+        """Same as `asimilarity_search`, with a query already embedded."""
+        await self.__apost_init__()  # Lazy async init
         results = await self.__aquery_collection(
             collection_name=collection_name,
             embedding=embedding,
             k=k,
             filter=filter,
             distance_strategy=distance_strategy,
+            ef_search=ef_search,
+            probes=probes,
         )
         return results
 
@@ -551,14 +1168,15 @@ class PGVector:
         filter: Optional[dict] = None,
         *,
         distance_strategy: Optional[DistanceStrategy] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
     ):
         """Query the collection."""
         with self._make_sync_session() as session:  # type: ignore[arg-type]
-            collection = self.get_collection(collection_name, session)
-            if not collection:
-                raise ValueError("Collection not found")
+            for setting in self._search_settings(ef_search, probes):
+                session.execute(setting)
 
-            filter_by = [self.Embedding.collection_id == collection.id]
+            filter_by = []
             if filter:
                 filter_clauses = self._create_filter_clause(filter)
                 if filter_clauses is not None:
@@ -569,12 +1187,15 @@ class PGVector:
             )
             results: Sequence[Any] = (
                 session.query(self.Embedding, distance_func(embedding).label("distance"))
-                .filter(*filter_by)
+                .filter(self._collection_clause(collection_name), *filter_by)
                 .order_by(sqlalchemy.asc("distance"))
-                .join(self.Collection, self.Embedding.collection_id == self.Collection.id)
                 .limit(k)
                 .all()
             )
+            if results:
+                self._collection_ids.setdefault(collection_name, results[0][0].collection_id)
+            else:
+                self._check_collection(collection_name, session)
 
             return results
 
@@ -586,14 +1207,15 @@ class PGVector:
         filter: Optional[dict] = None,
         *,
         distance_strategy: Optional[DistanceStrategy] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
     ):
         """Query the collection."""
         async with self._make_async_session() as session:
-            collection = await self.aget_collection(collection_name, session)
-            if not collection:
-                raise ValueError("Collection not found")
+            for setting in self._search_settings(ef_search, probes):
+                await session.execute(setting)
 
-            filter_by = [self.Embedding.collection_id == collection.id]
+            filter_by = []
             if filter:
                 filter_clauses = self._create_filter_clause(filter)
                 if filter_clauses is not None:
@@ -604,12 +1226,15 @@ class PGVector:
             )
             stmt = (
                 select(self.Embedding, distance_func(embedding).label("distance"))
-                .filter(*filter_by)
+                .filter(self._collection_clause(collection_name), *filter_by)
                 .order_by(sqlalchemy.asc("distance"))
-                .join(self.Collection, self.Embedding.collection_id == self.Collection.id)
                 .limit(k)
             )
             results: Sequence[Any] = (await session.execute(stmt)).all()
+            if results:
+                self._collection_ids.setdefault(collection_name, results[0][0].collection_id)
+            else:
+                await self._acheck_collection(collection_name, session)
 
             return results
 
@@ -1,15 +1,22 @@
 import glob
+import hashlib
 import importlib
 import os
 import sys
 import traceback
 from inspect import getmembers
 from pathlib import Path
-from typing import Any
+from types import ModuleType
+from typing import Any, Iterable, Optional, Union
 
 from aisync.engines.graph import Graph, Hook, Node, SupportedHook
 from aisync.log import LogEngine
-from aisync.utils import get_suit_name
+from aisync.manifest import ManifestEntry, SuitManifest, get_manifest_path, hash_file
+from aisync.module_graph import ModuleDependencyGraph, find_imports
+from aisync.profiling import ImportProfiler, ImportTiming
+from aisync.utils import get_registry_dir, get_suit_name
+
+_KINDS = ("hooks", "nodes", "graphs")
 
 
 class Suit:
@@ -24,9 +31,12 @@ class Suit:
         if not self._path.exists():
             raise ValueError(f"Path '{path_to_suit}' does not exist or is not a directory.")
         self._name = get_suit_name(path_to_suit)
+        self._manifest_path = get_manifest_path(self._name)
         self._hooks: dict[SupportedHook, Hook] = {}
         self._nodes: dict[str, Node] = {}
         self._graphs: dict[str, Graph] = {}
+        self._import_timings: list[ImportTiming] = []
+        self._active = False
 
     @staticmethod
     def _is_hook(member):
@@ -41,60 +51,234 @@ class Suit:
         return isinstance(member, Graph)
 
     def _get_decorated_fn(self):
-        hooks = {}
-        nodes = {}
-        graphs = {}
+        """Collect the hooks, nodes and graphs of the suit.
+
+        The suit manifest records, for every file, what it defines, what it imports along with its mtime and
+        content hash. Unchanged files that define nothing are skipped entirely, unchanged modules that are already
+        imported are reused as-is, and only new or modified files and the modules importing them are reloaded.
+        """
+        manifest = SuitManifest.load(self._manifest_path)
+        entries: dict[str, ManifestEntry] = {}
+        changed: set[str] = set()
+        for relative_path, (abs_path, module_path) in self._find_modules().items():
+            entry = self._get_fresh_entry(manifest.files.get(relative_path), abs_path, module_path)
+            if entry is None:
+                entry = self._make_entry(abs_path, module_path)
+                changed.add(module_path)
+            entries[relative_path] = entry
+        return self._refresh(manifest, entries, changed)[:3]
 
+    def _find_modules(self) -> dict[str, tuple[Path, str]]:
+        """Map each python file of the suit, relative to the registry directory, to its path and module name."""
         if self._path.is_dir():
             pattern = os.path.join(self._path, "**/*.py")
             py_files = glob.glob(pattern, recursive=True)
         else:
             py_files = [str(self._path)]
 
-        home_dir = os.path.expanduser("~")
-        registry_dir = os.path.join(home_dir, ".aisync")
+        registry_dir = get_registry_dir()
+        modules = {}
+        for py_file in py_files:
+            abs_path = Path(py_file).resolve()
+            relative_path = abs_path.relative_to(registry_dir)  # suits/mark_i/nodes.py
+            file_stem = os.path.splitext(relative_path)[0]  # suits/mark_i/nodes
+            module_path = file_stem.replace(os.sep, ".")
+            modules[str(relative_path)] = (abs_path, module_path)
+        return modules
+
+    def _refresh(
+        self, manifest: SuitManifest, entries: dict[str, ManifestEntry], changed: set[str]
+    ) -> tuple[dict, dict, dict, list[str]]:
+        """Reload changed modules and their transitive dependents, then collect the suit's definitions.
+
+        Args:
+            manifest: The manifest as last saved on disk.
+            entries: The current files of the suit. Entries of changed modules have no definitions yet.
+            changed: Modules that were added, modified or deleted.
+
+        Returns:
+            The hooks, nodes and graphs of the suit, and the modules that were (re)loaded in order.
+        """
+        hooks = {}
+        nodes = {}
+        graphs = {}
+
+        # Deleted modules stay in the graph so their dependents are reloaded too
+        imports = {entry.module: entry.imports for entry in manifest.files.values()}
+        imports.update({entry.module: entry.imports for entry in entries.values()})
+        dependency_graph = ModuleDependencyGraph(imports)
+
+        relative_paths = {entry.module: relative_path for relative_path, entry in entries.items()}
+        to_reload = {
+            module
+            for module in dependency_graph.dependents(changed)
+            if module in relative_paths and (module in changed or module in sys.modules)
+        }
+        reload_order = dependency_graph.topological_order(to_reload)
+
+        scanned: dict[str, tuple[dict, dict, dict]] = {}
         # Add the suits directory to the system path
-        sys.path.insert(0, str(registry_dir))
+        sys.path.insert(0, str(get_registry_dir()))
         try:
-            for py_file in py_files:
-                abs_path = Path(py_file).resolve()
-                relative_path = abs_path.relative_to(registry_dir)  # aisync/suits/mark_i/nodes.py
-                file_stem = os.path.splitext(relative_path)[0]  # aisync/suits/mark_i/nodes
-                module_path = file_stem.replace(os.sep, ".")
-                try:
-                    # suit_module = importlib.import_module(module_path)
-                    if module_path in sys.modules:
-                        # Reload the module if it exists
-                        suit_module = importlib.reload(sys.modules[module_path])
-                    else:
-                        # Import it for the first time
-                        suit_module = importlib.import_module(module_path)
-
-                    # find hooks
-                    new_hooks = {hook_fn[0]: hook_fn[1] for hook_fn in getmembers(suit_module, self._is_hook)}
-                    self.update_registry(hooks, new_hooks, "hook")
-
-                    # find nodes
-                    new_nodes = {node_fn[0]: node_fn[1] for node_fn in getmembers(suit_module, self._is_node)}
-                    self.update_registry(nodes, new_nodes, "node")
-
-                    # find graph
-                    new_graphs = {graph_fn[0]: graph_fn[1] for graph_fn in getmembers(suit_module, self._is_graph)}
-                    self.update_registry(graphs, new_graphs, "graph")
-
-                except ModuleNotFoundError as e:
-                    self.log.error(f"Failed to import '{module_path}': {e}")
-                    raise e
-                except Exception as e:
-                    self.log.error(f"Failed to import {module_path}: {e}")
-                    self.log.error(traceback.format_exc())
-                    raise e
-        except Exception as e:
-            raise e
+            for module_path in reload_order:
+                suit_module = self._load_module(module_path, reload=module_path in sys.modules)
+                scanned[module_path] = self._scan(suit_module)
+
+            for relative_path, entry in entries.items():
+                if entry.module in scanned:
+                    new_items = scanned[entry.module]
+                    entry = entry.model_copy(update={key: list(items) for key, items in zip(_KINDS, new_items)})
+                    entries[relative_path] = entry
+                elif entry.is_empty:
+                    # Nothing to collect, the module is imported on demand by the ones that need it
+                    continue
+                else:
+                    suit_module = sys.modules.get(entry.module) or self._load_module(entry.module, reload=False)
+                    new_items = self._collect_indexed(suit_module, entry)
+                    if new_items is None:
+                        # The index is stale, scan all of its members again
+                        suit_module = self._load_module(entry.module, reload=True)
+                        new_items = self._scan(suit_module)
+                        entries[relative_path] = entry.model_copy(
+                            update={key: list(items) for key, items in zip(_KINDS, new_items)}
+                        )
+                        reload_order.append(entry.module)
+
+                new_hooks, new_nodes, new_graphs = new_items
+                self.update_registry(hooks, new_hooks, "hook")
+                self.update_registry(nodes, new_nodes, "node")
+                self.update_registry(graphs, new_graphs, "graph")
         finally:
             sys.path.pop(0)
+
+        if entries != manifest.files:
+            manifest.files = entries
+            try:
+                manifest.save(self._manifest_path)
+            except OSError as e:
+                self.log.warning(f"Failed to save manifest of suit {self.name}: {e}")
+        return hooks, nodes, graphs, reload_order
+
+    def _load_module(self, module_path: str, *, reload: bool) -> ModuleType:
+        try:
+            if reload:
+                # Reload the module if it exists
+                return importlib.reload(sys.modules[module_path])
+            # Import it for the first time
+            return importlib.import_module(module_path)
+        except ModuleNotFoundError as e:
+            self.log.error(f"Failed to import '{module_path}': {e}")
+            raise e
+        except Exception as e:
+            self.log.error(f"Failed to import {module_path}: {e}")
+            self.log.error(traceback.format_exc())
+            raise e
+
+    def _get_fresh_entry(
+        self, entry: Optional[ManifestEntry], abs_path: Path, module_path: str
+    ) -> Optional[ManifestEntry]:
+        """Return the manifest entry of a file if it is still valid, otherwise None.
+
+        The stat is checked first, the content hash only when the stat changed (e.g. the file was touched).
+        """
+        if entry is None or entry.module != module_path:
+            return None
+        stat = abs_path.stat()
+        if entry.is_fresh(stat):
+            return entry
+        if entry.size == stat.st_size and hash_file(abs_path) == entry.sha256:
+            return entry.model_copy(update={"mtime_ns": stat.st_mtime_ns})
+        return None
+
+    def _make_entry(self, abs_path: Path, module_path: str) -> ManifestEntry:
+        """Index a new or modified file. Its definitions are filled in once it is imported."""
+        stat = abs_path.stat()
+        with open(abs_path, "rb") as f:
+            source = f.read()
+        return ManifestEntry(
+            module=module_path,
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            sha256=hashlib.sha256(source).hexdigest(),
+            imports=find_imports(source, module_path),
+        )
+
+    def _scan(self, suit_module: ModuleType) -> tuple[dict, dict, dict]:
+        """Find hooks, nodes and graphs among all members of a module."""
+        hooks = {hook_fn[0]: hook_fn[1] for hook_fn in getmembers(suit_module, self._is_hook)}
+        nodes = {node_fn[0]: node_fn[1] for node_fn in getmembers(suit_module, self._is_node)}
+        graphs = {graph_fn[0]: graph_fn[1] for graph_fn in getmembers(suit_module, self._is_graph)}
         return hooks, nodes, graphs
 
+    def _collect_indexed(self, suit_module: ModuleType, entry: ManifestEntry) -> Optional[tuple[dict, dict, dict]]:
+        """Fetch the members listed in the manifest, or None if the module no longer matches it."""
+        collected = []
+        for names, predicate in (
+            (entry.hooks, self._is_hook),
+            (entry.nodes, self._is_node),
+            (entry.graphs, self._is_graph),
+        ):
+            items = {}
+            for name in names:
+                member = getattr(suit_module, name, None)
+                if not predicate(member):
+                    return None
+                items[name] = member
+            collected.append(items)
+        return tuple(collected)
+
+    def reload(self, paths: Iterable[Union[str, Path]]) -> list[str]:
+        """Hot reload changed files of the suit.
+
+        Only the modules of the given files and the modules transitively importing them are reloaded, in
+        dependency order. The hooks, nodes and graphs registries are then patched in place.
+
+        Args:
+            paths: Files that were added, modified or deleted.
+
+        Returns:
+            The names of the reloaded modules, in the order they were reloaded.
+        """
+        if not self._active:
+            self.activate()
+            return []
+
+        manifest = SuitManifest.load(self._manifest_path)
+        entries = dict(manifest.files)
+        changed: set[str] = set()
+        registry_dir = Path(get_registry_dir())
+        suit_path = self._path.resolve()
+        for path in paths:
+            abs_path = Path(path).resolve()
+            if abs_path.suffix != ".py" or (abs_path != suit_path and suit_path not in abs_path.parents):
+                continue
+            relative_path = str(abs_path.relative_to(registry_dir))
+            module_path = os.path.splitext(relative_path)[0].replace(os.sep, ".")
+            if abs_path.exists():
+                entries[relative_path] = self._make_entry(abs_path, module_path)
+            else:
+                entries.pop(relative_path, None)
+                sys.modules.pop(module_path, None)
+            changed.add(module_path)
+
+        if not changed:
+            return []
+
+        hooks, nodes, graphs, reloaded = self._refresh(manifest, entries, changed)
+        for registry, new_items in ((self._hooks, hooks), (self._nodes, nodes), (self._graphs, graphs)):
+            self._patch_registry(registry, new_items)
+        self.log.info(f"Reloaded {len(reloaded)} module(s) of suit {self.name}: {reloaded}")
+        return reloaded
+
+    @staticmethod
+    def _patch_registry(registry: dict, new_items: dict) -> None:
+        """Update a registry in place, keeping the entries whose object did not change."""
+        for name in registry.keys() - new_items.keys():
+            del registry[name]
+        for name, item in new_items.items():
+            if registry.get(name) is not item:
+                registry[name] = item
+
     def update_registry(self, registry: dict, new_items: dict, item_type: str):
         """Update the registry with new items and check for duplicates."""
         duplicate_items = set(registry.keys()) & set(new_items.keys())
@@ -102,12 +286,22 @@ class Suit:
             self.log.warning(f"Duplicate {item_type} detected: {duplicate_items}")
         registry.update(new_items)
 
-    def activate(self):
-        self._hooks, self._nodes, self._graphs = self._get_decorated_fn()
+    def activate(self, *, profile_imports: bool = False):
+        """Activate the suit.
+
+        Args:
+            profile_imports: Record how long each module imported during activation takes, see `import_timings`.
+        """
+        if not profile_imports:
+            self._hooks, self._nodes, self._graphs = self._get_decorated_fn()
+        else:
+            with ImportProfiler() as profiler:
+                self._hooks, self._nodes, self._graphs = self._get_decorated_fn()
+            self._import_timings = profiler.timings
         self._active = True
 
     def deactivate(self):
-        self._hook = {}
+        self._hooks = {}
         self._nodes = {}
         self._graphs = {}
         self._active = False
@@ -146,3 +340,8 @@ class Suit:
     @property
     def graphs(self):
         return self._graphs
+
+    @property
+    def import_timings(self) -> list[ImportTiming]:
+        """Import times recorded by the last `activate(profile_imports=True)`."""
+        return self._import_timings
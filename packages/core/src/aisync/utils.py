@@ -1,7 +1,9 @@
+import json
 import os
-from functools import wraps
+import tempfile
+from functools import reduce, wraps
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional, Tuple, Type, TypeVar, Union
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Type, TypeVar, Union
 
 
 def get_project_root(
@@ -44,6 +46,71 @@ def get_suit_name(path_to_suit: str) -> str:
     return path.name if path.is_dir() else path.stem
 
 
+def dump_json_atomic(path: str, data: Any) -> None:
+    """
+    Write `data` as JSON to `path` atomically, so a concurrent reader never sees a partial file.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def dict_deep_extend(*dicts: dict[Any, Any]) -> dict[Any, Any]:
+    """
+    Deeply merge multiple dictionaries.
+    Later dictionaries take precedence over earlier ones.
+
+    Args:
+        *dicts: An arbitrary number of dictionaries to merge.
+
+    Returns:
+        A new dictionary resulting from deep merging the input dictionaries.
+
+    Raises:
+        TypeError: If any of the arguments is not a dictionary.
+    """
+
+    def merge(a: dict[Any, Any], b: dict[Any, Any]) -> dict[Any, Any]:
+        """
+        Recursively merge dictionary b into dictionary a.
+
+        Args:
+            a: The base dictionary.
+            b: The dictionary to merge into a.
+
+        Returns:
+            The merged dictionary.
+        """
+        for key, b_value in b.items():
+            if key in a:
+                a_value = a[key]
+                if isinstance(a_value, Mapping) and isinstance(b_value, Mapping):
+                    a[key] = merge(a_value.copy(), b_value)
+                else:
+                    a[key] = b_value
+            else:
+                a[key] = b_value
+        return a
+
+    if not dicts:
+        return {}
+
+    # Validate all inputs are dictionaries
+    for idx, d in enumerate(dicts, start=1):
+        if not isinstance(d, Mapping):
+            raise TypeError(f"Argument {idx} is not a dictionary: {d!r}")
+
+    return reduce(merge, dicts, {})
+
+
 # Design Patterns
 
 T = TypeVar("T")
@@ -0,0 +1,57 @@
+import json
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture
+def registry_home(tmp_path, monkeypatch) -> Path:
+    """A home directory of its own, so the registry of the test is `<home>/.aisync`."""
+    home = tmp_path / "home"
+    home.mkdir()
+    monkeypatch.setenv("HOME", str(home))
+    return home
+
+
+@pytest.fixture
+def armory(registry_home):
+    from aisync.armory import Armory
+
+    return Armory()
+
+
+@pytest.fixture
+def suit_repo(tmp_path):
+    """Factory of local bare repositories holding a suit, committed on `main`.
+
+    Returns a function taking the suit name and its files (path -> content) and returning the path of the bare
+    repository, and the commit of `main`. Calling it again with the same name commits the new files on top.
+    """
+    from git import Actor, Repo
+
+    author = Actor("aisync", "aisync@example.com")
+    repos = {}
+
+    def commit(name: str, files: dict[str, str]) -> tuple[str, str]:
+        if name not in repos:
+            work_dir = tmp_path / "work" / name
+            bare_dir = tmp_path / "remotes" / f"{name}.git"
+            Repo.init(bare_dir, bare=True, initial_branch="main")
+            work = Repo.init(work_dir, initial_branch="main")
+            work.create_remote("origin", str(bare_dir))
+            repos[name] = (work, bare_dir)
+        work, bare_dir = repos[name]
+        files = {
+            "suit.json": json.dumps({"name": name, "version": "0.1.0", "description": "", "author": "aisync"}),
+            **files,
+        }
+        for path, content in files.items():
+            file_path = Path(work.working_dir) / path
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_text(content)
+        work.index.add(list(files))
+        hexsha = work.index.commit(f"Update {name}", author=author, committer=author).hexsha
+        work.remote("origin").push("main:main")
+        return str(bare_dir), hexsha
+
+    return commit
@@ -0,0 +1,80 @@
+import asyncio
+import os
+import subprocess
+
+import pytest
+
+
+def _leftovers(directory: str) -> list[str]:
+    return [name for name in os.listdir(directory) if name.startswith((".staging-", ".trash-"))]
+
+
+def test_clone_is_shallow(armory, suit_repo, tmp_path):
+    suit_repo("mark_t", {"__init__.py": "VERSION = 1\n"})
+    url, head = suit_repo("mark_t", {"__init__.py": "VERSION = 2\n"})
+
+    destination = str(tmp_path / "clone")
+    assert armory._clone(url, "main", destination) == head
+    count = subprocess.run(
+        ["git", "rev-list", "--count", "HEAD"], cwd=destination, capture_output=True, text=True, check=True
+    )
+    assert count.stdout.strip() == "1"
+
+
+def test_install_from_bare_repository(armory, suit_repo):
+    url, head = suit_repo("mark_t", {"__init__.py": "VERSION = 1\n", "nodes/echo.py": "def echo(x):\n    return x\n"})
+
+    metadata = asyncio.run(armory.ainstall_from_github(url))
+
+    assert metadata is not None and metadata.commit == head
+    suit_dir = os.path.join(armory.suits_dir, "mark_t")
+    with open(os.path.join(suit_dir, "nodes", "echo.py")) as f:
+        assert "def echo" in f.read()
+    assert "mark_t" in armory.suits
+    assert _leftovers(armory.suits_dir) == []
+    assert os.listdir(armory.tmp_dir) == []
+
+
+def test_reinstall_replaces_the_suit_atomically(armory, suit_repo):
+    suit_repo("mark_t", {"__init__.py": "VERSION = 1\n"})
+    url, _ = suit_repo("mark_t", {"__init__.py": "VERSION = 1\n"})
+    asyncio.run(armory.ainstall_from_github(url))
+    url, head = suit_repo("mark_t", {"__init__.py": "VERSION = 2\n"})
+
+    metadata = asyncio.run(armory.ainstall_from_github(url))
+
+    assert metadata.commit == head
+    with open(os.path.join(armory.suits_dir, "mark_t", "__init__.py")) as f:
+        assert f.read() == "VERSION = 2\n"
+    assert _leftovers(armory.suits_dir) == []
+
+
+def test_failed_swap_keeps_the_installed_suit(armory, suit_repo, monkeypatch):
+    url, _ = suit_repo("mark_t", {"__init__.py": "VERSION = 1\n"})
+    asyncio.run(armory.ainstall_from_github(url))
+    suit_repo("mark_t", {"__init__.py": "VERSION = 2\n"})
+    replace = os.replace
+
+    def failing_replace(src, dst):
+        if os.path.basename(str(src)).startswith(".staging-"):
+            raise OSError("disk full")
+        return replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", failing_replace)
+    with pytest.raises(OSError):
+        asyncio.run(armory._ainstall(url))
+    monkeypatch.undo()
+
+    with open(os.path.join(armory.suits_dir, "mark_t", "__init__.py")) as f:
+        assert f.read() == "VERSION = 1\n"
+    assert _leftovers(armory.suits_dir) == []
+
+
+def test_install_rejects_a_repository_without_suit(armory, tmp_path):
+    from git import Repo
+
+    bare_dir = tmp_path / "empty.git"
+    Repo.init(bare_dir, bare=True, initial_branch="main")
+
+    assert asyncio.run(armory.ainstall_from_github(str(bare_dir))) is None
+    assert os.listdir(armory.tmp_dir) == []
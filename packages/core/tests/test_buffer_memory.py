@@ -0,0 +1,89 @@
+import random
+
+import pytest
+
+from aisync.engines.memory.buffer_memory import SUMMARY_SENDER, BufferMemory
+
+
+def _last_within(messages: list[tuple[str, str]], max_tokens: int) -> list[tuple[str, str]]:
+    """The last messages within `max_tokens`, one token per character, computed from scratch."""
+    window, tokens = [], 0
+    for sender, message in reversed(messages):
+        if tokens + len(message) > max_tokens:
+            break
+        window.insert(0, (sender, message))
+        tokens += len(message)
+    return window
+
+
+def test_windows_follow_the_ring_buffer():
+    rng = random.Random(0)
+    memory = BufferMemory(memory_size=8, token_counter=len)
+    saved = []
+    budgets = [0, 1, 5, 12, 30, 1000]
+
+    for i in range(200):
+        message = "x" * rng.randint(0, 9)
+        memory.save_message("user" if i % 2 else "assistant", message)
+        saved.append(("user" if i % 2 else "assistant", message))
+        # Only some windows are used after each message, the others have to catch up later
+        for max_tokens in rng.sample(budgets, 2):
+            expected = _last_within(saved[-8:], max_tokens)
+            assert memory.format_buffer_memory(max_tokens=max_tokens) == expected
+            assert memory.sequence_within(max_tokens) == len(saved) - len(expected)
+
+    assert memory.format_buffer_memory() == saved[-8:]
+    assert memory.first_sequence == len(saved) - 8
+    assert memory.token_count == sum(len(message) for _, message in saved[-8:])
+
+
+def test_message_larger_than_the_budget_empties_the_window():
+    memory = BufferMemory(memory_size=4, token_counter=len)
+    memory.save_message("user", "abc")
+    assert memory.format_buffer_memory(max_tokens=3) == [("user", "abc")]
+
+    memory.save_message("assistant", "abcdef")
+
+    assert memory.format_buffer_memory(max_tokens=3) == []
+    assert memory.sequence_within(3) == 2
+
+
+def test_views_are_cached_until_the_buffer_changes():
+    memory = BufferMemory(memory_size=4, token_counter=len)
+    memory.save_message("user", "hello")
+    view = memory.format_buffer_memory(max_tokens=10)
+    assert memory.format_buffer_memory(max_tokens=10) is view
+
+    memory.save_message("assistant", "hi")
+
+    assert memory.format_buffer_memory(max_tokens=10) == [("user", "hello"), ("assistant", "hi")]
+    assert memory.format_buffer_memory_no_token(max_tokens=10) == "user: hello\nassistant: hi"
+
+
+def test_compact_replaces_the_oldest_messages_by_the_summary():
+    memory = BufferMemory(memory_size=8, token_counter=len)
+    for message in ["one", "two", "three", "four"]:
+        memory.save_message("user", message)
+    assert memory.format_buffer_memory(max_tokens=9) == [("user", "three"), ("user", "four")]
+
+    memory.compact("summary", until=memory.first_sequence + 2)
+    memory.save_message("user", "five")
+
+    assert memory.messages_before(memory.first_sequence + 1) == [{"sender": "user", "message": "three", "tokens": 5}]
+    assert memory.format_buffer_memory(max_tokens=9) == [
+        (SUMMARY_SENDER, "summary"),
+        ("user", "four"),
+        ("user", "five"),
+    ]
+    assert memory.format_buffer_memory() == [
+        (SUMMARY_SENDER, "summary"),
+        ("user", "three"),
+        ("user", "four"),
+        ("user", "five"),
+    ]
+    assert memory.token_count == len("threefourfive")
+
+
+def test_memory_size_must_be_positive():
+    with pytest.raises(ValueError):
+        BufferMemory(memory_size=0)
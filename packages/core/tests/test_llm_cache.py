@@ -0,0 +1,68 @@
+import itertools
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from aisync.engines.llms.cache import InMemoryResponseCache, make_request_key, with_response_cache
+from aisync.engines.llms.coalesce import SingleFlight, with_single_flight
+from aisync.engines.llms.fake import FakeChatModel
+from aisync.engines.llms.ratelimit import RateLimiter, with_rate_limit
+from aisync.engines.llms.telemetry import LLMTelemetry, with_telemetry
+
+
+class SerializableFakeChatModel(FakeChatModel):
+    """Keyed on its langchain serialization, like the provider models, rather than on its invocation params."""
+
+    @classmethod
+    def is_lc_serializable(cls) -> bool:
+        return True
+
+
+LAYERS = {
+    "telemetry": lambda llm: with_telemetry(llm, LLMTelemetry()),
+    "rate_limit": lambda llm: with_rate_limit(llm, RateLimiter()),
+    "single_flight": lambda llm: with_single_flight(llm, SingleFlight()),
+    "response_cache": lambda llm: with_response_cache(llm, InMemoryResponseCache()),
+}
+MESSAGES = [HumanMessage("Hello")]
+
+
+def _layer_sets():
+    for size in range(1, len(LAYERS) + 1):
+        yield from itertools.permutations(LAYERS, size)
+
+
+@pytest.mark.parametrize("model_cls", [FakeChatModel, SerializableFakeChatModel])
+@pytest.mark.parametrize("layers", list(_layer_sets()), ids="+".join)
+def test_request_key_does_not_depend_on_layers(model_cls, layers):
+    expected = make_request_key(model_cls(temperature=0), "generate", MESSAGES, None, {})
+
+    llm = model_cls(temperature=0)
+    for layer in layers:
+        llm = LAYERS[layer](llm)
+
+    assert type(llm).__name__ != model_cls.__name__
+    assert make_request_key(llm, "generate", MESSAGES, None, {}) == expected
+
+
+@pytest.mark.parametrize("model_cls", [FakeChatModel, SerializableFakeChatModel])
+def test_request_key_depends_on_the_request(model_cls):
+    llm = with_telemetry(model_cls(temperature=0), LLMTelemetry())
+    key = make_request_key(llm, "generate", MESSAGES, None, {})
+
+    assert make_request_key(llm, "stream", MESSAGES, None, {}) != key
+    assert make_request_key(llm, "generate", [HumanMessage("Bye")], None, {}) != key
+    assert make_request_key(llm, "generate", MESSAGES, ["\n"], {}) != key
+    assert make_request_key(model_cls(temperature=0.7), "generate", MESSAGES, None, {}) != key
+
+
+def test_cached_answer_survives_toggling_layers():
+    cache = InMemoryResponseCache()
+    llm = with_response_cache(SerializableFakeChatModel(time_to_first_token=0, tokens_per_second=0), cache)
+    first = llm.invoke(MESSAGES)
+
+    layered = with_telemetry(with_rate_limit(llm, RateLimiter()), LLMTelemetry())
+    second = layered.invoke(MESSAGES)
+
+    assert second.content == first.content
+    assert cache.stats.hits == 1 and cache.stats.writes == 1
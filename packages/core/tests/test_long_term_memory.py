@@ -0,0 +1,68 @@
+import pytest
+
+from aisync.engines.memory import LongTermMemory
+from aisync.stores import CollectionNotFoundError
+
+
+class FakeEmbedder:
+    def embed_documents(self, texts):
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text):
+        return [float(len(text))]
+
+
+class FakeVectorStore:
+    """Documents by id per collection, failing the first `failures` writes after storing them."""
+
+    def __init__(self, failures: int = 0):
+        self.embedder = FakeEmbedder()
+        self.collections: dict[str, dict] = {}
+        self.failures = failures
+
+    def create_collection(self, name, metadata=None):
+        self.collections.setdefault(name, {})
+
+    def add_documents(self, collection_name, documents, metadatas=None, *, ids=None, embeddings=None):
+        assert ids is not None
+        self.collections[collection_name].update(zip(ids, documents))
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("connection reset")
+        return ids
+
+    def similarity_search_by_vector(self, collection_name, embedding, k=4, filter=None):
+        if filter is not None and not isinstance(filter, dict):
+            raise ValueError(f"Invalid type: Expected a dictionary but got type: {type(filter)}")
+        if collection_name not in self.collections:
+            raise CollectionNotFoundError(f"Collection {collection_name} not found.")
+        return []
+
+
+@pytest.fixture
+def long_term():
+    # Flushed by the tests only
+    long_term = LongTermMemory(FakeVectorStore(failures=1), flush_interval=3600)
+    yield long_term
+    long_term._closed = True
+
+
+def test_retried_flush_writes_turns_once(long_term):
+    long_term._enqueue("user-1", "user", "My dog is called Rex", None)
+    long_term._enqueue("user-1", "assistant", "Nice name", None)
+
+    long_term.flush()
+    assert long_term.stats.write_errors == 1
+    long_term.flush()
+
+    assert long_term.stats.written == 2
+    assert sorted(long_term.vectorstore.collections["memory_user-1"].values()) == ["My dog is called Rex", "Nice name"]
+
+
+def test_recall_without_collection_is_empty(long_term):
+    assert long_term.recall("user-2", "What is my dog's name?") == []
+
+
+def test_recall_raises_invalid_filters(long_term):
+    with pytest.raises(ValueError, match="Invalid type"):
+        long_term.recall("user-2", "What is my dog's name?", filter=["sender"])
@@ -0,0 +1,160 @@
+import pytest
+
+from aisync.engines.memory import ConversationMemoryStore, SQLiteMemoryBackend
+
+
+@pytest.fixture
+def store(tmp_path):
+    # Flushed by the tests only
+    store = ConversationMemoryStore(
+        SQLiteMemoryBackend(str(tmp_path / "memory.sqlite")),
+        max_sessions=2,
+        shards=1,
+        flush_interval=3600,
+        flush_batch=10_000,
+    )
+    yield store
+    store.close()
+
+
+def _stored(store: ConversationMemoryStore, session_id: str) -> list[tuple]:
+    return store.backend.page(session_id, None, 100)
+
+
+def test_hot_sessions_are_bounded(store):
+    for session_id in ["a", "b", "c"]:
+        store.get(session_id).save_message("user", f"hello from {session_id}")
+
+    assert store.sessions == 2
+    assert store.stats.evictions == 1
+
+
+def test_evicted_memory_is_revived_on_save(store):
+    memory = store.get("a")
+    memory.save_message("user", "one")
+    store.get("b")
+    store.get("c")
+    assert memory._stale
+
+    memory.save_message("assistant", "two")
+
+    assert store.get("a") is memory
+    store.flush()
+    assert _stored(store, "a") == [(0, "user", "one"), (1, "assistant", "two")]
+
+
+def test_revived_memory_is_reloaded_if_written_since(store):
+    memory = store.get("a")
+    memory.save_message("user", "one")
+    store.get("b")
+    store.get("c")
+    # Loaded again and written to while the first memory was evicted, then evicted as well
+    other = store.get("a")
+    other.save_message("assistant", "two")
+    store.get("b")
+    store.get("c")
+
+    memory.save_message("user", "three")
+
+    assert memory.format_buffer_memory() == [("user", "one"), ("assistant", "two"), ("user", "three")]
+    store.flush()
+    assert [row[0] for row in _stored(store, "a")] == [0, 1, 2]
+
+
+def test_evicted_memory_loaded_again_cannot_be_revived(store):
+    memory = store.get("a")
+    store.get("b")
+    store.get("c")
+    store.get("a")
+
+    with pytest.raises(RuntimeError):
+        memory.save_message("user", "one")
+
+
+def test_conflicting_messages_are_dead_lettered(store):
+    memory = store.get("a")
+    store.get("b").save_message("user", "kept")
+    store.backend.append([("a", 0, "user", "written elsewhere", 0.0)])
+    memory.save_message("user", "conflicting")
+    memory.save_message("assistant", "after")
+
+    store.flush()
+    store.flush()
+
+    assert [row[1] for row in store.dead_letters] == [0]
+    assert store.stats.conflicts == 1
+    assert store.to_dict()["pending"] == 0
+    assert _stored(store, "a") == [(0, "user", "written elsewhere"), (1, "assistant", "after")]
+    assert _stored(store, "b") == [(0, "user", "kept")]
+    # Nothing is left waiting for the session, so its history can be read
+    assert len(store._page("a", None, 10)) == 2
+
+
+def test_pending_messages_are_capped(store, monkeypatch):
+    def unavailable(rows):
+        raise OSError("database is unavailable")
+
+    monkeypatch.setattr(store.backend, "append", unavailable)
+    store.max_pending = 3
+    memory = store.get("a")
+    for i in range(5):
+        memory.save_message("user", f"message {i}")
+    store.flush()
+
+    assert store.stats.dropped == 2
+    assert store.stats.write_errors == 1
+    assert [row[3] for row in store._pending] == ["message 2", "message 3", "message 4"]
+
+    monkeypatch.undo()
+    store.flush()
+    assert [row[0] for row in _stored(store, "a")] == [2, 3, 4]
+
+
+class _ReloadingLLM:
+    """Summarizer during whose call the memory is loaded again, as when it is revived after its session changed."""
+
+    def __init__(self, store: ConversationMemoryStore, memory):
+        self.store, self.memory = store, memory
+
+    def invoke(self, prompt: str) -> str:
+        self.store.flush()
+        self.memory._load(*self.store._load(self.memory.session_id))
+        return "summary"
+
+
+def test_compaction_is_discarded_when_the_memory_is_reloaded(store):
+    from aisync.engines.memory import MemoryCompactor
+
+    memory = store.get("a")
+    for i in range(6):
+        memory.save_message("user", f"message {i}")
+    compactor = MemoryCompactor(_ReloadingLLM(store, memory), threshold=2, keep_tokens=1)
+    messages = memory.format_buffer_memory()
+
+    compactor._compact(memory)
+
+    assert compactor.stats.discarded == 1 and compactor.stats.compactions == 0
+    assert memory.summary == "" and memory.format_buffer_memory() == messages
+    assert store.backend.load_summary("a") is None
+    compactor.close()
+
+
+def test_compaction_summary_is_saved_in_session_numbering(store):
+    from aisync.engines.memory import MemoryCompactor
+
+    class Summarizer:
+        def invoke(self, prompt: str) -> str:
+            return "summary"
+
+    memory = store.get("a")
+    for i in range(6):
+        memory.save_message("user", f"message {i}")
+    compactor = MemoryCompactor(Summarizer(), threshold=5, keep_tokens=4)
+
+    compactor._compact(memory)
+    compactor.close()
+
+    assert store.backend.load_summary("a") == ("summary", 5)
+    store.flush()
+    reloaded = ConversationMemoryStore(store.backend, max_sessions=2, shards=1).get("a")
+    assert reloaded.format_buffer_memory() == [("system", "summary"), ("user", "message 5")]